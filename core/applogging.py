@@ -0,0 +1,46 @@
+import atexit
+import queue
+import logging
+import logging.config
+import logging.handlers
+
+_listener = None
+
+
+def setup_logging(log_config):
+    """Configures logging once for the application
+
+    Handlers of the root logger from the config are moved to the queue
+    listener, which writes records in its own thread, the root logger
+    only puts records into the queue. Repeated calls do nothing.
+
+    :param log_config - logger settings dictionary
+    :return void
+
+    """
+    global _listener
+    if _listener:
+        return
+    logging.config.dictConfig(log_config)
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    for handler in handlers:
+        root.removeHandler(handler)
+    log_queue = queue.Queue(-1)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    _listener = logging.handlers.QueueListener(log_queue, *handlers,
+                                               respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Writes queued records and stops the listener thread
+
+    :return void
+
+    """
+    global _listener
+    if _listener:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,74 @@
+import json
+import logging
+
+from core.applogging import setup_logging
+from core.dynamicimport import DynamicImport
+from db.basedbdriver import BaseDbDriver
+from db.dbwriter import DbWriter
+
+LOG_CONF_FILE_PATH = './core/logger_conf.json'
+APP_CONF_FILE_PATH = './core/app_conf.json'
+
+
+def load_json(json_file_path):
+    """Reads data from a json-file"""
+    with open(json_file_path, 'r') as json_file:
+        return json.load(json_file)
+
+
+def get_logger(log_conf, name):
+    """
+
+    :param log_conf - logger settings dictionary
+    :param name - logger name
+    :return logger object
+
+    """
+    setup_logging(log_conf)
+    return logging.getLogger(name)
+
+
+def open_db(logger, log_config, db_conf):
+    """Creates the database driver, the database and applies migrations
+
+    :param logger - logger object
+    :param log_config - logger settings dictionary
+    :param db_conf - database settings dictionary
+    :return driver with the opened connection
+
+    """
+    driver = DynamicImport.get_object(logger, db_conf["db_driver_module"],
+                                      db_conf["db_driver_class"],
+                                      BaseDbDriver, log_config=log_config,
+                                      db_config=db_conf)
+    if not driver.is_db_exist():
+        logger.info('DB is not exist')
+        driver.init_db()
+        logger.info('DB was created')
+    driver.get_connection()
+    logger.info('DB connection was opened, settings: '
+                f'{driver.connection_settings()}')
+    applied = driver.migrate_db()
+    logger.info(f'DB migrations were applied: {applied}')
+    return driver
+
+
+def start_writer(logger, log_config, db_conf):
+    """Starts the writer thread with its own connection
+
+    :param logger - logger object
+    :param log_config - logger settings dictionary
+    :param db_conf - database settings dictionary
+    :return started DbWriter
+
+    """
+    driver = DynamicImport.get_object(logger, db_conf["db_driver_module"],
+                                      db_conf["db_driver_class"],
+                                      BaseDbDriver, log_config=log_config,
+                                      db_config=db_conf)
+    writer_conf = db_conf["writer_conf"]
+    writer = DbWriter(driver, writer_conf["batch_size"],
+                      writer_conf["batch_delay"])
+    writer.start()
+    logger.info('DB writer was started')
+    return writer
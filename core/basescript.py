@@ -1,3 +1,5 @@
+import time
+import threading
 from abc import ABCMeta, abstractmethod, abstractproperty
 from enum import Enum
 
@@ -16,6 +18,74 @@ class ErrorLevel(Enum):
     ERROR = 3
 
 
+class ExecutionMode(Enum):
+    """Script execution mode enumeration"""
+    THREAD = "thread"
+    PROCESS = "process"
+
+
+class CheckCancelled(Exception):
+    """Exception for the check which was cancelled or timed out"""
+    pass
+
+
+class CancelToken(object):
+    """Token for the cooperative cancellation of the check
+
+    The token is cancelled by the user or when the timeout is expired.
+    The event of the token can be shared with a child process
+    (multiprocessing Event), then the script there sees the cancelling.
+
+    """
+
+    def __init__(self, timeout=None, event=None):
+        self._event = event or threading.Event()
+        self._deadline = None
+        self.start(timeout)
+
+    def start(self, timeout):
+        """Starts the timeout of the check from the current time
+
+        :param timeout - time limit in seconds, None for no limit
+
+        """
+        self._deadline = time.monotonic() + timeout if timeout else None
+
+    def cancel(self):
+        """Cancels the check"""
+        self._event.set()
+
+    @property
+    def is_cancelled(self):
+        """Returns True if the check was cancelled or timed out"""
+        return self._event.is_set() or self.is_timed_out
+
+    @property
+    def is_timed_out(self):
+        """Returns True if the timeout of the check is expired"""
+        return self._deadline is not None \
+            and time.monotonic() >= self._deadline
+
+    def wait(self, seconds):
+        """Sleeps for seconds or until the check is cancelled
+
+        :param seconds - time to sleep
+        :return True if the check was cancelled
+
+        """
+        if self._deadline is not None:
+            seconds = min(seconds, max(0.0, self._deadline - time.monotonic()))
+        self._event.wait(seconds)
+        return self.is_cancelled
+
+    def raise_if_cancelled(self):
+        """Raises CheckCancelled if the check was cancelled or timed out"""
+        if self._event.is_set():
+            raise CheckCancelled("Проверка отменена")
+        if self.is_timed_out:
+            raise CheckCancelled("Превышено время выполнения проверки")
+
+
 class CheckObject(object):
     """Class for script result object"""
     def __init__(self, name, identifier, comment, author, date, error_level,
@@ -37,6 +107,7 @@ class CheckObject(object):
 class BaseScript(object):
     """Abstract class which defines script object"""
     __metaclass__ = ABCMeta
+    cancel_token = None  # CancelToken of the running check
 
     @abstractmethod
     def test(self):
@@ -53,6 +124,11 @@ class BaseScript(object):
 
         :param fact_check_id - fact_check table record identifier
         :return Count of checked objects and script results (set of records)
+
+        The method can be a generator instead: it yields result records
+        (or lists of records) and returns count of checked objects,
+        the records are saved in bounded chunks while the script is running
+
         """
         pass
 
@@ -75,3 +151,42 @@ class BaseScript(object):
     def object_type(self):
         """Returns script results type"""
         pass
+
+    @property
+    def execution_mode(self):
+        """Returns script execution mode or None to use the default one
+
+        ExecutionMode.PROCESS should be returned by CPU-heavy scripts,
+        which are run in a separate process then
+
+        """
+        return None
+
+    @property
+    def timeout(self):
+        """Returns max execution time of the check in seconds or None
+        to use the default one
+
+        """
+        return None
+
+    @property
+    def is_cancelled(self):
+        """Returns True if the check was cancelled or timed out
+
+        Long running scripts should check it and stop the work
+
+        """
+        return self.cancel_token is not None and self.cancel_token.is_cancelled
+
+    def wait(self, seconds):
+        """Sleeps for seconds or until the check is cancelled
+
+        :param seconds - time to sleep
+        :return True if the check was cancelled
+
+        """
+        if self.cancel_token is None:
+            time.sleep(seconds)
+            return False
+        return self.cancel_token.wait(seconds)
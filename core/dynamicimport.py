@@ -1,12 +1,14 @@
 import importlib
+import os
+import sys
+import types
 
 
 class DynamicImport:
     """Class for dynamic import modules and instances objects of target class"""
 
     @staticmethod
-    def get_object(logger, mod_name, target_cls, base_cls: type = None,
-                   **kwargs):
+    def get_class(logger, mod_name, target_cls, base_cls: type = None):
         """
         Imports the module, searches target class in the module,
         verifies that target class is a subclass of base class
@@ -15,8 +17,7 @@ class DynamicImport:
         :param mod_name: module name to import
         :param target_cls: target class name
         :param base_cls: base class name
-        :param kwargs: parameters to created object of target class
-        :return: object of target class, which was created with kwargs
+        :return: target class
 
         """
         module = importlib.import_module(mod_name)
@@ -29,6 +30,66 @@ class DynamicImport:
             assert issubclass(cls, base_cls), \
                 "class {} should inherit from {}".format(target_cls,
                                                          base_cls.__name__)
+        return cls
+
+    @staticmethod
+    def get_class_from_source(logger, mod_name, file_path, source, target_cls,
+                              base_cls: type = None):
+        """
+        Creates the module from the source text, searches target class
+        in the module, verifies that target class is a subclass of base class.
+        The module replaces the module with the same name in sys.modules.
+
+        :param logger: logger object
+        :param mod_name: module name
+        :param file_path: path of the module file
+        :param source: text of the module
+        :param target_cls: target class name
+        :param base_cls: base class name
+        :return: target class
+
+        """
+        logger.info('loading module {} from {}'.format(mod_name, file_path))
+        file_path = os.path.abspath(file_path)  # as for imported modules
+        code = compile(source, file_path, "exec")
+        module = types.ModuleType(mod_name)
+        module.__file__ = file_path
+        module.__package__ = mod_name.rpartition(".")[0]
+        previous = sys.modules.get(mod_name)
+        sys.modules[mod_name] = module
+        try:
+            exec(code, module.__dict__)
+        except BaseException:
+            if previous:
+                sys.modules[mod_name] = previous
+            else:
+                del sys.modules[mod_name]
+            raise
+        assert hasattr(module, target_cls), \
+            "class {} is not in {}".format(target_cls, mod_name)
+        cls = getattr(module, target_cls)
+        if base_cls:
+            assert issubclass(cls, base_cls), \
+                "class {} should inherit from {}".format(target_cls,
+                                                         base_cls.__name__)
+        return cls
+
+    @staticmethod
+    def get_object(logger, mod_name, target_cls, base_cls: type = None,
+                   **kwargs):
+        """
+        Imports the module, searches target class in the module,
+        verifies that target class is a subclass of base class
+
+        :param logger: logger object
+        :param mod_name: module name to import
+        :param target_cls: target class name
+        :param base_cls: base class name
+        :param kwargs: parameters to created object of target class
+        :return: object of target class, which was created with kwargs
+
+        """
+        cls = DynamicImport.get_class(logger, mod_name, target_cls, base_cls)
         logger.debug('initialising {} with params {}'.format(target_cls,
                                                              kwargs))
         return cls(**kwargs)
@@ -0,0 +1,39 @@
+import queue
+from collections import OrderedDict, deque
+
+
+class FairQueue(queue.Queue):
+    """Queue of checks with priority classes and fair share of users
+
+    Items with the smaller priority value are got first. Inside the
+    priority class users are served by turns, so a lot of checks of one
+    user do not delay checks of other users. Checks of the user are got
+    in the put order. Items must have priority and user_id attributes.
+
+    """
+
+    def _init(self, maxsize):
+        self._classes = {}  # priority: OrderedDict user_id: deque of items
+        self._count = 0
+
+    def _qsize(self):
+        return self._count
+
+    def _put(self, item):
+        users = self._classes.setdefault(item.priority, OrderedDict())
+        users.setdefault(item.user_id, deque()).append(item)
+        self._count += 1
+
+    def _get(self):
+        priority = min(self._classes)
+        users = self._classes[priority]
+        user_id, items = next(iter(users.items()))
+        item = items.popleft()
+        if items:
+            users.move_to_end(user_id)  # the next item of the user waits
+        else:
+            del users[user_id]
+            if not users:
+                del self._classes[priority]
+        self._count -= 1
+        return item
@@ -0,0 +1,172 @@
+import time
+import traceback
+
+from core.basescript import CancelToken
+from core.scriptqueue import run_isolated
+
+RESULT_POLL_INTERVAL = 0.2  # seconds between checks of the cancel token
+CANCEL_GRACE_PERIOD = 2.0  # seconds for the script to stop before the kill
+
+# Types of messages from the child process
+CHUNK = "chunk"
+DONE = "done"
+ERROR = "error"
+
+
+def serve(conn, cancel_event):
+    """Runs scripts by the tasks from the pipe, is called in a child process
+
+    :param conn - child end of the pipe, it receives arguments
+    of run_isolated and sends back tuples: message type and value.
+    Chunks of rows are sent as (CHUNK, rows), the count of checked objects
+    as (DONE, count) and the error as (ERROR, traceback text)
+    :param cancel_event - multiprocessing Event, which is set by the parent
+    process to cancel the running script
+    :return void
+
+    """
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        try:
+            chunks = run_isolated(*task,
+                                  token=CancelToken(event=cancel_event))
+            while True:
+                try:
+                    chunk = next(chunks)
+                except StopIteration as stop:
+                    conn.send((DONE, stop.value))
+                    break
+                conn.send((CHUNK, chunk))  # waits while the pipe is full
+        except Exception:
+            # exceptions of scripts can not be pickled
+            conn.send((ERROR, traceback.format_exc()))
+
+
+class IsolatedRunner(object):
+    """Class for running scripts in a separate process, which can be killed
+
+    The process is reused for the next scripts. If the check is cancelled
+    or timed out, the script is asked to stop by the cancel event. It is
+    terminated if it does not stop in CANCEL_GRACE_PERIOD seconds and the
+    process is started again for the next script.
+
+    """
+
+    def __init__(self, logger, context):
+        self._logger = logger
+        self._context = context
+        self._process = None
+        self._conn = None
+        self._cancel_event = None
+
+    def run(self, task, token):
+        """Runs the script in the child process and receives its results
+
+        The script is started at the first next() call of the generator.
+        The script is stopped if the generator is closed before the end.
+
+        :param task - arguments of run_isolated
+        :param token - CancelToken of the check
+        :return generator, which yields lists of rows and returns count
+        of checked objects
+
+        """
+        if not self._process or not self._process.is_alive():
+            self._start()
+        self._cancel_event.clear()
+        self._conn.send(task)
+        finished = False
+        try:
+            while True:
+                message, value = self._receive(token)
+                if message == CHUNK:
+                    yield value
+                    continue
+                finished = True
+                if message == ERROR:
+                    raise RuntimeError(f"Ошибка выполнения скрипта:\n{value}")
+                return value
+        finally:
+            if not finished and not self._stop():
+                if self._process:
+                    self._logger.warning("Terminating script process, "
+                                         f"pid: {self._process.pid}")
+                self.terminate()
+
+    def _receive(self, token):
+        while not self._conn.poll(RESULT_POLL_INTERVAL):
+            token.raise_if_cancelled()
+            if not self._process.is_alive():
+                raise RuntimeError("Процесс скрипта был завершен")
+        try:
+            return self._conn.recv()
+        except (EOFError, OSError):
+            raise RuntimeError("Процесс скрипта был завершен")
+
+    def _stop(self):
+        """Asks the script to stop and waits for the end of the task
+
+        :return True if the task was finished and the process can be reused
+
+        """
+        if not self._process or not self._process.is_alive():
+            return False
+        self._cancel_event.set()
+        deadline = time.monotonic() + CANCEL_GRACE_PERIOD
+        while True:
+            timeout = deadline - time.monotonic()
+            try:
+                if timeout <= 0 or not self._conn.poll(timeout):
+                    return False
+                if self._conn.recv()[0] != CHUNK:
+                    return True
+            except (EOFError, OSError):
+                return False
+
+    def terminate(self):
+        """Kills the child process
+
+        :return void
+
+        """
+        if self._process:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+        self._cancel_event = None
+
+    def close(self):
+        """Stops the child process after the current script
+
+        :return void
+
+        """
+        if self._process and self._process.is_alive():
+            try:
+                self._conn.send(None)
+                self._process.join()
+            except OSError as ex:
+                self._logger.warning(f"Script process stopping error: {ex}")
+        self.terminate()
+
+    def _start(self):
+        self.terminate()
+        self._conn, child_conn = self._context.Pipe()
+        self._cancel_event = self._context.Event()
+        self._process = self._context.Process(target=serve,
+                                              args=(child_conn,
+                                                    self._cancel_event),
+                                              name="script_process",
+                                              daemon=True)
+        self._process.start()
+        child_conn.close()
+        self._logger.info(f"Script process was started, "
+                          f"pid: {self._process.pid}")
@@ -0,0 +1,168 @@
+import logging
+import queue
+import time
+import threading
+import multiprocessing
+
+from core.basescript import ExecutionMode, CancelToken
+from core.isolatedrunner import IsolatedRunner
+from core.dynamicimport import DynamicImport
+from db.basedbdriver import BaseDbDriver
+from db.dbwriter import WriterDbDriver
+
+QUEUE_GET_TIMEOUT = 0.5  # seconds between checks of the stop event
+
+
+class QueueWorkerPool(object):
+    """Class for running checks from the script queue in several threads"""
+
+    def __init__(self, log_config, db_config, queue, worker_count=1,
+                 execution_mode="thread", process_count=None,
+                 check_timeout=None, writer=None, driver=None):
+        self._logger = logging.getLogger(__name__)
+        self._logger.info("Creating QueueWorkerPool")
+        self._log_config = log_config
+        self._db_config = db_config
+        self._queue = queue
+        self._worker_count = max(1, worker_count)
+        self._execution_mode = ExecutionMode(execution_mode)
+        self._process_count = process_count or self._worker_count
+        self._process_slots = threading.BoundedSemaphore(self._process_count)
+        self._check_timeout = check_timeout
+        self._writer = writer
+        self._driver = driver  # shared by workers if it is thread safe
+        self._context = multiprocessing.get_context("spawn")
+        self._threads = []
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._current_checks = {}
+        self._tokens = {}
+
+    @property
+    def worker_count(self):
+        """Returns count of the queue workers"""
+        return self._worker_count
+
+    @property
+    def current_checks(self):
+        """Returns running checks as dictionary fact_check_id: script name"""
+        with self._lock:
+            return dict(self._current_checks)
+
+    def start(self):
+        """Starts the queue workers
+
+        :return void
+
+        """
+        for num in range(self._worker_count):
+            thread = threading.Thread(target=self._handle,
+                                      name=f"queue_worker_{num}",
+                                      daemon=True)
+            self._threads.append(thread)
+            thread.start()
+        self._logger.info(f"{self._worker_count} queue workers were started")
+
+    def cancel(self, fact_check_id):
+        """Cancels the running check
+
+        The script is stopped by the cancel token, the script process is
+        killed if the script runs in a separate process
+
+        :param fact_check_id - fact_check table record identifier
+        :return True if the check is running
+
+        """
+        with self._lock:
+            token = self._tokens.get(fact_check_id)
+        if token:
+            self._logger.info(f"Cancelling check {fact_check_id}")
+            token.cancel()
+        return token is not None
+
+    def shutdown(self, wait=False, cancel=False, timeout=None):
+        """Stops the queue workers
+
+        Workers do not take new checks from the queue after the call,
+        script processes are stopped after the running checks
+
+        :param wait - wait for the running checks to finish, the writer
+        must not be closed before the running checks are saved
+        :param cancel - cancel the running checks
+        :param timeout - max time of waiting in seconds, None for no limit
+        :return void
+
+        """
+        self._stop_event.set()
+        if cancel:
+            with self._lock:
+                tokens = list(self._tokens.values())
+            for token in tokens:
+                token.cancel()
+        if wait:
+            deadline = time.monotonic() + timeout if timeout else None
+            for thread in self._threads:
+                thread.join(max(0.0, deadline - time.monotonic())
+                            if deadline else None)
+            alive = sum(thread.is_alive() for thread in self._threads)
+            if alive:
+                self._logger.warning(f"{alive} queue workers were not "
+                                     f"stopped in {timeout} s")
+            else:
+                self._logger.info("Queue workers were stopped")
+
+    def _is_isolated(self, item):
+        mode = item.execution_mode or self._execution_mode
+        return mode == ExecutionMode.PROCESS
+
+    def _run_item(self, driver, runner, item, token):
+        timeout = item.timeout or self._check_timeout
+        if not self._is_isolated(item):
+            token.start(timeout)
+            item.run_and_save(driver, token=token)
+            return
+        # process_count limits count of the running script processes,
+        # the timeout is counted after the waiting for the slot
+        with self._process_slots:
+            token.start(timeout)
+            item.run_and_save(driver, runner, token)
+
+    def _get_driver(self):
+        if self._driver and self._driver.is_thread_safe:
+            driver = self._driver
+        else:
+            driver = DynamicImport.get_object(
+                self._logger, self._db_config["db_driver_module"],
+                self._db_config["db_driver_class"], BaseDbDriver,
+                log_config=self._log_config, db_config=self._db_config)
+        driver.get_connection()
+        if self._writer:
+            return WriterDbDriver(driver, self._writer)
+        return driver
+
+    def _handle(self):
+        self._logger.debug("Queue worker is running")
+        driver = self._get_driver()
+        runner = IsolatedRunner(self._logger, self._context)
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    item = self._queue.get(timeout=QUEUE_GET_TIMEOUT)
+                except queue.Empty:
+                    continue
+                token = CancelToken()  # the timeout is started by the run
+                with self._lock:
+                    self._current_checks[item.fact_check_id] = item.script_name
+                    self._tokens[item.fact_check_id] = token
+                try:
+                    self._run_item(driver, runner, item, token)
+                except Exception as ex:
+                    self._logger.exception(ex)
+                finally:
+                    with self._lock:
+                        self._current_checks.pop(item.fact_check_id, None)
+                        self._tokens.pop(item.fact_check_id, None)
+                    self._queue.task_done()
+        finally:
+            runner.close()
+            driver.close_connection()
@@ -0,0 +1,216 @@
+import logging
+import time
+import random
+import datetime
+
+# Ranges of the cron fields: minute, hour, day of month, month, day of week
+CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+CRON_SEARCH_DAYS = 366 * 5  # every valid expression matches in this period
+
+
+class CronSchedule(object):
+    """Class for the cron expression with five fields
+
+    Fields support "*", numbers, ranges "a-b", steps "*/n" and "a-b/n"
+    and lists of them. Day of week 0 and 7 are Sunday. If both day fields
+    are restricted, the day matches any of them as in cron.
+
+    """
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != len(CRON_FIELDS):
+            raise ValueError(f"Неверное cron выражение: {expression}")
+        values = [self._parse_field(field, low, high)
+                  for field, (low, high) in zip(fields, CRON_FIELDS)]
+        self._minutes, self._hours, self._days, self._months, weekdays = values
+        self._weekdays = {day % 7 for day in weekdays}
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse_field(field, low, high):
+        values = set()
+        for item in field.split(","):
+            value_range, _, step = item.partition("/")
+            try:
+                step = int(step) if step else 1
+                if value_range == "*":
+                    start, end = low, high
+                elif "-" in value_range:
+                    start, end = map(int, value_range.split("-"))
+                else:
+                    start = int(value_range)
+                    end = high if "/" in item else start
+            except ValueError:
+                raise ValueError(f"Неверное поле cron выражения: {field}")
+            if start < low or end > high or start > end or step < 1:
+                raise ValueError(f"Неверное поле cron выражения: {field}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, value):
+        day = value.day in self._days
+        weekday = (value.weekday() + 1) % 7 in self._weekdays
+        if self._any_day:
+            return weekday
+        if self._any_weekday:
+            return day
+        return day or weekday
+
+    def next_after(self, value):
+        """Returns the first time of the schedule after the value
+
+        :param value: local time as datetime
+        :return: datetime of the next check
+
+        """
+        value = value.replace(second=0, microsecond=0) \
+            + datetime.timedelta(minutes=1)
+        limit = value + datetime.timedelta(days=CRON_SEARCH_DAYS)
+        while value < limit:
+            if value.month not in self._months:
+                if value.month == 12:
+                    value = value.replace(year=value.year + 1, month=1, day=1,
+                                          hour=0, minute=0)
+                else:
+                    value = value.replace(month=value.month + 1, day=1,
+                                          hour=0, minute=0)
+            elif not self._day_matches(value):
+                value = value.replace(hour=0, minute=0) \
+                    + datetime.timedelta(days=1)
+            elif value.hour not in self._hours:
+                value = value.replace(minute=0) + datetime.timedelta(hours=1)
+            elif value.minute not in self._minutes:
+                value += datetime.timedelta(minutes=1)
+            else:
+                return value
+        raise ValueError("Время запуска по cron выражению не найдено")
+
+    def next_ts(self, ts):
+        """Returns epoch seconds of the first check after ts"""
+        value = self.next_after(datetime.datetime.fromtimestamp(ts))
+        return int(value.timestamp())
+
+
+def parse_schedule(text):
+    """Parses the schedule from the user input
+
+    :param text: period of the checks in seconds or cron expression
+    :return: tuple of the interval and the cron expression, one of them
+    is None
+
+    """
+    text = text.strip()
+    if text.isdigit():
+        interval = int(text)
+        if interval < 1:
+            raise ValueError("Период запуска должен быть больше нуля")
+        return interval, None
+    CronSchedule(text)  # validation
+    return None, text
+
+
+class Scheduler(object):
+    """Class for putting scheduled checks to the script queue
+
+    Schedules are stored in the check_schedule table. The next check time
+    is moved by the conditional update, so several application instances
+    do not put the same check twice. Missed checks are put once or all of
+    them (up to max_catch_up) if the schedule has the catch up flag.
+    The random delay up to the schedule jitter spreads checks over time.
+
+    """
+
+    def __init__(self, driver, log_config, script_queue, config):
+        self._logger = logging.getLogger(__name__)
+        self._logger.info("Creating Scheduler")
+        self._driver = driver
+        self._script_queue = script_queue
+        self._max_catch_up = config["max_catch_up"]
+        self._jitter = config["jitter"]
+        self._catch_up = config["catch_up"]
+
+    def add(self, user_script_link_id, text):
+        """Saves the schedule for the link instead of the previous one
+
+        :param user_script_link_id: identifier from the user_script_link table
+        :param text: period of the checks in seconds or cron expression
+        :return void
+
+        """
+        interval, cron = parse_schedule(text)
+        now_ts = int(time.time())
+        if interval:
+            next_ts = now_ts + interval
+        else:
+            next_ts = CronSchedule(cron).next_ts(now_ts)
+        self.remove(user_script_link_id)
+        self._driver.check_schedule_ins(user_script_link_id, interval, cron,
+                                        self._jitter, self._catch_up, next_ts)
+
+    def remove(self, user_script_link_id):
+        """Deletes the schedule of the link if it exists
+
+        :param user_script_link_id: identifier from the user_script_link table
+        :return void
+
+        """
+        schedule = self._driver.check_schedule_srch(user_script_link_id)
+        if schedule:
+            self._driver.check_schedule_del(schedule[0])
+
+    def get_text(self, user_script_link_id):
+        """Returns the schedule of the link as the user input or None"""
+        schedule = self._driver.check_schedule_srch(user_script_link_id)
+        if not schedule:
+            return None
+        return str(schedule[1]) if schedule[1] else schedule[2]
+
+    def run_pending(self, now_ts=None, driver=None):
+        """Puts checks of the due schedules to the queue
+
+        :param now_ts: current time in epoch seconds
+        :param driver: driver instead of the scheduler driver, it is used
+        for running from another thread
+        :return count of put checks
+
+        """
+        driver = driver or self._driver
+        now_ts = int(now_ts or time.time())
+        count = 0
+        for schedule in driver.check_schedule_due(now_ts):
+            try:
+                count += self._run_schedule(driver, schedule, now_ts)
+            except Exception as ex:
+                self._logger.exception(ex)
+        return count
+
+    def _get_slots(self, interval, cron, next_ts, now_ts):
+        """Returns count of the missed checks and the next check time"""
+        if interval:
+            missed = (now_ts - next_ts) // interval + 1
+            return missed, next_ts + missed * interval
+        cron_schedule = CronSchedule(cron)
+        missed = 0
+        while next_ts <= now_ts:
+            missed += 1
+            if missed > self._max_catch_up:
+                return missed, cron_schedule.next_ts(now_ts)
+            next_ts = cron_schedule.next_ts(next_ts)
+        return missed, next_ts
+
+    def _run_schedule(self, driver, schedule, now_ts):
+        schedule_id, link_id, script_id, interval, cron, jitter, catch_up, \
+            next_ts, run_ts = schedule
+        missed, next_ts = self._get_slots(interval, cron, next_ts, now_ts)
+        next_run_ts = next_ts + random.randint(0, jitter)
+        if not driver.check_schedule_upd_next(schedule_id, run_ts, next_ts,
+                                              next_run_ts):
+            return 0  # the schedule was run by another instance
+        count = min(missed, self._max_catch_up) if catch_up else 1
+        self._logger.info(f"Schedule {schedule_id} is due, "
+                          f"missed: {missed}, checks: {count}")
+        for _ in range(count):
+            self._script_queue.put(script_id, link_id, driver=driver)
+        return count
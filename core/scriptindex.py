@@ -0,0 +1,111 @@
+import os
+import time
+import fnmatch
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ScriptIndex(object):
+    """Class for the in-memory index of script file hashes
+
+    The folder is scanned with one os.scandir call, only new and changed
+    files are hashed in the thread pool. The index is scanned again
+    when it is older than max_age seconds.
+
+    """
+
+    def __init__(self, logger, loader, folder, max_age=2.0, hash_workers=4):
+        self._logger = logger
+        self._loader = loader
+        self._folder = folder
+        self._max_age = max_age
+        self._executor = ThreadPoolExecutor(max_workers=hash_workers,
+                                            thread_name_prefix="script_hash")
+        self._lock = threading.Lock()
+        self._files = {}  # file name: (file key, hash)
+        self._scan_time = None
+        self._generation = 0  # is increased when the files are changed
+
+    def refresh_async(self):
+        """Starts scanning of the folder in the background thread
+
+        :return void
+
+        """
+        threading.Thread(target=self.refresh, name="script_index",
+                         daemon=True).start()
+
+    def refresh(self):
+        """Scans the folder and hashes new and changed files
+
+        :return void
+
+        """
+        with self._lock:
+            files = {}
+            changed = []
+            with os.scandir(self._folder) as entries:
+                for entry in entries:
+                    if not entry.is_file() \
+                            or not fnmatch.fnmatch(entry.name, "*.py"):
+                        continue
+                    stat = entry.stat()
+                    file_key = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+                    cached = self._files.get(entry.name)
+                    if cached and cached[0] == file_key:
+                        files[entry.name] = cached
+                    else:
+                        changed.append((entry.name, entry.path, file_key))
+            hashes = self._executor.map(self._read_hash,
+                                        [path for _, path, _ in changed])
+            for (name, _, file_key), file_hash in zip(changed, hashes):
+                if file_hash:
+                    files[name] = (file_key, file_hash)
+            if files != self._files:
+                self._generation += 1
+            self._files = files
+            self._scan_time = time.monotonic()
+        self._logger.debug(f"Script folder was scanned, files: {len(files)}, "
+                           f"hashed: {len(changed)}")
+
+    @property
+    def generation(self):
+        """Returns the number which is increased after changes of the files
+
+        The folder is scanned again if the index is stale
+
+        """
+        self._refresh_if_stale()
+        return self._generation
+
+    def get_hash(self, file_name):
+        """Returns the hash of the script file from the index
+
+        :param file_name: script file name in the folder
+        :return: hash as bytes or None if the file is not found
+
+        """
+        self._refresh_if_stale()
+        cached = self._files.get(file_name)
+        return cached[1] if cached else None
+
+    def get_hashes(self):
+        """Returns hashes of all script files from the index
+
+        :return: dictionary file name: hash
+
+        """
+        self._refresh_if_stale()
+        return {name: cached[1] for name, cached in self._files.items()}
+
+    def _refresh_if_stale(self):
+        if self._scan_time is None \
+                or time.monotonic() - self._scan_time > self._max_age:
+            self.refresh()
+
+    def _read_hash(self, file_path):
+        try:
+            return self._loader.get_hash(file_path)
+        except OSError as ex:
+            self._logger.warning(f"Script file reading error: {ex}")
+            return None
@@ -0,0 +1,108 @@
+import os
+import hashlib
+import threading
+
+from core.basescript import BaseScript
+from core.dynamicimport import DynamicImport
+
+
+class ScriptLoader(object):
+    """Class for loading script classes with reloading of changed files
+
+    Classes and file hashes are cached by the file path together with
+    the file key (mtime, size, inode), so a lookup of the unchanged file
+    costs a stat call. The module is created from the same text which was
+    hashed, so the loaded class always matches its hash: neither a module
+    imported before nor a stale bytecode file is used. If the expected hash
+    is passed, the class of another version of the file is not returned.
+    The module code is run under the lock of its class only, so a script
+    which hangs at import does not block loading of other files.
+
+    """
+
+    def __init__(self, logger):
+        self._logger = logger
+        self._lock = threading.Lock()  # for the dictionaries only
+        self._hashes = {}  # path: (file key, hash)
+        self._classes = {}  # (path, class name): (file key, hash, class)
+        self._class_locks = {}  # (path, class name): lock of the loading
+
+    @staticmethod
+    def get_file_key(file_path):
+        """Returns the key which is changed with the file
+
+        :param file_path: script file path
+        :return: tuple of mtime, size and inode of the file
+
+        """
+        stat = os.stat(file_path)
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _read(self, file_path, file_key):
+        with open(file_path, 'r', encoding="utf-8") as file:
+            script_text = file.read()
+        file_hash = hashlib.sha256(script_text.encode()).digest()
+        with self._lock:
+            self._hashes[file_path] = (file_key, file_hash)
+        return script_text, file_hash
+
+    def get_hash(self, file_path):
+        """Returns SHA-256 hash of the script text
+
+        :param file_path: script file path
+        :return: hash as bytes
+
+        """
+        file_key = ScriptLoader.get_file_key(file_path)
+        with self._lock:
+            cached = self._hashes.get(file_path)
+        if cached and cached[0] == file_key:
+            return cached[1]
+        return self._read(file_path, file_key)[1]
+
+    @staticmethod
+    def check_hash(file_path, file_hash, expected_hash):
+        """Raises the error if the hash differs from the expected one
+
+        :param file_path: script file path
+        :param file_hash: hash of the script text
+        :param expected_hash: verified hash or None to skip the check
+        :return: void
+
+        """
+        if expected_hash is not None and file_hash != expected_hash:
+            raise RuntimeError(f"Hash code check was failed: {file_path}")
+
+    def get_class(self, file_path, mod_name, cls_name, expected_hash=None):
+        """Returns the script class, the module is reloaded if it was changed
+
+        :param file_path: script file path
+        :param mod_name: script module name
+        :param cls_name: script class name
+        :param expected_hash: verified hash of the script text, the error is
+        raised if the file was changed, None to skip the check
+        :return: class inherited from BaseScript
+
+        """
+        key = (file_path, cls_name)
+        file_key = ScriptLoader.get_file_key(file_path)
+        with self._lock:
+            cached = self._classes.get(key)
+            class_lock = self._class_locks.setdefault(key, threading.Lock())
+        if cached and cached[0] == file_key:
+            ScriptLoader.check_hash(file_path, cached[1], expected_hash)
+            return cached[2]
+        with class_lock:
+            script_text, file_hash = self._read(file_path, file_key)
+            ScriptLoader.check_hash(file_path, file_hash, expected_hash)
+            with self._lock:
+                cached = self._classes.get(key)
+            if cached and cached[1] == file_hash:
+                cls = cached[2]  # loaded by another thread or touched file
+            else:
+                cls = DynamicImport.get_class_from_source(
+                    self._logger, mod_name, file_path, script_text, cls_name,
+                    BaseScript)
+            with self._lock:
+                self._classes[key] = (file_key, file_hash, cls)
+        return cls
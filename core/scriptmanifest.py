@@ -0,0 +1,101 @@
+import time
+import threading
+from concurrent.futures import Future, wait
+
+
+class ScriptManifest(object):
+    """Class for caching script metadata by the hash of the script file
+
+    Metadata of new files is read in daemon threads: the script is
+    imported, created and tested. The search waits while scripts are
+    finished at least one per timeout seconds, so a hanging test can not
+    block it, the metadata of such script is saved when it is finished.
+    A reading which runs longer than the timeout is marked as hung: it is
+    not started again and it does not take a worker slot, so hung tests
+    can not stop reading of other scripts.
+
+    """
+
+    def __init__(self, logger, read_script, max_workers=4, timeout=5.0):
+        self._logger = logger
+        self._read_script = read_script
+        self._timeout = timeout
+        self._slots = threading.Semaphore(max_workers)
+        self._lock = threading.Lock()
+        self._entries = {}  # hash: (name, description, author, test) or None
+        self._futures = {}  # hash: future of the running reading
+        self._started = {}  # hash: start time of the reading with a slot
+        self._hung = set()  # hashes of the readings which released slots
+
+    def get_entries(self, files):
+        """Returns metadata of the scripts
+
+        :param files: list of tuples (file name, file hash)
+        :return: dictionary file name: (name, description, author, test),
+        test is None if the script did not respond, files which could not
+        be imported are not included
+
+        """
+        futures = {}
+        with self._lock:
+            for file_name, file_hash in files:
+                if file_hash in self._entries:
+                    continue
+                future = self._futures.get(file_hash)
+                if not future:
+                    future = Future()
+                    self._futures[file_hash] = future
+                    threading.Thread(target=self._read_entry,
+                                     args=(file_name, file_hash, future),
+                                     name="manifest", daemon=True).start()
+                futures[file_hash] = future
+        pending = {future for file_hash, future in futures.items()
+                   if file_hash not in self._hung}
+        while pending:
+            done, pending = wait(pending, self._timeout)
+            if not done:
+                self._logger.warning(f"{len(pending)} scripts did not "
+                                     f"respond in {self._timeout} s")
+                self._mark_hung()
+                break
+        entries = {}
+        with self._lock:
+            for file_name, file_hash in files:
+                if file_hash in self._entries:
+                    entry = self._entries[file_hash]
+                    if entry:
+                        entries[file_name] = entry
+                elif file_hash in futures:
+                    entries[file_name] = ("", "", "", None)
+        return entries
+
+    def _mark_hung(self):
+        now = time.monotonic()
+        with self._lock:
+            for file_hash, start in list(self._started.items()):
+                if now - start >= self._timeout:
+                    del self._started[file_hash]
+                    self._hung.add(file_hash)
+                    self._slots.release()
+                    self._logger.warning(f"Script reading is hung, "
+                                         f"hash: {file_hash.hex()}")
+
+    def _read_entry(self, file_name, file_hash, future):
+        self._slots.acquire()
+        with self._lock:
+            self._started[file_hash] = time.monotonic()
+        entry = None
+        try:
+            script = self._read_script(file_name)
+            entry = (script.name, script.description, script.author,
+                     bool(script.test()))
+        except Exception as ex:
+            self._logger.exception(f"Script import error file: {file_name}")
+            self._logger.exception(ex)
+        with self._lock:
+            self._entries[file_hash] = entry
+            self._futures.pop(file_hash, None)
+            self._hung.discard(file_hash)
+            if self._started.pop(file_hash, None) is not None:
+                self._slots.release()  # hung readings released it before
+        future.set_result(entry)
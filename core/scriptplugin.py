@@ -1,46 +1,44 @@
 import logging
-import logging.config
 import os
 import fnmatch
-import hashlib
 import datetime
 
-from core.basescript import BaseScript
-from core.dynamicimport import DynamicImport
+from core.scriptloader import ScriptLoader
+from core.scriptindex import ScriptIndex
+from core.scriptmanifest import ScriptManifest
 
 
 class ScriptPlugin(object):
     """Class for managing scripts"""
 
     def __init__(self, log_config, config, driver):
-        logging.config.dictConfig(log_config)
         self._logger = logging.getLogger(__name__)
         self._logger.info('Creating ScriptPlugin')
         self._folder = config["folder"]
         self._prefix = config["prefix"]
         self._driver = driver
-
-    def _get_script(self, file_name):
+        self._loader = ScriptLoader(self._logger)
+        self._index = ScriptIndex(self._logger, self._loader, self._folder,
+                                  config["index_max_age"],
+                                  config["hash_workers"])
+        self._index.refresh_async()
+        self._manifest = ScriptManifest(self._logger, self._get_script,
+                                        config["manifest_workers"],
+                                        config["test_timeout"])
+
+    def _get_script(self, file_name, expected_hash=None):
         path = os.path.join(self._folder, file_name)
         if not os.path.exists(path):
             raise RuntimeError(f"File is not exists: {path}")
         cls_name = file_name.replace(".py", "")
         mod_name = ".".join([os.path.basename(self._folder), cls_name])
-        return DynamicImport.get_object(self._logger, mod_name, cls_name,
-                                        BaseScript)
-
-    @staticmethod
-    def _get_hash(file_path):
-        with open(file_path, 'r', encoding="utf-8") as file:
-            script_text = file.read()
-        return hashlib.sha256(script_text.encode()).digest()
-
-    @staticmethod
-    def _hash_check(file_path, hash_code):
-        with open(file_path, 'r', encoding="utf-8") as file:
-            script_text = file.read()
-        file_hash = hashlib.sha256(script_text.encode()).digest()
-        return file_hash == hash_code
+        cls = self._loader.get_class(path, mod_name, cls_name, expected_hash)
+        return cls()  # script objects keep the check state
+
+    @property
+    def index_generation(self):
+        """Returns the number which is changed with the script files"""
+        return self._index.generation
 
     def search_scripts(self):
         """
@@ -49,27 +47,26 @@ class ScriptPlugin(object):
         """
         script_names = set([row[1] + '.py'
                             for row in self._driver.script_rda()])
+        file_hashes = self._index.get_hashes()
+        files = [(file, file_hash) for file, file_hash in file_hashes.items()
+                 if fnmatch.fnmatch(file, self._prefix + '*.py')
+                 and file not in script_names]
+        entries = self._manifest.get_entries(files)
         new_scripts = []
-        file_names = set([file for file in os.listdir(self._folder)
-                         if fnmatch.fnmatch(file, self._prefix + '*.py')])
-        files = file_names - script_names
-        for file in files:
-            cls_name = file.replace(".py", "")
-            mod_name = ".".join([os.path.basename(self._folder), cls_name])
-            try:
-                script = DynamicImport.get_object(self._logger, mod_name,
-                                                  cls_name, BaseScript)
-                test = script.test()
-                new_scripts.append([file, script.name, script.description,
-                                    script.author, "готов" if test
-                                    else "не готов"])
-            except Exception as ex:
-                self._logger.exception(f"Script import error file: {file}")
-                self._logger.exception(ex)
+        for file, file_hash in sorted(files):
+            if file not in entries:
+                continue
+            name, description, author, test = entries[file]
+            if test is None:
+                status = "не отвечает"
+            else:
+                status = "готов" if test else "не готов"
+            new_scripts.append([file, name, description, author, status])
         return new_scripts
 
     def get_actual_scripts(self, limit, offset, user_id=None, name_pattern=None,
-                           date_from=None, date_to=None):
+                           date_from=None, date_to=None, after_id=None,
+                           driver=None):
         """
 
         :param limit - row count constraint
@@ -78,18 +75,21 @@ class ScriptPlugin(object):
         :param name_pattern: script name part for like search
         :param date_from: begin date constraint fot user_beg_date
         :param date_to: end date constraint fot user_beg_date
+        :param after_id: script_id of the last record from the previous page
+        :param driver: driver for reading the scripts instead of the plugin
+        driver, it is used for queries from another thread
         :return: List of actual scripts which are available to the user
         """
-        scripts = self._driver.script_rd_pg(limit, offset, user_id,
-                                            name_pattern, date_from, date_to)
+        driver = driver or self._driver
+        scripts = driver.script_rd_pg(limit, offset, user_id, name_pattern,
+                                      date_from, date_to, after_id)
         scripts = [[*row, None] for row in scripts]  # Status column is added
         for script in scripts:
             status = "Проверен"
-            file = script[2] + ".py"
-            path = os.path.join(self._folder, file)
-            if not os.path.exists(path):
+            file_hash = self._index.get_hash(script[2] + ".py")
+            if not file_hash:
                 status = "Файл скрипта не найден"
-            elif not ScriptPlugin._hash_check(path, script[0]):
+            elif file_hash != script[0]:
                 status = "Файл скрипта изменен"
             script[7] = status
         return [script[1:] for script in scripts]
@@ -105,7 +105,7 @@ class ScriptPlugin(object):
         script = self._get_script(file_name)
         self._driver.script_ins(script.name, script.description, script.author,
                                 datetime.datetime.now(),
-                                ScriptPlugin._get_hash(path),
+                                self._loader.get_hash(path),
                                 script.object_type.value)
 
     def update_script(self, script_id):
@@ -121,7 +121,7 @@ class ScriptPlugin(object):
         path = os.path.join(self._folder, file_name)
         script = self._get_script(file_name)
         self._driver.script_upd(script_id, script.name, script.description,
-                                script.author, ScriptPlugin._get_hash(path),
+                                script.author, self._loader.get_hash(path),
                                 script.object_type.value)
 
     def delete_script(self, script_id):
@@ -133,19 +133,16 @@ class ScriptPlugin(object):
         """
         self._driver.script_del(script_id, datetime.datetime.now())
 
-    def get_script(self, script_id):
+    def get_script(self, script_id, driver=None):
         """
 
         :param script_id: script table record identifier
+        :param driver: driver for reading the script instead of the plugin
+        driver, it is used for queries from another thread
         :return: script object
         """
-        script_rec = self._driver.script_rd(script_id)
-        file_name = script_rec[1] + ".py"
-        path = os.path.join(self._folder, file_name)
-        script = self._get_script(file_name)
-        if self._hash_check(path, script_rec[5]):
-            return script
-        else:
-            raise RuntimeError(f"Hash code check was failed: {path}")
+        script_rec = (driver or self._driver).script_rd(script_id)
+        # the class is loaded from the text with the verified hash only
+        return self._get_script(script_rec[1] + ".py", script_rec[5])
 
 
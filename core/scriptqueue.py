@@ -1,23 +1,127 @@
 import logging
-import logging.config
 import datetime
+import inspect
+import time
+from collections import Counter
+
+from core.basescript import ErrorLevel, CancelToken, CheckCancelled
+from core.scriptloader import ScriptLoader
 
 QUEUE = 1
 EXECUTE = 2
 FAIL = 3
 CANCEL = 4
+RUN = 5
+
+# Priority classes of checks, the smaller value runs first
+HIGH = 0
+NORMAL = 1
+LOW = 2
+
+OBJECT_CHUNK_SIZE = 1000
+ERROR_LEVEL_IDX = 5  # error level position in CheckObject.to_db_row()
+
+_loader = None  # script loader for hash checks and child processes
+
+
+def is_batch(value):
+    """Checks that the value yielded by the script is a list of rows
+
+    Any list is a batch (an empty one too), rows are tuples or lists
+
+    """
+    if not isinstance(value, list):
+        return False
+    for row in value:
+        if not isinstance(row, (tuple, list)):
+            raise RuntimeError(f"Неверная запись результатов скрипта: {row!r}")
+    return True
+
+
+def iter_chunks(result, token=None):
+    """Splits script results into chunks of at most OBJECT_CHUNK_SIZE rows
+
+    :param result - [count, rows] or generator, which yields rows or
+    lists of rows and returns count of checked objects, items of rows
+    in the first form are always rows
+    :param token - CancelToken which is checked before every next row
+    :return generator, which yields lists of rows and returns count
+    of checked objects
+
+    """
+    generated = inspect.isgenerator(result)
+    if generated:
+        obj_count, rows = None, result
+    else:
+        obj_count, rows = result[0], iter(result[1])
+    chunk = []
+    while True:
+        if token:
+            token.raise_if_cancelled()
+        try:
+            value = next(rows)
+        except StopIteration as stop:
+            if obj_count is None:
+                obj_count = stop.value
+            break
+        if generated and is_batch(value):
+            chunk.extend(value)
+        else:
+            chunk.append(value)
+        if len(chunk) >= OBJECT_CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+    return obj_count
+
+
+def get_loader():
+    """Returns the script loader of the current process"""
+    global _loader
+    if not _loader:
+        _loader = ScriptLoader(logging.getLogger(__name__))
+    return _loader
+
+
+def run_isolated(file_path, mod_name, cls_name, script_hash, fact_check_id,
+                 token=None):
+    """Creates the script object and runs it, is called in a child process
+
+    Child processes are reused for next scripts, so the script module is
+    reloaded there if the script file was changed. The script is not run
+    if its text differs from the verified one.
+
+    :param file_path - script file path
+    :param mod_name - script module name
+    :param cls_name - script class name
+    :param script_hash - verified hash of the script text
+    :param fact_check_id - fact_check table record identifier
+    :param token - CancelToken with the cancel event of the parent process
+    :return generator of iter_chunks, the chunks are sent to the parent
+    process one by one
+
+    """
+    script = get_loader().get_class(file_path, mod_name, cls_name,
+                                    script_hash)()
+    script.cancel_token = token
+    return iter_chunks(script.run(fact_check_id), token)
 
 
 class QueueItem(object):
     """Class for queue item"""
 
-    def __init__(self, log_config, script, script_id, fact_check_id):
-        logging.config.dictConfig(log_config)
+    def __init__(self, log_config, script, script_id, fact_check_id,
+                 priority=NORMAL, user_id=None, script_hash=None):
         self._logger = logging.getLogger(__name__)
         self._logger.info("Creating QueueItem")
         self._script = script
+        self._script_hash = script_hash
         self._script_id = script_id
         self._fact_check_id = fact_check_id
+        self._priority = priority
+        self._user_id = user_id
+        self._token = CancelToken()
 
     @property
     def fact_check_id(self):
@@ -29,23 +133,146 @@ class QueueItem(object):
         """Returns identifier from script table"""
         return self._script_id
 
+    @property
+    def priority(self):
+        """Returns priority class of the check"""
+        return self._priority
+
+    @property
+    def user_id(self):
+        """Returns identifier of the user who put the check"""
+        return self._user_id
+
     @property
     def script_name(self):
         """Returns script name from file"""
         return self._script.name
 
-    def run_and_save(self, driver):
+    @property
+    def execution_mode(self):
+        """Returns script execution mode or None for the default one"""
+        return self._script.execution_mode
+
+    @property
+    def timeout(self):
+        """Returns script timeout in seconds or None for the default one"""
+        return self._script.timeout
+
+    def _check_hash(self):
+        """Checks that the script file was not changed after the verifying
+
+        The class of the script object was loaded from the text with the
+        verified hash, so it is run only while the file has the same text
+
+        """
+        file_path = inspect.getfile(type(self._script))
+        ScriptLoader.check_hash(file_path, get_loader().get_hash(file_path),
+                                self._script_hash)
+
+    def _run_script(self, runner):
+        if not runner:
+            result = self._script.run(self._fact_check_id)
+            if not inspect.isgenerator(result):
+                self._token.raise_if_cancelled()
+            return result
+        script_cls = type(self._script)
+        # the child process loads the script again and checks the hash
+        return runner.run((inspect.getfile(script_cls), script_cls.__module__,
+                           script_cls.__name__, self._script_hash,
+                           self._fact_check_id),
+                          self._token)
+
+    def _save_cancelled(self, driver, ex):
+        self._logger.warning(f"{ex}, fact_check_id: {self._fact_check_id}")
+        driver.write_unit(self._save_failed,
+                          FAIL if self._token.is_timed_out else CANCEL)
+
+    @staticmethod
+    def _save_chunk(driver, chunk, level_counts):
+        driver.object_ins(chunk)
+        level_counts.update(row[ERROR_LEVEL_IDX] for row in chunk)
+
+    def _save_objects(self, driver, result):
+        """Saves script results in bounded chunks
+
+        :param driver - db_driver to save results
+        :param result - [count, rows] or generator, which yields rows or
+        lists of rows and returns count of checked objects
+        :return count of checked objects and Counter of saved objects
+        by error levels
+
+        """
+        level_counts = Counter()
+        chunks = iter_chunks(result, self._token)
+        try:
+            while True:
+                try:
+                    chunk = next(chunks)
+                except StopIteration as stop:
+                    obj_count = stop.value
+                    break
+                self._save_chunk(driver, chunk, level_counts)
+        finally:
+            if inspect.isgenerator(result):
+                result.close()  # stops the script process if not finished
+        return obj_count, level_counts
+
+    def _save_executed(self, driver, obj_count, level_counts):
+        """Saves counters and the execute status of the check together"""
+        driver.fact_check_upd_counters(self._fact_check_id,
+                                       sum(level_counts.values()),
+                                       level_counts[ErrorLevel.TRIVIAL.value],
+                                       level_counts[ErrorLevel.WARNING.value],
+                                       level_counts[ErrorLevel.ERROR.value])
+        driver.fact_check_upd(self._fact_check_id, datetime.datetime.now(),
+                              fact_check_obj_count=obj_count,
+                              fact_check_status_id=EXECUTE)
+
+    def _save_failed(self, driver, status_id):
+        """Deletes saved results and saves the status of the failed check"""
+        driver.object_del_check(self._fact_check_id)
+        driver.fact_check_upd(self._fact_check_id, datetime.datetime.now(),
+                              fact_check_obj_count=None,
+                              fact_check_status_id=status_id)
+
+    def _claim(self, driver):
+        """Claims the check and deletes results of its previous run
+
+        :return True if the check was claimed
+
+        """
+        if not driver.fact_check_claim(self._fact_check_id):
+            return False
+        driver.object_del_check(self._fact_check_id)
+        return True
+
+    def run_and_save(self, driver, runner=None, token=None):
         """Runs script and save results in db
 
+        The check is claimed in db first, so it is run by one worker only.
+        Chunks of results are committed one by one, readers see them while
+        the check is running. Results of the failed check are deleted
+        together with saving of its status, counters and the execute
+        status are saved together too.
+
         :param driver - db_driver to save results
+        :param runner - IsolatedRunner to run the script in a separate
+        process, the script is run in the current thread if None
+        :param token - CancelToken of the check
         :return void
 
         """
+        if token:
+            self._token = token
+        self._script.cancel_token = self._token
         test = False
         try:
-            status = driver.fact_check_rd_status(self._fact_check_id)
-            if not status or status[0] == CANCEL:
+            if not driver.write_unit(self._claim):
+                self._logger.info("Check was claimed by another worker or "
+                                  f"cancelled, fact_check_id: "
+                                  f"{self._fact_check_id}")
                 return
+            self._check_hash()
             test = self._script.test()
         except Exception as ex:
             self._logger.exception(ex)
@@ -59,7 +286,10 @@ class QueueItem(object):
             return
         result = []
         try:
-            result = self._script.run(self._fact_check_id)
+            result = self._run_script(runner)
+        except CheckCancelled as ex:
+            self._save_cancelled(driver, ex)
+            return
         except Exception as ex:
             self._logger.exception(ex)
             driver.fact_check_upd(self._fact_check_id,
@@ -73,39 +303,38 @@ class QueueItem(object):
                                   fact_check_obj_count=None,
                                   fact_check_status_id=EXECUTE)
             return
-        driver.begin_transaction()
         try:
-            driver.fact_check_upd(self._fact_check_id,
-                                  datetime.datetime.now(),
-                                  fact_check_obj_count=result[0],
-                                  fact_check_status_id=EXECUTE)
-            driver.object_ins(result[1])
-            driver.commit()
+            obj_count, level_counts = self._save_objects(driver, result)
+            driver.write_unit(self._save_executed, obj_count, level_counts)
+        except CheckCancelled as ex:
+            self._save_cancelled(driver, ex)
         except Exception as ex:
             self._logger.exception(ex)
-            driver.rollback()
-            driver.fact_check_upd(self._fact_check_id,
-                                  datetime.datetime.now(),
-                                  fact_check_obj_count=None,
-                                  fact_check_status_id=FAIL)
+            driver.write_unit(self._save_failed, FAIL)
 
 
 class ScriptQueue(object):
     """Class for script running manage"""
 
-    def __init__(self, driver, log_config, script_plugin, queue):
+    def __init__(self, driver, log_config, script_plugin, queue,
+                 stale_timeout=None):
         self._log_config = log_config
-        logging.config.dictConfig(log_config)
         self._logger = logging.getLogger(__name__)
         self._logger.info("Creating ScriptQueue")
         self._queue = queue
         self._driver = driver
         self._scr_plug = script_plugin
+        self._stale_timeout = stale_timeout
+        self._last_id = None  # the last check which was read from db
+        self._requeue_stale()
         self._fill_from_db()
 
     def clean(self):
         """Extracts all checks from the queue
 
+        The checks keep the queue status in db, they are put again
+        by refresh_from_db
+
         :return void
 
         """
@@ -134,53 +363,113 @@ class ScriptQueue(object):
             except Exception as ex:
                 self._logger.exception(ex)
 
-    def refresh_from_db(self, current_check_id=None):
-        """Cleans queue and fills it from db"""
+    def refresh_from_db(self):
+        """Cleans queue and fills it from db
+
+        Running checks have the running status, so they are not put again,
+        checks which are running longer than the stale timeout are put back
+
+        :return void
+
+        """
         self.clean()
-        self._fill_from_db(current_check_id)
+        self._last_id = None
+        self._requeue_stale()
+        self._fill_from_db()
 
-    def put(self, script_id, link_id):
+    def put(self, script_id, link_id, priority=None, driver=None):
         """Checks script and puts it to the queue
 
         :param script_id - script table record identifier
         :param link_id - user_script_link table record identifier
+        :param priority - priority class of the check, the script priority
+        is used if None
+        :param driver - driver instead of the queue driver, it is used
+        for putting from another thread
         :return void
 
         """
+        driver = driver or self._driver
         script = None
         try:
-            script = self._scr_plug.get_script(script_id)
+            script = self._scr_plug.get_script(script_id, driver)
         except Exception as ex:
             self._logger.exception(ex)
             raise RuntimeError(f"Ошибка чтения скрипта: {script_id}")
         try:
-            fact_check_id = self._driver.fact_check_ins(datetime.datetime.now(),
-                                                        link_id)
+            fact_check_id = driver.fact_check_ins(datetime.datetime.now(),
+                                                  link_id, priority)
+            check = driver.fact_check_que_rd(fact_check_id)
         except Exception as ex:
             self._logger.exception(ex)
             raise RuntimeError("Ошибка сохранения проверки в бд "
                                f"(скрипт: {script_id})")
         self._queue.put(QueueItem(self._log_config, script, script_id,
-                                  fact_check_id))
+                                  fact_check_id, check[2], check[3],
+                                  check[4]))
+
+    def poll_db(self):
+        """Puts checks with the queue status from db which were added after
+        the last reading, so the method can be called periodically
+
+        Checks which are put by several application instances or twice
+        are run once: the worker claims the check in db before the run.
+        If stale running checks were put back in the queue, the queue is
+        read from db again, because they are older than the last reading.
+
+        :return count of put checks
+
+        """
+        if self._requeue_stale():
+            self.clean()
+            self._last_id = None
+        return self._fill_from_db()
+
+    def _requeue_stale(self):
+        """Puts back in the queue checks of the stopped workers
+
+        The check keeps the running status if the application was stopped
+        while the check was run, such check is considered interrupted when
+        it was claimed more than stale_timeout seconds ago
+
+        :return count of the checks which were put back in the queue
+
+        """
+        if not self._stale_timeout:
+            return 0
+        try:
+            count = self._driver.fact_check_requeue(
+                int(time.time()) - self._stale_timeout)
+        except Exception as ex:
+            self._logger.exception(ex)
+            raise RuntimeError(f"Error during checks search: {ex}")
+        if count:
+            self._logger.warning(f"{count} interrupted checks were put back "
+                                 "in the queue")
+        return count
 
-    def _fill_from_db(self, current_check_id=None):
+    def _fill_from_db(self):
         try:
-            items = self._get_check_que_db()
+            checks = self._driver.fact_check_que(self._last_id)
         except Exception as ex:
             self._logger.exception(ex)
             raise RuntimeError(f"Error during checks search: {ex}")
+        if checks:
+            self._last_id = max(self._last_id or 0,
+                                max(check[0] for check in checks))
+        items = self._get_check_que_db(checks)
         for item in items:
-            if item.fact_check_id != current_check_id:
-                self._queue.put(item)
+            self._queue.put(item)
+        return len(items)
 
-    def _get_check_que_db(self):
-        checks = self._driver.fact_check_que()
+    def _get_check_que_db(self, checks):
         items = []
         for check in checks:
             try:
                 script = self._scr_plug.get_script(check[1])
                 items.append(QueueItem(self._log_config, script, check[1],
-                                       check[0]))
+                                       check[0], check[2], check[3],
+                                       check[4]))
             except Exception as ex:
                 self._logger.exception(ex)
                 self._driver.fact_check_upd(check[0], datetime.datetime.now(),
@@ -0,0 +1,83 @@
+import signal
+import threading
+
+from core.appstart import LOG_CONF_FILE_PATH, APP_CONF_FILE_PATH, load_json,\
+    get_logger, open_db, start_writer
+from core.queueworker import QueueWorkerPool
+from core.fairqueue import FairQueue
+from core.scriptplugin import ScriptPlugin
+from core.scriptqueue import ScriptQueue
+from core.scheduler import Scheduler
+from core.applogging import stop_logging
+from db.dbwriter import WriterDbDriver
+
+
+def main():
+    """Processes the check queue from db without the user interface
+
+    New checks are read from db and scheduled checks are put to the queue
+    every poll_interval seconds, SIGINT and SIGTERM stop the polling and
+    wait for the running checks
+
+    """
+    log_config = load_json(LOG_CONF_FILE_PATH)
+    logger = get_logger(log_config, __name__)
+    logger.info('logger was created')
+
+    app_config = load_json(APP_CONF_FILE_PATH)
+    logger.info('App config was read')
+    db_conf = app_config["db_conf"]
+    db_driver = open_db(logger, log_config, db_conf)
+    writer = start_writer(logger, log_config, db_conf)  # after db creation
+    driver = WriterDbDriver(db_driver, writer)
+
+    stop_event = threading.Event()
+
+    def on_signal(signum, frame):
+        logger.info(f'Signal {signum} was received')
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, on_signal)
+    signal.signal(signal.SIGTERM, on_signal)
+
+    scr_queue = FairQueue()
+    queue_conf = app_config["queue_conf"]
+    worker_pool = QueueWorkerPool(log_config, db_conf, scr_queue,
+                                  queue_conf["worker_count"],
+                                  queue_conf["execution_mode"],
+                                  queue_conf["process_count"],
+                                  queue_conf["check_timeout"], writer,
+                                  db_driver)
+    scr_plug = ScriptPlugin(log_config,
+                            app_config["main_form_conf"]["script_plugin_conf"],
+                            driver)
+    script_queue = ScriptQueue(driver, log_config, scr_plug, scr_queue,
+                               queue_conf["stale_timeout"])
+    scheduler = Scheduler(driver, log_config, script_queue,
+                          app_config["main_form_conf"]["scheduler_conf"])
+    worker_pool.start()
+    logger.info('Daemon was started')
+
+    poll_interval = app_config["daemon_conf"]["poll_interval"]
+    while not stop_event.wait(poll_interval):
+        try:
+            count = script_queue.poll_db()
+            if count:
+                logger.info(f'{count} checks were put to the queue')
+            count = scheduler.run_pending()
+            if count:
+                logger.info(f'{count} scheduled checks were put to the queue')
+        except Exception as ex:
+            logger.exception(ex)
+
+    logger.info('Daemon is stopping')
+    script_queue.clean()  # queued checks stay in db for the next start
+    worker_pool.shutdown(wait=True)
+    writer.close()
+    driver.close_connection()
+    logger.info('DB connection was closed')
+    stop_logging()
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,11 @@ class BaseDbDriver(metaclass=ABCMeta):
 
     """
 
+    @property
+    def is_thread_safe(self):
+        """Returns True if the driver object can be used by several threads"""
+        return False
+
     @abstractmethod
     def get_connection(self):
         """Opens a database connection and creates a cursor object
@@ -16,6 +21,15 @@ class BaseDbDriver(metaclass=ABCMeta):
         """
         pass
 
+    @abstractmethod
+    def connection_settings(self):
+        """Returns effective settings of the connection
+
+        :return dictionary with the profile name and values of the settings
+
+        """
+        pass
+
     @abstractmethod
     def is_db_exist(self):
         """Checks database existing
@@ -30,6 +44,15 @@ class BaseDbDriver(metaclass=ABCMeta):
         """Creates a database and inserts the initial data"""
         pass
 
+    @abstractmethod
+    def migrate_db(self):
+        """Applies migration scripts which are newer than the schema version
+
+        :return list of applied migration file names
+
+        """
+        pass
+
     @abstractmethod
     def chk_conn(self):
         """Checks the database connection
@@ -49,6 +72,34 @@ class BaseDbDriver(metaclass=ABCMeta):
         """Closes the database cursor and the connection if they exist"""
         pass
 
+    @abstractmethod
+    def interrupt(self):
+        """Aborts the query which is running on the connection
+
+        The method can be called from another thread
+
+        """
+        pass
+
+    @abstractmethod
+    def table_cnt_est(self, table_name):
+        """Estimates count of records in the table without the table scan
+
+        :param table_name target table name
+        :return estimated count of records
+
+        """
+        pass
+
+    @abstractmethod
+    def data_version(self):
+        """Returns value which is changed after every database modification
+
+        :return comparable value of the data version
+
+        """
+        pass
+
     @abstractmethod
     def begin_transaction(self):
         """Starts a database transaction"""
@@ -64,6 +115,61 @@ class BaseDbDriver(metaclass=ABCMeta):
         """Rollbacks a database transaction"""
         pass
 
+    @abstractmethod
+    def read_snapshot(self):
+        """Returns context manager which runs queries of the with block
+        in one read transaction
+
+        """
+        pass
+
+    @abstractmethod
+    def savepoint(self, name):
+        """Starts a savepoint inside the transaction
+
+        :param name savepoint name
+        :return void
+
+        """
+        pass
+
+    @abstractmethod
+    def release_savepoint(self, name):
+        """Releases the savepoint, its changes stay in the transaction
+
+        :param name savepoint name
+        :return void
+
+        """
+        pass
+
+    @abstractmethod
+    def rollback_to_savepoint(self, name):
+        """Rollbacks changes after the savepoint and releases it
+
+        :param name savepoint name
+        :return void
+
+        """
+        pass
+
+    def write_unit(self, func, *args, **kwargs):
+        """Runs several writes in one transaction: all of them are saved
+        or none of them
+
+        :param func callable which takes the driver and the arguments
+        :return result of func
+
+        """
+        self.begin_transaction()
+        try:
+            result = func(self, *args, **kwargs)
+        except Exception:
+            self.rollback()
+            raise
+        self.commit()
+        return result
+
     @abstractmethod
     def user_ins(self, user_name):
         """Inserts a new record in the user table
@@ -114,12 +220,13 @@ class BaseDbDriver(metaclass=ABCMeta):
         pass
 
     @abstractmethod
-    def user_rd_pg(self, pattern, limit, offset):
+    def user_rd_pg(self, pattern, limit, offset, after_id=None):
         """Reads a part of records from the user table for the pagination
 
         :param pattern - user name part for the like search
         :param limit - row count constraint
         :param offset - row count for shifting the results
+        :param after_id - user_id of the last record from the previous page
         :return set of records from the user table
 
         """
@@ -141,7 +248,7 @@ class BaseDbDriver(metaclass=ABCMeta):
 
     @abstractmethod
     def script_rd_pg(self, limit, offset, user_id, name_pattern, date_from,
-                     date_to):
+                     date_to, after_id=None):
         """Reads a part of records from the script table for the pagination
 
         :param limit - row count constraint
@@ -150,6 +257,7 @@ class BaseDbDriver(metaclass=ABCMeta):
         :param name_pattern: script name part for like search
         :param date_from: begin date constraint for user_beg_date
         :param date_to: end date constraint for user_beg_date
+        :param after_id: script_id of the last record from the previous page
         :return set of records from the script table
 
         """
@@ -177,6 +285,17 @@ class BaseDbDriver(metaclass=ABCMeta):
         """Updates record from the script table"""
         pass
 
+    @abstractmethod
+    def script_upd_priority(self, script_id, script_priority):
+        """Updates priority of the script checks
+
+        :param script_id identifier from the script table
+        :param script_priority priority class, the smaller value runs first
+        :return void
+
+        """
+        pass
+
     @abstractmethod
     def script_del(self, script_id, script_end_date):
         """Set end date value for the target record in the script table
@@ -279,7 +398,7 @@ class BaseDbDriver(metaclass=ABCMeta):
     @abstractmethod
     def fact_check_rd_pg(self, limit, offset, status_id, user_id, script_id,
                          user_name_pattern, script_name_pattern, date_from,
-                         date_to):
+                         date_to, after_id=None):
         """Reads a part of records from the fact_check table for the pagination
 
         :param limit - row count constraint
@@ -291,25 +410,44 @@ class BaseDbDriver(metaclass=ABCMeta):
         :param script_name_pattern: script name part for like search
         :param date_from: begin date constraint for user_beg_date
         :param date_to: end date constraint for user_beg_date
+        :param after_id: fact_check_id of the last record from the previous page
         :return set of records from the fact_check table
 
         """
         pass
 
     @abstractmethod
-    def fact_check_ins(self, fact_check_que_date, user_script_link_id):
+    def fact_check_ins(self, fact_check_que_date, user_script_link_id,
+                       fact_check_priority=None):
         """Inserts a new link into the fact_check table
 
+        :param fact_check_priority priority class of the check, the script
+        priority is used if None
         :return inserted row identifier
 
         """
         pass
 
     @abstractmethod
-    def fact_check_que(self):
+    def fact_check_que(self, after_id=None):
+        """
+
+        :param after_id identifier from the fact_check table, only later
+        checks are returned if it is not None
+        :return fact_check and script identifiers, priority, user
+        identifier and script hash of the checks with queue status
+        in the queue order
+
+        """
+        pass
+
+    @abstractmethod
+    def fact_check_que_rd(self, fact_check_id):
         """
 
-        :return fact_check and script identifiers with queue status
+        :param fact_check_id identifier from the fact_check table
+        :return fact_check and script identifiers, priority, user
+        identifier and script hash of the check
 
         """
         pass
@@ -320,6 +458,42 @@ class BaseDbDriver(metaclass=ABCMeta):
         """Updates a record from the fact_check table"""
         pass
 
+    @abstractmethod
+    def fact_check_upd_counters(self, fact_check_id, found_count,
+                                trivial_count, warning_count, error_count):
+        """Updates counters of the found objects in the fact_check table
+
+        :param fact_check_id identifier from the fact_check table
+        :param found_count count of all found objects
+        :param trivial_count count of the found objects with trivial level
+        :param warning_count count of the found objects with warning level
+        :param error_count count of the found objects with error level
+        :return void
+
+        """
+        pass
+
+    @abstractmethod
+    def fact_check_claim(self, fact_check_id):
+        """Sets the running status of the check if it has the queue status
+
+        :param fact_check_id identifier from the fact_check table
+        :return True if the check was claimed by the call
+
+        """
+        pass
+
+    @abstractmethod
+    def fact_check_requeue(self, claim_ts):
+        """Sets the queue status of the running checks claimed before the time
+
+        :param claim_ts epoch time, checks which were claimed earlier are
+        considered interrupted
+        :return count of the checks which were put back in the queue
+
+        """
+        pass
+
     @abstractmethod
     def fact_check_rd_status(self, fact_check_id):
         """
@@ -348,6 +522,76 @@ class BaseDbDriver(metaclass=ABCMeta):
         """
         pass
 
+    @abstractmethod
+    def check_schedule_ins(self, user_script_link_id, interval, cron, jitter,
+                           catch_up, next_ts):
+        """Inserts a new record into the check_schedule table
+
+        :param user_script_link_id identifier from the user_script_link table
+        :param interval period of the checks in seconds or None
+        :param cron cron expression of the check times or None
+        :param jitter max random delay of the check in seconds
+        :param catch_up put all missed checks to the queue if True
+        :param next_ts epoch seconds of the first check
+        :return void
+
+        """
+        pass
+
+    @abstractmethod
+    def check_schedule_srch(self, user_script_link_id):
+        """
+
+        :param user_script_link_id identifier from the user_script_link table
+        :return schedule record for the link: identifier, interval and cron
+
+        """
+        pass
+
+    @abstractmethod
+    def check_schedule_del(self, check_schedule_id):
+        """Deletes a record from the check_schedule table
+
+        :param check_schedule_id identifier from the check_schedule table
+        :return void
+
+        """
+        pass
+
+    @abstractmethod
+    def check_schedule_due(self, now_ts):
+        """
+
+        :param now_ts current time in epoch seconds
+        :return schedules of the actual links with run time before now_ts
+
+        """
+        pass
+
+    @abstractmethod
+    def check_schedule_upd_next(self, check_schedule_id, run_ts, next_ts,
+                                next_run_ts):
+        """Moves the schedule to the next check if it was not moved before
+
+        :param check_schedule_id identifier from the check_schedule table
+        :param run_ts run time which was read with the schedule
+        :param next_ts epoch seconds of the next planned check
+        :param next_run_ts next planned check time with the random delay
+        :return True if the schedule was moved by the call
+
+        """
+        pass
+
+    @abstractmethod
+    def object_del_check(self, fact_check_id):
+        """Deletes records of the check from the object table
+
+        :param fact_check_id identifier from the fact_check table
+        :return void
+
+        """
+        pass
+
     @abstractmethod
     def object_ins(self, values):
         """Inserts a set of new records in the object table"""
@@ -357,7 +601,7 @@ class BaseDbDriver(metaclass=ABCMeta):
     def object_rd_pg(self, limit, offset, user_id, fact_check_id,
                      error_level_id, object_name_pattern, script_name_pattern,
                      fact_check_end_date_from, fact_check_end_date_to,
-                     object_date_from, object_date_to):
+                     object_date_from, object_date_to, after_id=None):
         """Reads a part of records from the object table for the pagination
 
         :param limit: row count constraint
@@ -373,6 +617,7 @@ class BaseDbDriver(metaclass=ABCMeta):
         for fact_check_end_date
         :param object_date_from: begin date constraint for object_date
         :param object_date_to: end date constraint for object_date
+        :param after_id: object_id of the last record from the previous page
         :return set of records from the object table
 
         """
@@ -0,0 +1,212 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+# Driver methods which modify the database, they are run by the writer
+WRITE_METHODS = frozenset((
+    "user_ins", "user_upd", "user_dlt",
+    "script_ins", "script_upd", "script_upd_priority", "script_del",
+    "user_script_link_ins", "user_script_link_del",
+    "fact_check_ins", "fact_check_claim", "fact_check_requeue",
+    "fact_check_upd", "fact_check_upd_counters",
+    "object_ins", "object_del_check",
+    "check_schedule_ins", "check_schedule_del", "check_schedule_upd_next"))
+# Transaction methods are managed by the writer, they can not be proxied
+TRANSACTION_METHODS = frozenset((
+    "begin_transaction", "commit", "rollback", "savepoint",
+    "release_savepoint", "rollback_to_savepoint"))
+
+SAVEPOINT_NAME = "write_op"
+
+
+class DbWriter(object):
+    """Class for running all database writes in one thread
+
+    Write operations are got from the queue and committed in groups:
+    one transaction (and one disk sync) is used for up to batch_size
+    operations which come in batch_delay seconds. Every operation runs
+    in its own savepoint, so the error of one operation does not cancel
+    the others. Results are passed by futures after the commit.
+    Operations are not accepted after close or the writer thread error,
+    the queued ones get the error then.
+
+    """
+
+    def __init__(self, driver, batch_size=100, batch_delay=0.005):
+        self._logger = logging.getLogger(__name__)
+        self._logger.info("Creating DbWriter")
+        self._driver = driver
+        self._batch_size = batch_size
+        self._batch_delay = batch_delay
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._handle, name="db_writer",
+                                        daemon=True)
+
+    def start(self):
+        """Opens the writer connection and starts the writer thread
+
+        :return void
+
+        """
+        self._thread.start()
+
+    def submit(self, func, *args, **kwargs):
+        """Puts the write operation to the queue
+
+        :param func: callable which takes the writer driver and the arguments
+        :return: future of the operation result
+
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Запись в БД остановлена")
+            self._queue.put((future, func, args, kwargs))
+        return future
+
+    def call(self, method_name, *args, **kwargs):
+        """Runs the driver method in the writer thread and waits for the commit
+
+        :param method_name: name of the driver method
+        :return: result of the method
+
+        """
+        return self.submit(lambda driver: getattr(driver, method_name)(
+            *args, **kwargs)).result()
+
+    def close(self):
+        """Commits the queued operations and stops the writer thread
+
+        :return void
+
+        """
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(None)
+        if self._thread.is_alive():
+            self._thread.join()
+        self._logger.info("DbWriter was closed")
+
+    def _get_batch(self):
+        ops = [self._queue.get()]
+        deadline = time.monotonic() + self._batch_delay
+        while ops[-1] is not None and len(ops) < self._batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                ops.append(self._queue.get(timeout=max(0.0, timeout)))
+            except queue.Empty:
+                break
+        return ops
+
+    def _run_batch(self, ops):
+        results = []
+        try:
+            self._driver.begin_transaction()
+            for future, func, args, kwargs in ops:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                self._driver.savepoint(SAVEPOINT_NAME)
+                try:
+                    results.append((future, func(self._driver, *args,
+                                                 **kwargs), None))
+                    self._driver.release_savepoint(SAVEPOINT_NAME)
+                except Exception as ex:
+                    self._driver.rollback_to_savepoint(SAVEPOINT_NAME)
+                    results.append((future, None, ex))
+            self._driver.commit()
+        except Exception as ex:
+            self._logger.exception(ex)
+            try:
+                self._driver.rollback()
+            except Exception as rollback_ex:
+                self._logger.warning(f"Rollback error: {rollback_ex}")
+            for future, _, _, _ in ops:
+                if not future.done():
+                    future.set_exception(ex)
+            return
+        for future, result, error in results:
+            if error:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def _fail_queued(self):
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                op = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if op and op[0].set_running_or_notify_cancel():
+                op[0].set_exception(RuntimeError("Запись в БД остановлена"))
+
+    def _handle(self):
+        self._logger.debug("DbWriter is running")
+        ops = []
+        try:
+            self._driver.get_connection()
+            self._logger.info("Writer connection was opened, settings: "
+                              f"{self._driver.connection_settings()}")
+            while True:
+                ops = self._get_batch()
+                stop = ops[-1] is None
+                if stop:
+                    ops.pop()
+                if ops:
+                    self._run_batch(ops)
+                if stop:
+                    break
+        except Exception as ex:
+            self._logger.exception(ex)
+            for op in ops:
+                if op and not op[0].done():
+                    op[0].set_exception(ex)
+        finally:
+            self._fail_queued()
+            self._driver.close_connection()
+
+
+class WriterDbDriver(object):
+    """Driver which reads by its own connection and writes by DbWriter
+
+    The write methods of the driver (WRITE_METHODS) are run by the writer
+    and wait for the commit, other methods are run by the read driver.
+    Transactions of the read connection are not available: writes which
+    must be saved together are passed to write_unit.
+
+    """
+
+    def __init__(self, driver, writer):
+        self._driver = driver
+        self._writer = writer
+
+    @property
+    def writer(self):
+        """Returns the writer of the driver"""
+        return self._writer
+
+    def write_unit(self, func, *args, **kwargs):
+        """Runs several writes in the writer as one operation
+
+        The operation has its own savepoint, so all writes are saved
+        or none of them
+
+        :param func: callable which takes the writer driver and the arguments
+        :return: result of func
+        """
+        return self._writer.submit(func, *args, **kwargs).result()
+
+    def __getattr__(self, name):
+        if name in TRANSACTION_METHODS:
+            raise RuntimeError(f"Метод {name} недоступен: транзакции "
+                               "выполняются через write_unit")
+        if name in WRITE_METHODS:
+            return lambda *args, **kwargs: self._writer.call(name, *args,
+                                                             **kwargs)
+        return getattr(self._driver, name)
@@ -0,0 +1,16 @@
+CREATE INDEX IF NOT EXISTS idx_object_fact_check
+on object (fact_check_id, error_level_id);
+
+CREATE INDEX IF NOT EXISTS idx_object_error_level
+on object (error_level_id);
+
+CREATE INDEX IF NOT EXISTS idx_fact_check_status
+on fact_check (fact_check_status_id);
+
+CREATE INDEX IF NOT EXISTS idx_fact_check_user_script_link
+on fact_check (user_script_link_id);
+
+CREATE INDEX IF NOT EXISTS idx_user_script_link_script
+on user_script_link (script_id);
+
+ANALYZE;
@@ -0,0 +1,23 @@
+ALTER TABLE fact_check ADD COLUMN fact_check_que_ts integer;
+
+ALTER TABLE fact_check ADD COLUMN fact_check_end_ts integer;
+
+ALTER TABLE object ADD COLUMN object_ts integer;
+
+UPDATE fact_check SET
+	fact_check_que_ts = cast(strftime('%s', fact_check_que_date) as integer),
+	fact_check_end_ts = cast(strftime('%s', fact_check_end_date) as integer);
+
+UPDATE object SET
+	object_ts = cast(strftime('%s', object_date) as integer);
+
+CREATE INDEX idx_fact_check_que_ts
+on fact_check (fact_check_que_ts);
+
+CREATE INDEX idx_fact_check_end_ts
+on fact_check (fact_check_end_ts);
+
+CREATE INDEX idx_object_ts
+on object (object_ts);
+
+ANALYZE;
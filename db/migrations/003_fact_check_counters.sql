@@ -0,0 +1,31 @@
+ALTER TABLE fact_check
+ADD COLUMN fact_check_found_count integer NOT NULL DEFAULT 0;
+
+ALTER TABLE fact_check
+ADD COLUMN fact_check_trivial_count integer NOT NULL DEFAULT 0;
+
+ALTER TABLE fact_check
+ADD COLUMN fact_check_warning_count integer NOT NULL DEFAULT 0;
+
+ALTER TABLE fact_check
+ADD COLUMN fact_check_error_count integer NOT NULL DEFAULT 0;
+
+UPDATE fact_check SET
+	fact_check_found_count = (
+		SELECT count(ob.object_id) FROM object AS ob
+		WHERE ob.fact_check_id = fact_check.fact_check_id),
+	fact_check_trivial_count = (
+		SELECT count(ob.object_id) FROM object AS ob
+		WHERE ob.fact_check_id = fact_check.fact_check_id
+			AND ob.error_level_id = 1),
+	fact_check_warning_count = (
+		SELECT count(ob.object_id) FROM object AS ob
+		WHERE ob.fact_check_id = fact_check.fact_check_id
+			AND ob.error_level_id = 2),
+	fact_check_error_count = (
+		SELECT count(ob.object_id) FROM object AS ob
+		WHERE ob.fact_check_id = fact_check.fact_check_id
+			AND ob.error_level_id = 3)
+WHERE EXISTS (
+	SELECT 1 FROM object AS ob
+	WHERE ob.fact_check_id = fact_check.fact_check_id);
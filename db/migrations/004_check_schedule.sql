@@ -0,0 +1,17 @@
+CREATE TABLE check_schedule (
+	check_schedule_id integer PRIMARY KEY AUTOINCREMENT,
+	user_script_link_id integer NOT NULL,
+	check_schedule_interval integer,
+	check_schedule_cron text,
+	check_schedule_jitter integer NOT NULL DEFAULT 0,
+	check_schedule_catch_up integer NOT NULL DEFAULT 0,
+	check_schedule_next_ts integer NOT NULL,
+	check_schedule_run_ts integer NOT NULL,
+	FOREIGN KEY (user_script_link_id) REFERENCES user_script_link(user_script_link_id)
+);
+
+CREATE UNIQUE INDEX uidx_check_schedule_link
+on check_schedule (user_script_link_id);
+
+CREATE INDEX idx_check_schedule_run_ts
+on check_schedule (check_schedule_run_ts);
@@ -0,0 +1,8 @@
+ALTER TABLE script
+ADD COLUMN script_priority integer NOT NULL DEFAULT 1;
+
+ALTER TABLE fact_check
+ADD COLUMN fact_check_priority integer NOT NULL DEFAULT 1;
+
+CREATE INDEX idx_fact_check_que
+on fact_check (fact_check_status_id, fact_check_priority, fact_check_que_ts);
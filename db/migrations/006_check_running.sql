@@ -0,0 +1,11 @@
+INSERT INTO fact_check_status(fact_check_status_id, fact_check_status_name)
+	VALUES(5, 'Выполняется');
+
+ALTER TABLE fact_check ADD COLUMN fact_check_claim_ts integer;
+
+-- checks claimed by the previous version have no end date, they are put
+-- back in the queue as interrupted ones
+UPDATE fact_check SET
+	fact_check_status_id = 5,
+	fact_check_claim_ts = 0
+WHERE fact_check_status_id = 2 AND fact_check_end_date IS NULL;
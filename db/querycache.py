@@ -0,0 +1,98 @@
+from collections import OrderedDict
+
+# Count methods which can be estimated by the table size without filters
+ESTIMATED_TABLES = {"fact_check_cnt": "fact_check", "object_cnt": "object"}
+
+
+class VersionedCache(object):
+    """Base class for LRU caches of query results
+
+    Cached values are dropped after any modification of the database,
+    which is detected by the data version of the driver
+
+    """
+
+    def __init__(self, driver, max_size):
+        self._driver = driver
+        self._max_size = max_size
+        self._version = None
+        self._values = OrderedDict()
+
+    def invalidate(self):
+        """Removes all cached values"""
+        self._values.clear()
+        self._version = None
+
+    def _get_value(self, key, read):
+        version = self._driver.data_version()
+        if version != self._version:
+            self._values.clear()
+            self._version = version
+        if key in self._values:
+            self._values.move_to_end(key)
+            return self._values[key]
+        value = read()
+        self._values[key] = value
+        if len(self._values) > self._max_size:
+            self._values.popitem(last=False)
+        return value
+
+
+class CountCache(VersionedCache):
+    """Class for caching record counts by the query filters"""
+
+    def __init__(self, driver, max_size=256, estimate=False):
+        super().__init__(driver, max_size)
+        self._estimate = estimate
+
+    def get(self, driver_method, **kwargs):
+        """Returns the count from the cache or calls the driver method
+
+        :param driver_method: bound count method of the driver
+        :param kwargs: filter values for the count method
+        :return: count of records
+        """
+        key = (driver_method.__name__, tuple(sorted(kwargs.items())))
+        return self._get_value(key, lambda: self._count(driver_method,
+                                                        kwargs))
+
+    def get_exact(self, driver_method, **kwargs):
+        """Counts records without the estimate and caches the count
+
+        It is used when the page by the estimated count is empty
+
+        :param driver_method: bound count method of the driver
+        :param kwargs: filter values for the count method
+        :return: count of records
+        """
+        key = (driver_method.__name__, tuple(sorted(kwargs.items())))
+        self._values.pop(key, None)
+        return self._get_value(key, lambda: driver_method(**kwargs))
+
+    def _count(self, driver_method, kwargs):
+        table_name = ESTIMATED_TABLES.get(driver_method.__name__)
+        if self._estimate and table_name \
+                and all(value is None for value in kwargs.values()):
+            return self._driver.table_cnt_est(table_name)
+        return driver_method(**kwargs)
+
+
+class PageCache(VersionedCache):
+    """Class for caching pages of the tables by the query filters"""
+
+    def __init__(self, driver, max_size=64):
+        super().__init__(driver, max_size)
+
+    def get(self, table_name, filters, page_num, read, version=None):
+        """Returns rows of the page from the cache or reads them
+
+        :param table_name: name of the table on the form
+        :param filters: tuple of filter values for the page query
+        :param page_num: page number
+        :param read: callable without arguments which reads the page rows
+        :param version: version of the data outside the database which is
+        shown on the page, the page is read again if it is changed
+        :return: rows of the page
+        """
+        return self._get_value((table_name, filters, page_num, version),
+                               read)
@@ -0,0 +1,47 @@
+class SqlFilter(object):
+    """Class for composing the where clause only from the supplied filters
+
+    Conditions use positional parameters ("?"), which are returned
+    by the params property in the same order
+
+    """
+
+    def __init__(self, *conditions):
+        self._conditions = list(conditions)
+        self._params = []
+
+    def add(self, condition, *params):
+        """Adds the condition if all its parameters are not None
+
+        :param condition: sql condition with "?" placeholders
+        :param params: values for the placeholders
+        :return: self for the call chaining
+        """
+        if all(param is not None for param in params):
+            self._conditions.append(condition)
+            self._params.extend(params)
+        return self
+
+    def add_like(self, column, pattern):
+        """Adds the like condition for the column if the pattern is not empty
+
+        :param column: column name
+        :param pattern: text part for the like search
+        :return: self for the call chaining
+        """
+        if pattern:
+            self._conditions.append(f"{column} like ?")
+            self._params.append(f"%{pattern}%")
+        return self
+
+    @property
+    def where(self):
+        """Returns the where clause or the empty string"""
+        if not self._conditions:
+            return ""
+        return "where " + " and ".join(self._conditions) + " "
+
+    @property
+    def params(self):
+        """Returns parameter values for the where clause"""
+        return list(self._params)
@@ -1,9 +1,78 @@
 import logging
-import logging.config
 import sqlite3
+import threading
 import os
+import fnmatch
+import datetime
+import calendar
+import pathlib
+from contextlib import contextmanager
 
 from db.basedbdriver import BaseDbDriver
+from db.sqlfilter import SqlFilter
+
+# Named sets of connection settings, the pragma value None keeps the default
+CONNECTION_PROFILES = {
+    "durable": {
+        "journal_mode": "wal",
+        "synchronous": "full",
+        "cache_size": -16000,
+        "mmap_size": 0,
+        "temp_store": "default",
+        "busy_timeout": 5000,
+        "cached_statements": 128,
+        "read_only": False
+    },
+    "throughput": {
+        "journal_mode": "wal",
+        "synchronous": "normal",
+        "cache_size": -64000,
+        "mmap_size": 268435456,
+        "temp_store": "memory",
+        "busy_timeout": 10000,
+        "cached_statements": 256,
+        "read_only": False
+    },
+    "readonly-ui": {
+        "journal_mode": None,  # the journal mode is set by writers
+        "synchronous": "normal",
+        "cache_size": -32000,
+        "mmap_size": 268435456,
+        "temp_store": "memory",
+        "busy_timeout": 2000,
+        "cached_statements": 256,
+        "query_only": 1,
+        "read_only": True  # the connection is opened with mode=ro
+    }
+}
+# Pragmas of the profiles in the order of applying
+PROFILE_PRAGMAS = ("journal_mode", "synchronous", "cache_size", "mmap_size",
+                   "temp_store", "busy_timeout", "query_only")
+
+
+def day_ts(value, days=0):
+    """Returns the day start of the date value as epoch seconds
+
+    :param value: date or datetime value
+    :param days: count of days to shift the result
+    :return: integer value, which is comparable with *_ts columns
+
+    """
+    day = datetime.datetime(value.year, value.month, value.day) \
+        + datetime.timedelta(days=days)
+    return calendar.timegm(day.timetuple())
+
+
+def day_range(value_from, value_to):
+    """Returns the half-open range of epoch seconds for the date range
+
+    :param value_from: begin date, None for the open range
+    :param value_to: end date (inclusive), None for the open range
+    :return: begin and end values for the "ts >= ? and ts < ?" condition
+
+    """
+    return (day_ts(value_from) if value_from else None,
+            day_ts(value_to, days=1) if value_to else None)
 
 
 class SqliteDbDriver(BaseDbDriver):
@@ -12,25 +81,60 @@ class SqliteDbDriver(BaseDbDriver):
 
     """
     def __init__(self, log_config, db_config):
-        logging.config.dictConfig(log_config)
         self._logger = logging.getLogger(__name__)
         self._db_file_path = db_config["db_path"]
         self._db_script_path = db_config["init_script_path"]
+        self._migrations_path = db_config["migrations_path"]
         self._iso_level = db_config["isolation_level"]
+        self._profile_name = db_config["profile"]
+        self._settings = self._get_settings(db_config)
         self._conn = None
         self._cursor = None
 
+    @staticmethod
+    def _get_settings(db_config):
+        profile = CONNECTION_PROFILES.get(db_config["profile"])
+        if profile is None:
+            raise RuntimeError("Неизвестный профиль подключения: "
+                               f"{db_config['profile']}")
+        return {**profile, **db_config["pragmas"]}
+
     def get_connection(self):
         """Opens a database connection and creates a cursor object
 
         :return bool value: True if the cursor exists
 
         """
-        self._conn = sqlite3.connect(self._db_file_path,
-                                     isolation_level=self._iso_level)
+        db_path = self._db_file_path
+        if self._settings["read_only"]:
+            db_path = pathlib.Path(os.path.abspath(db_path)).as_uri() \
+                + "?mode=ro"
+        self._conn = sqlite3.connect(
+            db_path, isolation_level=self._iso_level,
+            timeout=self._settings["busy_timeout"] / 1000,
+            cached_statements=self._settings["cached_statements"],
+            uri=self._settings["read_only"])
         self._cursor = self._conn.cursor()
+        for pragma in PROFILE_PRAGMAS:
+            value = self._settings.get(pragma)
+            if value is not None:
+                self._cursor.execute(f"pragma {pragma} = {value}")
         return self._cursor is not None
 
+    def connection_settings(self):
+        """Returns effective settings of the connection
+
+        :return dictionary with the profile name and values of the pragmas
+
+        """
+        settings = {"profile": self._profile_name,
+                    "read_only": self._settings["read_only"],
+                    "cached_statements": self._settings["cached_statements"]}
+        for pragma in PROFILE_PRAGMAS:
+            self._cursor.execute(f"pragma {pragma}")
+            settings[pragma] = self._cursor.fetchone()[0]
+        return settings
+
     def is_db_exist(self):
         """Checks database existing
 
@@ -60,6 +164,62 @@ class SqliteDbDriver(BaseDbDriver):
             raise RuntimeError("Ошибка инициализации: БД уже существует"
                                f"{self._db_file_path}")
 
+    def _schema_version(self):
+        self._cursor.execute(
+            "create table if not exists schema_version("
+            "   schema_version_id integer PRIMARY KEY,"
+            "   schema_version_file text NOT NULL,"
+            "   schema_version_date datetime NOT NULL)")
+        self._cursor.execute("select coalesce(max(schema_version_id), 0) "
+                             "from schema_version")
+        return self._cursor.fetchone()[0]
+
+    def _get_migrations(self):
+        if not os.path.exists(self._migrations_path):
+            raise RuntimeError("Не найден каталог миграций: "
+                               f"{self._migrations_path}")
+        migrations = []
+        for file_name in os.listdir(self._migrations_path):
+            if fnmatch.fnmatch(file_name, "[0-9]*_*.sql"):
+                migrations.append((int(file_name.split("_")[0]), file_name))
+        return sorted(migrations)
+
+    def migrate_db(self):
+        """Applies migration scripts which are newer than the schema version
+
+        :return list of applied migration file names
+
+        """
+        version = self._schema_version()
+        applied = []
+        for migration_version, file_name in self._get_migrations():
+            if migration_version <= version:
+                continue
+            path = os.path.join(self._migrations_path, file_name)
+            with open(path, 'r', encoding='utf-8') as script:
+                script_text = script.read()
+            self._logger.info(f"Applying migration {file_name}")
+            try:
+                # the transaction stays open after the script, so the version
+                # is saved in the same transaction as the migration changes
+                self._cursor.executescript("begin transaction;\n"
+                                           f"{script_text}\n;")
+                self._cursor.execute("insert into schema_version("
+                                     "   schema_version_id,"
+                                     "   schema_version_file,"
+                                     "   schema_version_date) "
+                                     "values(?, ?, CURRENT_TIMESTAMP)",
+                                     (migration_version, file_name))
+                self._conn.commit()
+            except sqlite3.Error as ex:
+                self._logger.exception(ex)
+                if self._conn.in_transaction:
+                    self._conn.rollback()
+                raise RuntimeError(f"Ошибка выполнения миграции {file_name}: "
+                                   f"{ex}")
+            applied.append(file_name)
+        return applied
+
     def chk_conn(self):
         """Checks the database connection
 
@@ -86,10 +246,45 @@ class SqliteDbDriver(BaseDbDriver):
         if self._conn:
             self._conn.close()
 
+    def interrupt(self):
+        """Aborts the query which is running on the connection
+
+        The method can be called from another thread
+
+        """
+        if self._conn:
+            self._conn.interrupt()
+
     def _table_cnt(self, table_name):
         self._cursor.execute(f"select count(*) from {table_name}")
         return int(self._cursor.fetchone()[0])
 
+    def table_cnt_est(self, table_name):
+        """Estimates count of records in the table without the table scan
+
+        The max rowid is not less than the count of records, but it can be
+        bigger: objects of failed checks are deleted and count queries skip
+        records of deleted scripts. So the estimate is an upper bound and
+        the last pages by it can be empty.
+
+        :param table_name target table name
+        :return estimated count of records
+
+        """
+        self._cursor.execute(f"select coalesce(max(rowid), 0) "
+                             f"from {table_name}")
+        return int(self._cursor.fetchone()[0])
+
+    def data_version(self):
+        """Returns value which is changed after every database modification
+
+        :return tuple of the data version from other connections and
+        count of changes by the current connection
+
+        """
+        self._cursor.execute("pragma data_version")
+        return self._cursor.fetchone()[0], self._conn.total_changes
+
     def begin_transaction(self):
         """Starts a database transaction"""
         self._cursor.execute("begin transaction;")
@@ -102,6 +297,49 @@ class SqliteDbDriver(BaseDbDriver):
         """Rollbacks a database transaction"""
         self._cursor.execute("rollback;")
 
+    @contextmanager
+    def read_snapshot(self):
+        """Runs queries of the with block in one read transaction
+
+        In the WAL mode all queries see the same snapshot of the database
+        and do not block the writer
+
+        """
+        self._cursor.execute("begin transaction;")
+        try:
+            yield self
+        finally:
+            if self._conn.in_transaction:
+                self._conn.rollback()
+
+    def savepoint(self, name):
+        """Starts a savepoint inside the transaction
+
+        :param name savepoint name
+        :return void
+
+        """
+        self._cursor.execute(f"savepoint {name};")
+
+    def release_savepoint(self, name):
+        """Releases the savepoint, its changes stay in the transaction
+
+        :param name savepoint name
+        :return void
+
+        """
+        self._cursor.execute(f"release savepoint {name};")
+
+    def rollback_to_savepoint(self, name):
+        """Rollbacks changes after the savepoint and releases it
+
+        :param name savepoint name
+        :return void
+
+        """
+        self._cursor.execute(f"rollback to savepoint {name};")
+        self._cursor.execute(f"release savepoint {name};")
+
     def user_ins(self, user_name):
         """Inserts a new record in the user table
 
@@ -154,15 +392,19 @@ class SqliteDbDriver(BaseDbDriver):
         self._cursor.execute("select user_id, user_name from user")
         return self._cursor.fetchall()
 
-    def user_rd_pg(self, pattern, limit, offset):
+    def user_rd_pg(self, pattern, limit, offset, after_id=None):
         """Reads a part of records from the user table for the pagination
 
         :param pattern - user name part for the like search
         :param limit - row count constraint
         :param offset - row count for shifting the results
+        :param after_id - user_id of the last record from the previous page
         :return set of records from the user table
 
         """
+        sql_filter = SqlFilter() \
+            .add("u.user_id > ?", after_id) \
+            .add_like("u.user_name", pattern)
         self._cursor.execute(
             "select "
             "   u.user_id,"
@@ -175,11 +417,11 @@ class SqliteDbDriver(BaseDbDriver):
             "       and usl.user_script_link_end_date is null "
             "   left join fact_check as fc "
             "       on fc.user_script_link_id = usl.user_script_link_id "
-            ""
-            "where ?1 is null or u.user_name like '%' || ?1 || '%' "
+            f"{sql_filter.where}"
             "group by u.user_id, u.user_name "
-            "limit ?2 offset ?3",
-            (pattern, limit, offset))
+            "order by u.user_id "
+            "limit ? offset ?",
+            (*sql_filter.params, limit, offset))
         return self._cursor.fetchall()
 
     def user_cnt(self):
@@ -199,7 +441,7 @@ class SqliteDbDriver(BaseDbDriver):
         return self._cursor.fetchall()
 
     def script_rd_pg(self, limit, offset, user_id, name_pattern, date_from,
-                     date_to):
+                     date_to, after_id=None):
         """Reads a part of records from the script table for the pagination
 
         :param limit - row count constraint
@@ -208,9 +450,13 @@ class SqliteDbDriver(BaseDbDriver):
         :param name_pattern: script name part for like search
         :param date_from: begin date constraint for user_beg_date
         :param date_to: end date constraint for user_beg_date
+        :param after_id: script_id of the last record from the previous page
         :return set of records from the script table
 
         """
+        sql_filter = self._script_filter(user_id, name_pattern, date_from,
+                                         date_to) \
+            .add("s.script_id > ?", after_id)
         self._cursor.execute(
             "select "
             "	s.script_hash,"
@@ -223,20 +469,26 @@ class SqliteDbDriver(BaseDbDriver):
             "from script as s"
             "	inner join object_type as ot "
             "       on ot.object_type_id = s.object_type_id "
-            "where script_end_date is null "
-            "	and (?3 is null "
-            "		or exists( "
-            "			select 1 from user_script_link as usl "
-            "			where usl.user_id = ?3 "
-            "				and usl.script_id = s.script_id "
-            "				and usl.user_script_link_end_date is null))"
-            "   and (?4 is null or script_name like '%' || ?4 || '%') "
-            "   and (?5 is null or date(script_beg_date) >= date(?5)) "
-            "   and (?6 is null or date(script_beg_date) <= date(?6)) "
-            "limit ?1 offset ?2",
-            (limit, offset, user_id, name_pattern, date_from, date_to))
+            f"{sql_filter.where}"
+            "order by s.script_id "
+            "limit ? offset ?",
+            (*sql_filter.params, limit, offset))
         return self._cursor.fetchall()
 
+    @staticmethod
+    def _script_filter(user_id, name_pattern=None, date_from=None,
+                       date_to=None):
+        return SqlFilter("s.script_end_date is null") \
+            .add("exists("
+                 "   select 1 from user_script_link as usl "
+                 "   where usl.user_id = ? "
+                 "       and usl.script_id = s.script_id "
+                 "       and usl.user_script_link_end_date is null)",
+                 user_id) \
+            .add_like("s.script_name", name_pattern) \
+            .add("date(s.script_beg_date) >= date(?)", date_from) \
+            .add("date(s.script_beg_date) <= date(?)", date_to)
+
     def script_ins(self, script_name, script_description, script_author,
                    script_beg_date, script_hash, object_type_id):
         """Inserts a new script in the script table"""
@@ -267,7 +519,8 @@ class SqliteDbDriver(BaseDbDriver):
             "	s.script_author,"
             "	s.script_beg_date,"
             "	s.script_hash,"
-            "	s.object_type_id "
+            "	s.object_type_id,"
+            "	s.script_priority "
             "from script as s "
             "where script_id = ?",
             (script_id, ))
@@ -286,6 +539,18 @@ class SqliteDbDriver(BaseDbDriver):
                              (script_id, script_name, script_description,
                               script_author, script_hash, object_type_id))
 
+    def script_upd_priority(self, script_id, script_priority):
+        """Updates priority of the script checks
+
+        :param script_id identifier from the script table
+        :param script_priority priority class, the smaller value runs first
+        :return void
+
+        """
+        self._cursor.execute("update script set script_priority = ?2 "
+                             "where script_id = ?1",
+                             (script_id, script_priority))
+
     def script_del(self, script_id, script_end_date):
         """Set end date value for the target record in the script table
 
@@ -312,19 +577,14 @@ class SqliteDbDriver(BaseDbDriver):
         :return count of actual records from the script table
 
         """
+        sql_filter = self._script_filter(user_id)
         self._cursor.execute(
             "select count(s.script_id) as cnt "
             "from script as s"
             "	inner join object_type as ot "
             "       on ot.object_type_id = s.object_type_id "
-            "where script_end_date is null "
-            "	and (?1 is null "
-            "		or exists( "
-            "			select 1 from user_script_link as usl "
-            "			where usl.user_id = ?1 "
-            "				and usl.script_id = s.script_id "
-            "				and usl.user_script_link_end_date is not null))",
-            (user_id,))
+            f"{sql_filter.where}",
+            sql_filter.params)
         return self._cursor.fetchone()[0]
 
     def script_rep(self, user_id, script_id, date_from, date_to):
@@ -337,6 +597,13 @@ class SqliteDbDriver(BaseDbDriver):
         :return aggregated data about checks by script for the period
 
         """
+        ts_from, ts_to = day_range(date_from, date_to)
+        sql_filter = SqlFilter() \
+            .add("fc.fact_check_end_ts >= ?", ts_from) \
+            .add("fc.fact_check_end_ts < ?", ts_to) \
+            .add("fc.fact_check_status_id = 2") \
+            .add("usl.user_id = ?", user_id) \
+            .add("usl.script_id = ?", script_id)
         self._cursor.execute(
             "with sub as( "
             "    select "
@@ -347,36 +614,14 @@ class SqliteDbDriver(BaseDbDriver):
             "        fc.fact_check_id, "
             "        date(fc.fact_check_end_date) as check_date, "
             "        coalesce(fc.fact_check_obj_count, 0) as check_obj_cnt, "
-            "        coalesce(count(ob.object_id), 0) as obj_cnt, "
-            "        coalesce(count( "
-            "            case "
-            "                when ob.error_level_id = 1 "
-            "                    then ob.object_id "
-            "                end), 0) as tr_obj_cnt, "
-            "        coalesce(count( "
-            "            case "
-            "                when ob.error_level_id = 2 "
-            "                    then ob.object_id "
-            "                end), 0) as wr_obj_cnt, "
-            "        coalesce(count( "
-            "            case "
-            "                when ob.error_level_id = 3 "
-            "                    then ob.object_id "
-            "                end), 0) as er_obj_cnt "
+            "        fc.fact_check_found_count as obj_cnt, "
+            "        fc.fact_check_trivial_count as tr_obj_cnt, "
+            "        fc.fact_check_warning_count as wr_obj_cnt, "
+            "        fc.fact_check_error_count as er_obj_cnt "
             "    from fact_check as fc "
             "        inner join user_script_link as usl "
             "            on usl.user_script_link_id = fc.user_script_link_id "
-            "        left join object as ob "
-            "            on ob.fact_check_id = fc.fact_check_id "
-            "    where date(fc.fact_check_end_date) "
-            "            between date(?3) and date(?4) "
-            "        and fc.fact_check_status_id = 2 "
-            "        and (usl.user_id = ?1 or ?1 is null) "
-            "        and usl.script_id = ?2 "
-            "    group by "
-            "        fc.fact_check_id, "
-            "        date(fc.fact_check_end_date), "
-            "        fc.fact_check_obj_count "
+            f"    {sql_filter.where}"
             ") "
             " "
             "select "
@@ -409,7 +654,7 @@ class SqliteDbDriver(BaseDbDriver):
             "        else 0 end as perc_er_obj_cnt "
             "from sub "
             "where sub.row_num = 1 ",
-            (user_id, script_id, date_from, date_to))
+            sql_filter.params)
         return self._cursor.fetchall()
 
     def user_script_link_srch(self, user_id, script_id):
@@ -476,6 +721,10 @@ class SqliteDbDriver(BaseDbDriver):
         :return count of records from the fact_check table
 
         """
+        sql_filter = self._fact_check_filter(status_id, user_id, script_id,
+                                             user_name_pattern,
+                                             script_name_pattern, date_from,
+                                             date_to)
         self._cursor.execute(
             "select count(fc.fact_check_id) as cnt "
             "from fact_check as fc "
@@ -487,18 +736,23 @@ class SqliteDbDriver(BaseDbDriver):
             "	inner join script as s on s.script_id = usl.script_id "
             "	inner join object_type as ot "
             "       on ot.object_type_id = s.object_type_id "
-            "where s.script_end_date is null "
-            "	and (?1 is null or ?1 = fcs.fact_check_status_id)"
-            "	and (?2 is null or ?2 = u.user_id)"
-            "	and (?3 is null or ?3 = s.script_id)"
-            "   and (?4 is null or u.user_name like '%' || ?4 || '%') "
-            "   and (?5 is null or s.script_name like '%' || ?5 || '%') "
-            "   and (?6 is null or date(fc.fact_check_que_date) >= date(?6)) "
-            "   and (?7 is null or date(fc.fact_check_que_date) <= date(?7)) ",
-            (status_id, user_id, script_id, user_name_pattern,
-             script_name_pattern, date_from, date_to))
+            f"{sql_filter.where}",
+            sql_filter.params)
         return self._cursor.fetchone()[0]
 
+    @staticmethod
+    def _fact_check_filter(status_id, user_id, script_id, user_name_pattern,
+                           script_name_pattern, date_from, date_to):
+        ts_from, ts_to = day_range(date_from, date_to)
+        return SqlFilter("s.script_end_date is null") \
+            .add("fc.fact_check_status_id = ?", status_id) \
+            .add("usl.user_id = ?", user_id) \
+            .add("usl.script_id = ?", script_id) \
+            .add_like("u.user_name", user_name_pattern) \
+            .add_like("s.script_name", script_name_pattern) \
+            .add("fc.fact_check_que_ts >= ?", ts_from) \
+            .add("fc.fact_check_que_ts < ?", ts_to)
+
     def fact_check_rd(self, fact_check_id):
         """Reads a record from the fact_check table
 
@@ -515,9 +769,7 @@ class SqliteDbDriver(BaseDbDriver):
             "	fc.fact_check_end_date, "
             "	fcs.fact_check_status_name, "
             "	fc.fact_check_obj_count, "
-            "	(select count(ob.object_id)  "
-            "	from object as ob  "
-            "	where ob.fact_check_id = fc.fact_check_id) as odj_cnt "
+            "	fc.fact_check_found_count "
             "from fact_check as fc "
             "	inner join fact_check_status as fcs "
             "		on fcs.fact_check_status_id = fc.fact_check_status_id "
@@ -532,7 +784,7 @@ class SqliteDbDriver(BaseDbDriver):
 
     def fact_check_rd_pg(self, limit, offset, status_id, user_id, script_id,
                          user_name_pattern, script_name_pattern, date_from,
-                         date_to):
+                         date_to, after_id=None):
         """Reads a part of records from the fact_check table for the pagination
 
         :param limit - row count constraint
@@ -544,9 +796,15 @@ class SqliteDbDriver(BaseDbDriver):
         :param script_name_pattern: script name part for like search
         :param date_from: begin date constraint for user_beg_date
         :param date_to: end date constraint for user_beg_date
+        :param after_id: fact_check_id of the last record from the previous page
         :return set of records from the fact_check table
 
         """
+        sql_filter = self._fact_check_filter(status_id, user_id, script_id,
+                                             user_name_pattern,
+                                             script_name_pattern, date_from,
+                                             date_to) \
+            .add("fc.fact_check_id > ?", after_id)
         self._cursor.execute(
             "select "
             "	fc.fact_check_id, "
@@ -557,9 +815,7 @@ class SqliteDbDriver(BaseDbDriver):
             "	fc.fact_check_end_date, "
             "	fcs.fact_check_status_name, "
             "	fc.fact_check_obj_count, "
-            "	(select count(ob.object_id)  "
-            "	from object as ob  "
-            "	where ob.fact_check_id = fc.fact_check_id) as odj_cnt "
+            "	fc.fact_check_found_count "
             "from fact_check as fc "
             "	inner join fact_check_status as fcs "
             "		on fcs.fact_check_status_id = fc.fact_check_status_id "
@@ -569,22 +825,18 @@ class SqliteDbDriver(BaseDbDriver):
             "	inner join script as s on s.script_id = usl.script_id "
             "	inner join object_type as ot "
             "       on ot.object_type_id = s.object_type_id "
-            "where s.script_end_date is null "
-            "	and (?3 is null or ?3 = fcs.fact_check_status_id)"
-            "	and (?4 is null or ?4 = u.user_id)"
-            "	and (?5 is null or ?5 = s.script_id)"
-            "   and (?6 is null or u.user_name like '%' || ?6 || '%') "
-            "   and (?7 is null or s.script_name like '%' || ?7 || '%') "
-            "   and (?8 is null or date(fc.fact_check_que_date) >= date(?8)) "
-            "   and (?9 is null or date(fc.fact_check_que_date) <= date(?9)) "
-            "limit ?1 offset ?2",
-            (limit, offset, status_id, user_id, script_id, user_name_pattern,
-             script_name_pattern, date_from, date_to))
+            f"{sql_filter.where}"
+            "order by fc.fact_check_id "
+            "limit ? offset ?",
+            (*sql_filter.params, limit, offset))
         return self._cursor.fetchall()
 
-    def fact_check_ins(self, fact_check_que_date, user_script_link_id):
+    def fact_check_ins(self, fact_check_que_date, user_script_link_id,
+                       fact_check_priority=None):
         """Inserts a new link into the fact_check table
 
+        :param fact_check_priority priority class of the check, the script
+        priority is used if None
         :return inserted row identifier
 
         """
@@ -592,40 +844,142 @@ class SqliteDbDriver(BaseDbDriver):
             "insert into fact_check("
             "	fact_check_que_date,"
             "	user_script_link_id,"
-            "	fact_check_status_id) "
-            "values(?,?,1)",
-            (fact_check_que_date, user_script_link_id))
+            "	fact_check_status_id,"
+            "	fact_check_que_ts,"
+            "	fact_check_priority) "
+            "values(?1, ?2, 1, cast(strftime('%s', ?1) as integer),"
+            "	coalesce(?3, ("
+            "		select s.script_priority "
+            "		from user_script_link as usl "
+            "			inner join script as s on s.script_id = usl.script_id "
+            "		where usl.user_script_link_id = ?2)))",
+            (fact_check_que_date, user_script_link_id, fact_check_priority))
         return self._cursor.lastrowid
 
-    def fact_check_que(self):
+    def fact_check_que(self, after_id=None):
         """
 
-        :return fact_check and script identifiers with queue status
+        :param after_id identifier from the fact_check table, only later
+        checks are returned if it is not None
+        :return fact_check and script identifiers, priority, user
+        identifier and script hash of the checks with queue status
+        in the queue order
 
         """
+        sql_filter = SqlFilter("fc.fact_check_status_id = 1") \
+            .add("fc.fact_check_id > ?", after_id)
         self._cursor.execute(
             "select "
             "	fc.fact_check_id, "
-            "	s.script_id "
+            "	s.script_id, "
+            "	fc.fact_check_priority, "
+            "	usl.user_id, "
+            "	s.script_hash "
             "from fact_check as fc "
             "	inner join user_script_link as usl "
             "		on usl.user_script_link_id = fc.user_script_link_id "
             "	inner join script as s on s.script_id = usl.script_id "
-            "where fc.fact_check_status_id = 1")
+            f"{sql_filter.where}"
+            "order by fc.fact_check_priority, fc.fact_check_que_ts, "
+            "	fc.fact_check_id",
+            sql_filter.params)
         return self._cursor.fetchall()
 
+    def fact_check_que_rd(self, fact_check_id):
+        """
+
+        :param fact_check_id identifier from the fact_check table
+        :return fact_check and script identifiers, priority, user
+        identifier and script hash of the check
+
+        """
+        self._cursor.execute(
+            "select "
+            "	fc.fact_check_id, "
+            "	usl.script_id, "
+            "	fc.fact_check_priority, "
+            "	usl.user_id, "
+            "	s.script_hash "
+            "from fact_check as fc "
+            "	inner join user_script_link as usl "
+            "		on usl.user_script_link_id = fc.user_script_link_id "
+            "	inner join script as s on s.script_id = usl.script_id "
+            "where fc.fact_check_id = ?",
+            (fact_check_id,))
+        return self._cursor.fetchone()
+
     def fact_check_upd(self, fact_check_id, fact_check_end_date,
                        fact_check_obj_count, fact_check_status_id):
         """Updates a record from the fact_check table"""
         self._cursor.execute(
             "update fact_check set"
             "	fact_check_end_date = ?2,"
+            "	fact_check_end_ts = cast(strftime('%s', ?2) as integer),"
             "	fact_check_obj_count = ?3,"
             "	fact_check_status_id = ?4 "
             "where fact_check_id = ?1",
             (fact_check_id, fact_check_end_date, fact_check_obj_count,
              fact_check_status_id))
 
+    def fact_check_upd_counters(self, fact_check_id, found_count,
+                                trivial_count, warning_count, error_count):
+        """Updates counters of the found objects in the fact_check table
+
+        :param fact_check_id identifier from the fact_check table
+        :param found_count count of all found objects
+        :param trivial_count count of the found objects with trivial level
+        :param warning_count count of the found objects with warning level
+        :param error_count count of the found objects with error level
+        :return void
+
+        """
+        self._cursor.execute(
+            "update fact_check set"
+            "	fact_check_found_count = ?2,"
+            "	fact_check_trivial_count = ?3,"
+            "	fact_check_warning_count = ?4,"
+            "	fact_check_error_count = ?5 "
+            "where fact_check_id = ?1",
+            (fact_check_id, found_count, trivial_count, warning_count,
+             error_count))
+
+    def fact_check_claim(self, fact_check_id):
+        """Sets the running status of the check if it has the queue status
+
+        The status is checked and changed by one statement, so only one
+        worker of all application instances gets the check. The claim time
+        is saved for finding checks of the stopped workers.
+
+        :param fact_check_id identifier from the fact_check table
+        :return True if the check was claimed by the call
+
+        """
+        self._cursor.execute(
+            "update fact_check set"
+            "	fact_check_status_id = 5,"
+            "	fact_check_claim_ts = cast(strftime('%s', 'now') as integer) "
+            "where fact_check_id = ? "
+            "	and fact_check_status_id = 1",
+            (fact_check_id,))
+        return self._cursor.rowcount == 1
+
+    def fact_check_requeue(self, claim_ts):
+        """Sets the queue status of the running checks claimed before the time
+
+        :param claim_ts epoch time, checks which were claimed earlier are
+        considered interrupted
+        :return count of the checks which were put back in the queue
+
+        """
+        self._cursor.execute(
+            "update fact_check set"
+            "	fact_check_status_id = 1,"
+            "	fact_check_claim_ts = null "
+            "where fact_check_status_id = 5 "
+            "	and fact_check_claim_ts < ?",
+            (claim_ts,))
+        return self._cursor.rowcount
+
     def fact_check_rd_status(self, fact_check_id):
         """
 
@@ -661,19 +1015,133 @@ class SqliteDbDriver(BaseDbDriver):
         :return fact_check_id value for the last fact_check by script
 
         """
+        sql_filter = SqlFilter("fc.fact_check_status_id = 2") \
+            .add("usl.script_id = ?", script_id) \
+            .add("usl.user_id = ?", user_id)
         self._cursor.execute(
             "select fc.fact_check_id "
             "from fact_check as fc "
             "	inner join user_script_link as usl "
             "		on usl.user_script_link_id = fc.user_script_link_id "
-            "where fc.fact_check_status_id = 2 "
-            "	and usl.script_id = ?2 "
-            "	and (usl.user_id = ?1 or ?1 is null) "
+            f"{sql_filter.where}"
             "order by fc.fact_check_end_date desc "
             "limit 1",
-            (user_id, script_id))
+            sql_filter.params)
         return self._cursor.fetchone()
 
+    def check_schedule_ins(self, user_script_link_id, interval, cron, jitter,
+                           catch_up, next_ts):
+        """Inserts a new record into the check_schedule table
+
+        :param user_script_link_id identifier from the user_script_link table
+        :param interval period of the checks in seconds or None
+        :param cron cron expression of the check times or None
+        :param jitter max random delay of the check in seconds
+        :param catch_up put all missed checks to the queue if True
+        :param next_ts epoch seconds of the first check
+        :return void
+
+        """
+        self._cursor.execute(
+            "insert into check_schedule("
+            "	user_script_link_id,"
+            "	check_schedule_interval,"
+            "	check_schedule_cron,"
+            "	check_schedule_jitter,"
+            "	check_schedule_catch_up,"
+            "	check_schedule_next_ts,"
+            "	check_schedule_run_ts) "
+            "values(?1, ?2, ?3, ?4, ?5, ?6, ?6)",
+            (user_script_link_id, interval, cron, jitter, int(catch_up),
+             next_ts))
+
+    def check_schedule_srch(self, user_script_link_id):
+        """
+
+        :param user_script_link_id identifier from the user_script_link table
+        :return schedule record for the link: identifier, interval and cron
+
+        """
+        self._cursor.execute(
+            "select "
+            "	check_schedule_id,"
+            "	check_schedule_interval,"
+            "	check_schedule_cron "
+            "from check_schedule "
+            "where user_script_link_id = ?",
+            (user_script_link_id,))
+        return self._cursor.fetchone()
+
+    def check_schedule_del(self, check_schedule_id):
+        """Deletes a record from the check_schedule table
+
+        :param check_schedule_id identifier from the check_schedule table
+        :return void
+
+        """
+        self._cursor.execute(
+            "delete from check_schedule where check_schedule_id = ?",
+            (check_schedule_id,))
+
+    def check_schedule_due(self, now_ts):
+        """
+
+        :param now_ts current time in epoch seconds
+        :return schedules of the actual links with run time before now_ts
+
+        """
+        self._cursor.execute(
+            "select "
+            "	cs.check_schedule_id,"
+            "	usl.user_script_link_id,"
+            "	usl.script_id,"
+            "	cs.check_schedule_interval,"
+            "	cs.check_schedule_cron,"
+            "	cs.check_schedule_jitter,"
+            "	cs.check_schedule_catch_up,"
+            "	cs.check_schedule_next_ts,"
+            "	cs.check_schedule_run_ts "
+            "from check_schedule as cs "
+            "	inner join user_script_link as usl "
+            "		on usl.user_script_link_id = cs.user_script_link_id "
+            "	inner join script as s on s.script_id = usl.script_id "
+            "where cs.check_schedule_run_ts <= ? "
+            "	and usl.user_script_link_end_date is null "
+            "	and s.script_end_date is null "
+            "order by cs.check_schedule_run_ts",
+            (now_ts,))
+        return self._cursor.fetchall()
+
+    def check_schedule_upd_next(self, check_schedule_id, run_ts, next_ts,
+                                next_run_ts):
+        """Moves the schedule to the next check if it was not moved before
+
+        :param check_schedule_id identifier from the check_schedule table
+        :param run_ts run time which was read with the schedule
+        :param next_ts epoch seconds of the next planned check
+        :param next_run_ts next planned check time with the random delay
+        :return True if the schedule was moved by the call
+
+        """
+        self._cursor.execute(
+            "update check_schedule set"
+            "	check_schedule_next_ts = ?3,"
+            "	check_schedule_run_ts = ?4 "
+            "where check_schedule_id = ?1"
+            "	and check_schedule_run_ts = ?2",
+            (check_schedule_id, run_ts, next_ts, next_run_ts))
+        return self._cursor.rowcount == 1
+
+    def object_del_check(self, fact_check_id):
+        """Deletes records of the check from the object table
+
+        :param fact_check_id identifier from the fact_check table
+        :return void
+
+        """
+        self._cursor.execute("delete from object where fact_check_id = ?",
+                             (fact_check_id,))
+
     def object_ins(self, values):
         """Inserts a set of new records in the object table"""
         self._cursor.executemany(
@@ -684,13 +1152,15 @@ class SqliteDbDriver(BaseDbDriver):
             "	object_author,"
             "	object_date,"
             "	error_level_id,"
-            "	fact_check_id) "
-            "values(?,?,?,?,?,?,?)", values)
+            "	fact_check_id,"
+            "	object_ts) "
+            "values(?1, ?2, ?3, ?4, ?5, ?6, ?7, "
+            "   cast(strftime('%s', ?5) as integer))", values)
 
     def object_rd_pg(self, limit, offset, user_id, fact_check_id,
                      error_level_id, object_name_pattern, script_name_pattern,
                      fact_check_end_date_from, fact_check_end_date_to,
-                     object_date_from, object_date_to):
+                     object_date_from, object_date_to, after_id=None):
         """Reads a part of records from the object table for the pagination
 
         :param limit: row count constraint
@@ -706,9 +1176,17 @@ class SqliteDbDriver(BaseDbDriver):
         for fact_check_end_date
         :param object_date_from: begin date constraint for object_date
         :param object_date_to: end date constraint for object_date
+        :param after_id: object_id of the last record from the previous page
         :return set of records from the object table
 
         """
+        sql_filter = self._object_filter(user_id, fact_check_id,
+                                         error_level_id, object_name_pattern,
+                                         script_name_pattern,
+                                         fact_check_end_date_from,
+                                         fact_check_end_date_to,
+                                         object_date_from, object_date_to) \
+            .add("ob.object_id > ?", after_id)
         self._cursor.execute(
             "select "
             "	ob.object_id, "
@@ -730,20 +1208,10 @@ class SqliteDbDriver(BaseDbDriver):
             "	inner join script as s on s.script_id = usl.script_id "
             "	inner join error_level as el "
             "       on el.error_level_id = ob.error_level_id "
-            "where s.script_end_date is null "
-            "	and (?3 is null or ?3 = u.user_id)"
-            "	and (?4 is null or ?4 = ob.fact_check_id)"
-            "	and (?5 is null or ?5 = ob.error_level_id)"
-            "   and (?6 is null or ob.object_name like '%' || ?6 || '%') "
-            "   and (?7 is null or s.script_name like '%' || ?7 || '%') "
-            "   and (?8 is null or date(fc.fact_check_end_date) >= date(?8)) "
-            "   and (?9 is null or date(fc.fact_check_end_date) <= date(?9)) "
-            "   and (?10 is null or date(ob.object_date) >= date(?10)) "
-            "   and (?11 is null or date(ob.object_date) <= date(?11)) "
-            "limit ?1 offset ?2",
-            (limit, offset, user_id, fact_check_id, error_level_id,
-             object_name_pattern, script_name_pattern, fact_check_end_date_from,
-             fact_check_end_date_to, object_date_from, object_date_to))
+            f"{sql_filter.where}"
+            "order by ob.object_id "
+            "limit ? offset ?",
+            (*sql_filter.params, limit, offset))
         return self._cursor.fetchall()
 
     def object_cnt(self, user_id, fact_check_id, error_level_id,
@@ -766,6 +1234,12 @@ class SqliteDbDriver(BaseDbDriver):
         :return count of records from the object table
 
         """
+        sql_filter = self._object_filter(user_id, fact_check_id,
+                                         error_level_id, object_name_pattern,
+                                         script_name_pattern,
+                                         fact_check_end_date_from,
+                                         fact_check_end_date_to,
+                                         object_date_from, object_date_to)
         self._cursor.execute(
             "select count(ob.object_id) as cnt "
             "from object as ob "
@@ -778,21 +1252,29 @@ class SqliteDbDriver(BaseDbDriver):
             "	inner join error_level as el "
             "       on el.error_level_id = ob"
             ".error_level_id "
-            "where s.script_end_date is null "
-            "	and (?1 is null or ?1 = u.user_id)"
-            "	and (?2 is null or ?2 = ob.fact_check_id)"
-            "	and (?3 is null or ?3 = ob.error_level_id)"
-            "   and (?4 is null or ob.object_name like '%' || ?4 || '%') "
-            "   and (?5 is null or s.script_name like '%' || ?5 || '%') "
-            "   and (?6 is null or date(fc.fact_check_end_date) >= date(?6)) "
-            "   and (?7 is null or date(fc.fact_check_end_date) <= date(?7)) "
-            "   and (?8 is null or date(ob.object_date) >= date(?8)) "
-            "   and (?9 is null or date(ob.object_date) <= date(?9)) ",
-            (user_id, fact_check_id, error_level_id, object_name_pattern,
-             script_name_pattern, fact_check_end_date_from,
-             fact_check_end_date_to, object_date_from, object_date_to))
+            f"{sql_filter.where}",
+            sql_filter.params)
         return self._cursor.fetchone()[0]
 
+    @staticmethod
+    def _object_filter(user_id, fact_check_id, error_level_id,
+                       object_name_pattern, script_name_pattern,
+                       fact_check_end_date_from, fact_check_end_date_to,
+                       object_date_from, object_date_to):
+        end_ts_from, end_ts_to = day_range(fact_check_end_date_from,
+                                           fact_check_end_date_to)
+        obj_ts_from, obj_ts_to = day_range(object_date_from, object_date_to)
+        return SqlFilter("s.script_end_date is null") \
+            .add("usl.user_id = ?", user_id) \
+            .add("ob.fact_check_id = ?", fact_check_id) \
+            .add("ob.error_level_id = ?", error_level_id) \
+            .add_like("ob.object_name", object_name_pattern) \
+            .add_like("s.script_name", script_name_pattern) \
+            .add("fc.fact_check_end_ts >= ?", end_ts_from) \
+            .add("fc.fact_check_end_ts < ?", end_ts_to) \
+            .add("ob.object_ts >= ?", obj_ts_from) \
+            .add("ob.object_ts < ?", obj_ts_to)
+
     def user_rep(self, date_from, date_to):
         """Query for the user report
 
@@ -852,3 +1334,73 @@ class SqliteDbDriver(BaseDbDriver):
             "group by u.user_id, u.user_name",
             (date_from, date_to))
         return self._cursor.fetchall()
+
+
+class PooledSqliteDbDriver(SqliteDbDriver):
+    """Driver which keeps a separate connection for every thread
+
+    The object can be shared by threads: the connection and the cursor are
+    thread local, the connection is opened at the first query of the thread
+    and is kept until close_connection is called by the thread
+
+    """
+    def __init__(self, log_config, db_config):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = set()
+        super().__init__(log_config, db_config)
+
+    @property
+    def is_thread_safe(self):
+        """Returns True, the driver object can be used by several threads"""
+        return True
+
+    @property
+    def _conn(self):
+        return getattr(self._local, "conn", None)
+
+    @_conn.setter
+    def _conn(self, value):
+        with self._lock:
+            self._connections.discard(self._conn)  # the connection is reopened
+            if value is not None:
+                self._connections.add(value)
+        self._local.conn = value
+
+    @property
+    def _cursor(self):
+        if getattr(self._local, "cursor", None) is None:
+            self.get_connection()
+        return self._local.cursor
+
+    @_cursor.setter
+    def _cursor(self, value):
+        self._local.cursor = value
+
+    def close_cursor(self):
+        """Closes the cursor of the current thread if it exists"""
+        cursor = getattr(self._local, "cursor", None)
+        if cursor:
+            cursor.close()
+            self._local.cursor = None
+
+    def close_connection(self):
+        """Closes the cursor and the connection of the current thread"""
+        self.close_cursor()
+        conn = self._conn
+        if conn:
+            with self._lock:
+                self._connections.discard(conn)
+            conn.close()
+            self._local.conn = None
+
+    def interrupt(self):
+        """Aborts queries which are running on connections of all threads
+
+        The method can be called from another thread
+
+        """
+        with self._lock:
+            connections = list(self._connections)
+        for conn in connections:
+            conn.interrupt()
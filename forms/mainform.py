@@ -1,15 +1,22 @@
 import logging
-import logging.config
 import tkinter as tk
 from tkinter import ttk, messagebox
 import math
 import datetime
+import threading
 
 from forms.widgets import DateEntry, TableForm, EntryForm, InputForm, Table,\
-    DateInputForm, RepTableForm
+    DateInputForm, RepTableForm, VirtualTable
 from forms.pagination import Pagination
+from forms.pagecursor import PageCursor
+from forms.queryrunner import QueryRunner
 from core.scriptplugin import ScriptPlugin
-from core.scriptqueue import ScriptQueue
+from core.scriptqueue import ScriptQueue, HIGH, NORMAL, LOW
+from core.scheduler import Scheduler
+from core.dynamicimport import DynamicImport
+from db.basedbdriver import BaseDbDriver
+from db.dbwriter import WriterDbDriver
+from db.querycache import CountCache, PageCache
 
 LICENSE = ("Copyright 2021 Alexander Mikhailov The MIT License"
            "\n\nPermission is hereby granted, free of charge, to any person "
@@ -30,20 +37,28 @@ LICENSE = ("Copyright 2021 Alexander Mikhailov The MIT License"
            "OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER "
            "DEALINGS IN THE SOFTWARE.")
 
+CURRENT_CHECKS_REFRESH_MS = 1000
+QUERY_DEBOUNCE_MS = 250
+PGN_DISPLAYED_PAGES = 3
+
 
 class MainForm(tk.Tk):
     """Main widget for the program"""
 
-    def __init__(self, driver, log_config, main_form_config, queue):
+    def __init__(self, driver, log_config, main_form_config, queue,
+                 worker_pool, db_config, stale_timeout=None):
         self._config = main_form_config
         self._log_config = log_config
-        logging.config.dictConfig(log_config)
+        self._runner = None
+        self._scheduler_stop = threading.Event()
+        self._scheduled_checks = threading.Event()  # checks were put
         self._logger = logging.getLogger(__name__)
         self._logger.info('Creating MainForm')
         super().__init__()
         self.attributes('-alpha', 0.0)  # make window transparent
 
         self._driver = driver
+        self._worker_pool = worker_pool
         self._user_id = None
         self._user_dict = self._read_users()
         self._cbx_users = None
@@ -54,19 +69,27 @@ class MainForm(tk.Tk):
         self.after(0, self.attributes, "-alpha", 1.0)  # back to normal
         self.attributes("-topmost", True)
 
+        self._runner = QueryRunner(self, log_config, db_config)
+        self._cnt_cache = CountCache(self._runner.driver,
+                                     estimate=self._config["estimated_count"])
+        self._page_cache = PageCache(self._runner.driver,
+                                     self._config["page_cache_size"])
         self._scr_plug = ScriptPlugin(log_config,
                                       self._config["script_plugin_conf"],
                                       driver)
         self._scr_queue = ScriptQueue(driver, log_config, self._scr_plug,
-                                      queue)
+                                      queue, stale_timeout)
+        self._scheduler = Scheduler(driver, log_config, self._scr_queue,
+                                    self._config["scheduler_conf"])
 
         self._tab = None
-        self.sv_current_check_name = tk.StringVar(value="NO SCRIPT")
-        self.iv_current_check_id = tk.IntVar()
+        self._sv_current_check_name = tk.StringVar(
+            value="Текущая проверка: отсутствует")
         self._sv_user_name = tk.StringVar()
         self._sv_user_name.trace("w", self._refresh_tb_user)
         self._tb_user = None
         self._pgn_user = None
+        self._cur_user = PageCursor()
         self._iv_showed_script_id = tk.IntVar()
         self._iv_showed_script_id.trace("w", self._on_upd_iv_showed_script_id)
         self._iv_all_user_scripts = tk.IntVar(value=1)
@@ -79,6 +102,7 @@ class MainForm(tk.Tk):
         self._ed_script_date_to = None
         self._tb_script = None
         self._pgn_script = None
+        self._cur_script = PageCursor()
 
         self._lbl_check_context = None
         self._iv_showed_check_id = tk.IntVar()
@@ -99,6 +123,7 @@ class MainForm(tk.Tk):
         self._ed_check_date_to = None
         self._tb_check = None
         self._pgn_check = None
+        self._cur_check = PageCursor()
 
         self._lbl_object_context = None
         self._iv_all_user_obj = tk.IntVar(value=1)
@@ -119,8 +144,13 @@ class MainForm(tk.Tk):
         self._iv_period_obj.trace("w", self._on_upd_iv_period_obj)
         self._pgn_obj = None
         self._tb_obj = None
+        self._obj_filters = None
+        self._cur_obj = PageCursor()
 
         self._create_form()
+        self._update_current_checks()
+        threading.Thread(target=self._run_scheduler, args=(db_config,),
+                         name="scheduler", daemon=True).start()
 
     def _run_entry_form(self):
         self._logger.info("Running EntryForm")
@@ -141,7 +171,7 @@ class MainForm(tk.Tk):
         self._cbx_users.current(self._get_user_index())
         self._cbx_users.bind("<<ComboboxSelected>>", self._on_upd_cbx_users)
         lbl_cur_check = tk.Label(fr_cur_user,
-                                 textvariable=self.sv_current_check_name)
+                                 textvariable=self._sv_current_check_name)
         lbl_cur_check.pack(side="right", padx=30)
         self._add_menu_bar()
         self._tab = ttk.Notebook(self)
@@ -200,13 +230,16 @@ class MainForm(tk.Tk):
         date_to = period[1]
         if not date_from or not date_to:
             return
-        rep_data = None
-        try:
-            rep_data = self._driver.user_rep(date_from, date_to)
-        except Exception as ex:
-            self._logger.exception(ex)
+        self._runner.submit("user_rep",
+                            lambda driver: driver.user_rep(date_from, date_to),
+                            lambda result, error: self._show_user_rep(
+                                date_from, date_to, result, error))
+
+    def _show_user_rep(self, date_from, date_to, rep_data, error):
+        if error:
+            self._logger.error(error, exc_info=error)
             messagebox.showerror("Database error",
-                                 f"Ошибка чтения данных из бд: {ex}")
+                                 f"Ошибка чтения данных из бд: {error}")
         tb_headings = ("id", "Пользователь", "Активные скрипты",
                        "Добавленные скрипты", "Удаленные скрипты",
                        "Добавлено проверок", "Выполнено проверок",
@@ -219,6 +252,13 @@ class MainForm(tk.Tk):
     def _close(self):
         self.destroy()
 
+    def destroy(self):
+        self._scheduler_stop.set()
+        if self._runner:
+            self._runner.close()
+            self._runner = None
+        super().destroy()
+
     def _queue_clean(self):
         try:
             self._scr_queue.clean()
@@ -237,12 +277,58 @@ class MainForm(tk.Tk):
 
     def _queue_refresh_from_db(self):
         try:
-            self._scr_queue.refresh_from_db(self.iv_current_check_id.get())
+            self._scr_queue.refresh_from_db()
         except Exception as ex:
             self._logger.exception(ex)
             messagebox.showerror("Script queue error",
                                  f"Ошибка обновления очереди проверок: {ex}")
 
+    def _update_current_checks(self):
+        checks = self._worker_pool.current_checks
+        if not checks:
+            text = "Текущая проверка: отсутствует"
+        elif len(checks) == 1:
+            text = f"Текущая проверка: скрипт {next(iter(checks.values()))}"
+        else:
+            text = f"Текущие проверки: скрипты {', '.join(checks.values())}"
+        self._sv_current_check_name.set(text)
+        if self._scheduled_checks.is_set():
+            self._scheduled_checks.clear()
+            self._refresh_tb_check()
+        self.after(CURRENT_CHECKS_REFRESH_MS, self._update_current_checks)
+
+    def _get_scheduler_driver(self, db_config):
+        if self._driver.is_thread_safe:
+            return self._driver
+        driver = DynamicImport.get_object(self._logger,
+                                          db_config["db_driver_module"],
+                                          db_config["db_driver_class"],
+                                          BaseDbDriver,
+                                          log_config=self._log_config,
+                                          db_config=db_config)
+        driver.get_connection()
+        return WriterDbDriver(driver, self._driver.writer)
+
+    def _run_scheduler(self, db_config):
+        """Puts scheduled checks in the background thread
+
+        Database queries and script loading do not block the form,
+        the check table is refreshed by _update_current_checks
+
+        """
+        driver = self._get_scheduler_driver(db_config)
+        interval = self._config["scheduler_conf"]["poll_interval"]
+        try:
+            while not self._scheduler_stop.is_set():
+                try:
+                    if self._scheduler.run_pending(driver=driver):
+                        self._scheduled_checks.set()
+                except Exception as ex:
+                    self._logger.exception(ex)
+                self._scheduler_stop.wait(interval)
+        finally:
+            driver.close_connection()  # the connection of the thread
+
     def _on_upd_cbx_users(self, *args):
         user_id = self._user_dict[self._cbx_users.get()]
         if user_id == self._user_id:
@@ -252,14 +338,80 @@ class MainForm(tk.Tk):
         self._refresh_tb_check()
 
     def _get_page_cnt(self, driver_method, row_limit, **kwargs):
-        row_cnt = 0
-        try:
-            row_cnt = driver_method(**kwargs)
-        except Exception as ex:
-            self._logger.exception(ex)
-            messagebox.showerror("Data base error",
-                                 f"Ошибка чтения пользователей из БД: {ex}")
-        return math.ceil(row_cnt / row_limit)
+        row_cnt = self._cnt_cache.get(driver_method, **kwargs)
+        return max(1, math.ceil(row_cnt / row_limit))
+
+    def _get_page(self, table_name, read_rows, driver, filters, page_num,
+                  row_limit, driver_method, **kwargs):
+        page_cnt = self._get_page_cnt(driver_method, row_limit, **kwargs)
+        page_num = min(page_num, page_cnt)
+        rows = self._get_page_rows(table_name, read_rows, driver, filters,
+                                   page_num)
+        if not rows and page_num > 1:
+            # the estimated count can be bigger than the real one
+            row_cnt = self._cnt_cache.get_exact(driver_method, **kwargs)
+            page_cnt = max(1, math.ceil(row_cnt / row_limit))
+            page_num = min(page_num, page_cnt)
+            rows = self._get_page_rows(table_name, read_rows, driver,
+                                       filters, page_num)
+        return page_cnt, page_num, rows
+
+    def _submit_page(self, table_name, table, pagination, read_page,
+                     read_rows, filters, page_num, err_msg, delay):
+        self._runner.cancel(("prefetch", table_name))
+        self._runner.submit(table_name,
+                            lambda driver: read_page(driver, filters,
+                                                     page_num),
+                            lambda result, error: self._show_page(
+                                table_name, table, pagination, read_rows,
+                                filters, err_msg, result, error),
+                            delay)
+
+    def _get_page_rows(self, table_name, read_rows, driver, filters,
+                       page_num):
+        # statuses of scripts are read from the files, not from the database
+        version = self._scr_plug.index_generation \
+            if table_name == "script" else None
+        return self._page_cache.get(table_name, filters, page_num,
+                                    lambda: read_rows(driver, filters,
+                                                      page_num),
+                                    version)
+
+    def _prefetch_pages(self, table_name, read_rows, filters, page_num,
+                        page_cnt):
+        pages = [page for page in (page_num + 1, page_num - 1)
+                 if 1 <= page <= page_cnt]
+        if not pages:
+            return
+        self._runner.submit(("prefetch", table_name),
+                            lambda driver: [self._get_page_rows(table_name,
+                                                                read_rows,
+                                                                driver,
+                                                                filters, page)
+                                            for page in pages],
+                            self._on_prefetch)
+
+    def _on_prefetch(self, result, error):
+        if error:
+            self._logger.warning(f"Page prefetching error: {error}")
+
+    def _show_page(self, table_name, table, pagination, read_rows, filters,
+                   err_msg, result, error):
+        table.clear()
+        if error:
+            self._logger.error(error, exc_info=error)
+            messagebox.showerror("Data base error", f"{err_msg}: {error}")
+            return
+        page_cnt, page_num, rows = result
+        if pagination.total_pages != page_cnt \
+                or pagination.current_page != page_num:
+            start_page = max(1, min(page_num,
+                                    page_cnt - PGN_DISPLAYED_PAGES + 1))
+            pagination.update(page_cnt, page_num, start_page)
+        if rows:
+            table.insert(rows)
+        self._prefetch_pages(table_name, read_rows, filters, page_num,
+                             page_cnt)
 
     def _get_user_tab(self):
         self._logger.info('Creating user tab')
@@ -287,10 +439,8 @@ class MainForm(tk.Tk):
         btn_rep_user = tk.Button(fr_user_btns, text="Отчет по пользователям",
                                  command=self._user_rep)
         btn_rep_user.pack(side="bottom", fill="x", pady=2)
-        page_cnt = self._get_page_cnt(self._driver.user_cnt,
-                                      self._config["tb_user_row_limit"])
-        self._pgn_user = Pagination(fr_controls, 3, page_cnt, prev_button="<<",
-                                    next_button=">>",
+        self._pgn_user = Pagination(fr_controls, PGN_DISPLAYED_PAGES, 1,
+                                    prev_button="<<", next_button=">>",
                                     command=self._load_user_page,
                                     pagination_style=self._config[
                                         "pagination_style"])
@@ -304,22 +454,28 @@ class MainForm(tk.Tk):
         self._load_user_page(1)
         return fr_user_tab
 
-    def _load_user_page(self, page_num):
-        user_name_pattern = self._sv_user_name.get()
-        offset = (page_num - 1) * self._config["tb_user_row_limit"]
-        users_rec = None
-        try:
-            users_rec = self._driver.user_rd_pg(user_name_pattern,
-                                                self._config[
-                                                    "tb_user_row_limit"],
-                                                offset)
-        except Exception as ex:
-            self._logger.exception(ex)
-            messagebox.showerror("Data base error",
-                                 f"Ошибка чтения пользователей из БД: {ex}")
-        self._tb_user.clear()
-        if users_rec:
-            self._tb_user.insert(users_rec)
+    def _load_user_page(self, page_num, delay=0):
+        filters = (self._sv_user_name.get(),)
+        self._submit_page("user", self._tb_user, self._pgn_user,
+                          self._read_user_page, self._read_user_rows, filters,
+                          page_num, "Ошибка чтения пользователей из БД", delay)
+
+    def _read_user_page(self, driver, filters, page_num):
+        limit = self._config["tb_user_row_limit"]
+        page_cnt = self._get_page_cnt(driver.user_cnt, limit)
+        page_num = min(page_num, page_cnt)
+        users_rec = self._get_page_rows("user", self._read_user_rows, driver,
+                                        filters, page_num)
+        return page_cnt, page_num, users_rec
+
+    def _read_user_rows(self, driver, filters, page_num):
+        limit = self._config["tb_user_row_limit"]
+        user_name_pattern, = filters
+        after_id, offset = self._cur_user.seek(filters, page_num, limit)
+        users_rec = driver.user_rd_pg(user_name_pattern, limit, offset,
+                                      after_id)
+        self._cur_user.save(filters, page_num, limit, users_rec)
+        return users_rec
 
     def _get_user_index(self):
         index = 0
@@ -342,15 +498,7 @@ class MainForm(tk.Tk):
             return {}
 
     def _refresh_tb_user(self, *args):
-        cur_page = self._pgn_user.current_page
-        cur_page_cnt = self._pgn_user.total_pages
-        page_cnt = self._get_page_cnt(self._driver.user_cnt,
-                                      self._config["tb_user_row_limit"])
-        page_cnt = max(1, page_cnt)
-        if cur_page_cnt != page_cnt:
-            cur_page = min(cur_page, page_cnt)
-            self._pgn_user.update(page_cnt, cur_page)
-        self._load_user_page(cur_page)
+        self._load_user_page(self._pgn_user.current_page, QUERY_DEBOUNCE_MS)
 
     def _refresh_cbx_users(self):
         self._user_dict = self._read_users()
@@ -466,6 +614,9 @@ class MainForm(tk.Tk):
         btn_upd_script = tk.Button(fr_script_btns, text="Обновить",
                                    command=self._script_upd)
         btn_upd_script.pack(side="bottom", fill="x", pady=2)
+        btn_priority_script = tk.Button(fr_script_btns, text="Приоритет",
+                                        command=self._script_priority)
+        btn_priority_script.pack(side="bottom", fill="x", pady=2)
         btn_srch_script = tk.Button(fr_script_btns, text="Искать новые",
                                     command=self._script_srch)
         btn_srch_script.pack(side="bottom", fill="x", pady=2)
@@ -482,6 +633,14 @@ class MainForm(tk.Tk):
         btn_run_script = tk.Button(fr_script_btns, text="Запустить скрипт",
                                    command=self._on_clk_btn_run_script)
         btn_run_script.pack(side="bottom", fill="x", pady=2)
+        btn_unschedule_script = tk.Button(fr_script_btns,
+                                          text="Снять расписание",
+                                          command=self._script_unschedule)
+        btn_unschedule_script.pack(side="bottom", fill="x", pady=2)
+        btn_schedule_script = tk.Button(fr_script_btns,
+                                        text="Запланировать запуск",
+                                        command=self._script_schedule)
+        btn_schedule_script.pack(side="bottom", fill="x", pady=2)
         btn_show_checks = tk.Button(fr_script_btns, text="Показать проверки",
                                     command=self._on_clk_btn_show_checks)
         btn_show_checks.pack(side="bottom", fill="x", pady=2)
@@ -493,12 +652,8 @@ class MainForm(tk.Tk):
         btn_rep_script = tk.Button(fr_script_btns, text="Отчет по скрипту",
                                    command=self._script_rep)
         btn_rep_script.pack(side="bottom", fill="x", pady=2)
-        page_cnt = self._get_page_cnt(self._driver.script_cnt,
-                                      self._config["tb_script_row_limit"],
-                                      user_id=
-                                      None if self._iv_all_user_scripts.get()
-                                      else self._user_id)
-        self._pgn_script = Pagination(fr_script_controls, 3, page_cnt,
+        self._pgn_script = Pagination(fr_script_controls,
+                                      PGN_DISPLAYED_PAGES, 1,
                                       prev_button="<<",
                                       next_button=">>",
                                       command=self._load_script_page,
@@ -513,29 +668,38 @@ class MainForm(tk.Tk):
         self._load_script_page(1)
         return fr_script_tab
 
-    def _load_script_page(self, page_num):
+    def _load_script_page(self, page_num, delay=0):
         self._logger.debug("Loading page for tb_script is running, "
                            f"page: {page_num}")
-        limit = self._config["tb_script_row_limit"]
-        offset = (page_num - 1) * limit
         user_id = None if self._iv_all_user_scripts.get() else self._user_id
         name_pattern = self._sv_script_name.get()
         date_from = self._ed_script_date_from.get()
         date_to = self._ed_script_date_to.get()
-        script_rec = None
-        try:
-            script_rec = self._scr_plug.get_actual_scripts(limit, offset,
-                                                           user_id,
-                                                           name_pattern,
-                                                           date_from,
-                                                           date_to)
-        except Exception as ex:
-            self._logger.exception(ex)
-            messagebox.showerror("Data base error",
-                                 f"Ошибка чтения скриптов из БД: {ex}")
-        self._tb_script.clear()
-        if script_rec:
-            self._tb_script.insert(script_rec)
+        filters = (user_id, name_pattern, date_from, date_to)
+        self._submit_page("script", self._tb_script, self._pgn_script,
+                          self._read_script_page, self._read_script_rows,
+                          filters, page_num, "Ошибка чтения скриптов из БД",
+                          delay)
+
+    def _read_script_page(self, driver, filters, page_num):
+        limit = self._config["tb_script_row_limit"]
+        page_cnt = self._get_page_cnt(driver.script_cnt, limit,
+                                      user_id=filters[0])
+        page_num = min(page_num, page_cnt)
+        script_rec = self._get_page_rows("script", self._read_script_rows,
+                                         driver, filters, page_num)
+        return page_cnt, page_num, script_rec
+
+    def _read_script_rows(self, driver, filters, page_num):
+        limit = self._config["tb_script_row_limit"]
+        user_id, name_pattern, date_from, date_to = filters
+        after_id, offset = self._cur_script.seek(filters, page_num, limit)
+        script_rec = self._scr_plug.get_actual_scripts(limit, offset, user_id,
+                                                       name_pattern, date_from,
+                                                       date_to, after_id,
+                                                       driver=driver)
+        self._cur_script.save(filters, page_num, limit, script_rec)
+        return script_rec
 
     def _on_upd_iv_period_scripts(self, *args):
         if self._iv_period_scripts.get():
@@ -570,6 +734,64 @@ class MainForm(tk.Tk):
             messagebox.showerror("Script queue error",
                                  f"Ошибка добавления скрипта в очередь: {ex}")
 
+    def _get_selected_link(self, err_msg):
+        script_id = self._tb_script.get_selected_id
+        if not script_id:
+            messagebox.showerror("Application error", err_msg)
+            return None
+        link = None
+        try:
+            link = self._driver.user_script_link_srch(self._user_id, script_id)
+        except Exception as ex:
+            self._logger.exception(ex)
+            messagebox.showerror("Script saving error",
+                                 f"Ошибка проверки видимости скрипта: {ex}")
+        if not link:
+            messagebox.showerror("Application error",
+                                 "Скрипт не доступен текущему пользователю")
+            return None
+        return link
+
+    def _script_schedule(self):
+        self._logger.info("Script scheduling is running")
+        link = self._get_selected_link("Скрипт для планирования не выбран")
+        if not link:
+            return
+        schedule = None
+        try:
+            schedule = self._scheduler.get_text(link[0])
+        except Exception as ex:
+            self._logger.exception(ex)
+        input_f = InputForm(self._log_config, self,
+                            "Введите период запуска в секундах "
+                            "или cron выражение",
+                            btn_entry_txt='Сохранить', btn_exit_txt='Выйти',
+                            default_value=schedule)
+        text = input_f.get_result()
+        if not text:
+            return
+        try:
+            self._scheduler.add(link[0], text)
+        except ValueError as ex:
+            messagebox.showerror("Application error", f"{ex}")
+        except Exception as ex:
+            self._logger.exception(ex)
+            messagebox.showerror("Script saving error",
+                                 f"Ошибка сохранения расписания: {ex}")
+
+    def _script_unschedule(self):
+        self._logger.info("Script schedule removing is running")
+        link = self._get_selected_link("Скрипт для снятия расписания "
+                                       "не выбран")
+        if not link:
+            return
+        try:
+            self._scheduler.remove(link[0])
+        except Exception as ex:
+            self._logger.exception(ex)
+            messagebox.showerror("Script saving error",
+                                 f"Ошибка удаления расписания: {ex}")
+
     def _on_clk_btn_show_checks(self, *args):
         script_id = self._tb_script.get_selected_id
         if not script_id:
@@ -620,18 +842,8 @@ class MainForm(tk.Tk):
 
     def _refresh_tb_script(self, *args):
         self._logger.debug("Refreshing tb_script is running")
-        cur_page = self._pgn_script.current_page
-        cur_page_cnt = self._pgn_script.total_pages
-        user_id = None if self._iv_all_user_scripts.get() else self._user_id
-        page_cnt = self._get_page_cnt(self._driver.script_cnt,
-                                      self._config["tb_user_row_limit"],
-                                      user_id=user_id)
-        page_cnt = max(1, page_cnt)
-        if cur_page_cnt != page_cnt:
-            self._logger.debug(f"cur_page:{cur_page}; page_cnt:{page_cnt}")
-            cur_page = min(cur_page, page_cnt)
-            self._pgn_script.update(page_cnt, cur_page)
-        self._load_script_page(cur_page)
+        self._load_script_page(self._pgn_script.current_page,
+                               QUERY_DEBOUNCE_MS)
 
     def _script_del(self):
         self._logger.info('Script deleting is running')
@@ -673,6 +885,36 @@ class MainForm(tk.Tk):
                                      "Ошибка обновления скрипта: "
                                      f"{ex}")
 
+    def _script_priority(self):
+        self._logger.info('Script priority updating is running')
+        script_id = self._tb_script.get_selected_id
+        if not script_id:
+            messagebox.showerror("Application error",
+                                 "Скрипт для изменения приоритета не выбран")
+            return
+        priority = None
+        try:
+            priority = self._driver.script_rd(script_id)[7]
+        except Exception as ex:
+            self._logger.exception(ex)
+        input_f = InputForm(self._log_config, self,
+                            f"Введите приоритет проверок: {HIGH} - высокий, "
+                            f"{NORMAL} - обычный, {LOW} - низкий",
+                            btn_entry_txt='Сохранить', btn_exit_txt='Выйти',
+                            default_value=str(priority))
+        text = input_f.get_result()
+        if not text:
+            return
+        if text.strip() not in (str(HIGH), str(NORMAL), str(LOW)):
+            messagebox.showerror("Application error", "Неверный приоритет")
+            return
+        try:
+            self._driver.script_upd_priority(script_id, int(text))
+        except Exception as ex:
+            self._logger.exception(ex)
+            messagebox.showerror("Data base error",
+                                 f"Ошибка обновления приоритета: {ex}")
+
     def _script_srch(self):
         self._logger.info("Script searching is running")
         new_scripts = None
@@ -769,14 +1011,17 @@ class MainForm(tk.Tk):
         if not date_from or not date_to:
             return
         user_id = None if self._iv_all_user_scripts.get() else self._user_id
-        rep_data = None
-        try:
-            rep_data = self._driver.script_rep(user_id, script_id, date_from,
-                                               date_to)
-        except Exception as ex:
-            self._logger.exception(ex)
+        self._runner.submit("script_rep",
+                            lambda driver: driver.script_rep(
+                                user_id, script_id, date_from, date_to),
+                            lambda result, error: self._show_script_rep(
+                                date_from, date_to, result, error))
+
+    def _show_script_rep(self, date_from, date_to, rep_data, error):
+        if error:
+            self._logger.error(error, exc_info=error)
             messagebox.showerror("Database error",
-                                 f"Ошибка чтения данных из бд: {ex}")
+                                 f"Ошибка чтения данных из бд: {error}")
         tb_headings = ("id", "Дата проверки", "Проверено объектов",
                        "Выявлено объектов", "% выявления",
                        "Выявлено тривиальных", "% тривиальных",
@@ -819,6 +1064,11 @@ class MainForm(tk.Tk):
                                              variable=self._iv_status_checks,
                                              padx=15)
         rb_qu_status_checks.pack(fill="x", expand=True)
+        rb_rn_status_checks = tk.Radiobutton(fr_check_filters,
+                                             text="Выполняются", value=5,
+                                             variable=self._iv_status_checks,
+                                             padx=15)
+        rb_rn_status_checks.pack(fill="x", expand=True)
         rb_ex_status_checks = tk.Radiobutton(fr_check_filters,
                                              text="Выполненные", value=2,
                                              variable=self._iv_status_checks,
@@ -876,14 +1126,8 @@ class MainForm(tk.Tk):
         btn_show_obj = tk.Button(fr_check_btns, text="Просмотреть объекты",
                                  command=self._show_obj)
         btn_show_obj.pack(side="bottom", fill="x", pady=2)
-        page_cnt = self._get_page_cnt(self._driver.fact_check_cnt,
-                                      self._config["tb_check_row_limit"],
-                                      status_id=None, user_id=None,
-                                      script_id=None,
-                                      user_name_pattern=None,
-                                      script_name_pattern=None,
-                                      date_from=None, date_to=None)
-        self._pgn_check = Pagination(fr_check_controls, 3, page_cnt,
+        self._pgn_check = Pagination(fr_check_controls, PGN_DISPLAYED_PAGES,
+                                     1,
                                      prev_button="<<",
                                      next_button=">>",
                                      command=self._load_check_page,
@@ -901,11 +1145,9 @@ class MainForm(tk.Tk):
         self._load_check_page(1)
         return fr_check_tab
 
-    def _load_check_page(self, page_num):
+    def _load_check_page(self, page_num, delay=0):
         self._logger.debug("Loading page for tb_check is running, "
                            f"page: {page_num}")
-        limit = self._config["tb_script_row_limit"]
-        offset = (page_num - 1) * limit
         user_id = None if self._iv_all_user_checks.get() else self._user_id
         script_id = None if self._iv_all_script_checks.get()\
             else self._iv_showed_script_id.get()
@@ -922,60 +1164,48 @@ class MainForm(tk.Tk):
             user_name_pattern = value
         date_from = self._ed_check_date_from.get()
         date_to = self._ed_check_date_to.get()
-        check_rec = None
-        try:
-            check_rec = self._driver.fact_check_rd_pg(limit, offset,
-                                                      status_id=status_id,
-                                                      user_id=user_id,
-                                                      script_id=script_id,
-                                                      user_name_pattern=
-                                                      user_name_pattern,
-                                                      script_name_pattern=
-                                                      script_name_pattern,
-                                                      date_from=date_from,
-                                                      date_to=date_to)
-        except Exception as ex:
-            self._logger.exception(ex)
-            messagebox.showerror("Data base error",
-                                 f"Ошибка чтения проверок из БД: {ex}")
-        self._tb_check.clear()
-        if check_rec:
-            self._tb_check.insert(check_rec)
+        filters = (status_id, user_id, script_id, user_name_pattern,
+                   script_name_pattern, date_from, date_to)
+        self._submit_page("check", self._tb_check, self._pgn_check,
+                          self._read_check_page, self._read_check_rows,
+                          filters, page_num, "Ошибка чтения проверок из БД",
+                          delay)
+
+    def _read_check_page(self, driver, filters, page_num):
+        limit = self._config["tb_check_row_limit"]
+        status_id, user_id, script_id, user_name_pattern, \
+            script_name_pattern, date_from, date_to = filters
+        return self._get_page("check", self._read_check_rows, driver,
+                              filters, page_num, limit, driver.fact_check_cnt,
+                              status_id=status_id,
+                              user_id=user_id,
+                              script_id=script_id,
+                              user_name_pattern=user_name_pattern,
+                              script_name_pattern=script_name_pattern,
+                              date_from=date_from,
+                              date_to=date_to)
+
+    def _read_check_rows(self, driver, filters, page_num):
+        limit = self._config["tb_check_row_limit"]
+        status_id, user_id, script_id, user_name_pattern, \
+            script_name_pattern, date_from, date_to = filters
+        after_id, offset = self._cur_check.seek(filters, page_num, limit)
+        check_rec = driver.fact_check_rd_pg(limit, offset,
+                                            status_id=status_id,
+                                            user_id=user_id,
+                                            script_id=script_id,
+                                            user_name_pattern=user_name_pattern,
+                                            script_name_pattern=
+                                            script_name_pattern,
+                                            date_from=date_from,
+                                            date_to=date_to,
+                                            after_id=after_id)
+        self._cur_check.save(filters, page_num, limit, check_rec)
+        return check_rec
 
     def _refresh_tb_check(self, *args):
         self._logger.debug("Refreshing tb_check is running")
-        cur_page = self._pgn_check.current_page
-        cur_page_cnt = self._pgn_check.total_pages
-        user_id = None if self._iv_all_user_checks.get() else self._user_id
-        script_id = None if self._iv_all_script_checks.get()\
-            else self._iv_showed_script_id.get()
-        status_id = self._iv_status_checks.get()
-        status_id = None if status_id == -1 else status_id
-        script_name_pattern = None
-        value = self._sv_check_script_name.get()
-        if value and value.strip():
-            script_name_pattern = value
-        user_name_pattern = None
-        value = self._sv_check_user_name.get()
-        if value and value.strip():
-            user_name_pattern = value
-        date_from = self._ed_check_date_from.get()
-        date_to = self._ed_check_date_to.get()
-        page_cnt = self._get_page_cnt(self._driver.fact_check_cnt,
-                                      self._config["tb_user_row_limit"],
-                                      status_id=status_id,
-                                      user_id=user_id,
-                                      script_id=script_id,
-                                      user_name_pattern=user_name_pattern,
-                                      script_name_pattern=script_name_pattern,
-                                      date_from=date_from,
-                                      date_to=date_to)
-        page_cnt = max(1, page_cnt)
-        if cur_page_cnt != page_cnt:
-            self._logger.debug(f"cur_page:{cur_page}; page_cnt:{page_cnt}")
-            cur_page = min(cur_page, page_cnt)
-            self._pgn_check.update(page_cnt, cur_page)
-        self._load_check_page(cur_page)
+        self._load_check_page(self._pgn_check.current_page, QUERY_DEBOUNCE_MS)
 
     def _reset_tb_check_params(self):
         self._iv_all_user_checks.set(1)
@@ -1000,9 +1230,9 @@ class MainForm(tk.Tk):
             messagebox.showerror("Application error",
                                  "Проверка для отмены не выбрана")
             return
-        if check_id == self.iv_current_check_id.get():
-            messagebox.showerror("Application error",
-                                 "Проверка выполняется, отмена невозможна")
+        if self._worker_pool.cancel(check_id):
+            # the cancel status is saved by the queue worker
+            self.after(CURRENT_CHECKS_REFRESH_MS, self._refresh_tb_check)
             return
         try:
             status = self._driver.fact_check_rd_status(check_id)
@@ -1174,76 +1404,38 @@ class MainForm(tk.Tk):
         self._ed_obj_date_to.disable()
         fr_obj_btns = tk.Frame(fr_obj_controls)
         fr_obj_btns.pack(side="top", fill="both", expand=True)
-        page_cnt = self._get_page_cnt(self._driver.object_cnt,
-                                      self._config["tb_object_row_limit"],
-                                      user_id=None, fact_check_id=None,
-                                      error_level_id=None,
-                                      object_name_pattern=None,
-                                      script_name_pattern=None,
-                                      fact_check_end_date_from=None,
-                                      fact_check_end_date_to=None,
-                                      object_date_from=None,
-                                      object_date_to=None)
-        self._pgn_obj = Pagination(fr_obj_controls, 3, page_cnt,
+        tb_headings = ("id", "Название скрипта", "Пользователь",
+                       "Дата выполнения проверки", "Название объекта",
+                       "Идентификатор объекта", "Комментарий", "Автор",
+                       "Дата объекта", "Уровень реагирования")
+        if self._config["tb_object_virtual"]:
+            self._tb_obj = VirtualTable(fr_obj_tab, tb_headings,
+                                        self._fetch_obj_rows,
+                                        visible_rows=
+                                        self._config["tb_object_row_limit"],
+                                        cancel=lambda: self._runner.cancel(
+                                            "object_rows"))
+            self._tb_obj.pack(side="right", fill="both", expand=True)
+            self._load_obj_rows()
+            return fr_obj_tab
+        self._pgn_obj = Pagination(fr_obj_controls, PGN_DISPLAYED_PAGES, 1,
                                    prev_button="<<",
                                    next_button=">>",
                                    command=self._load_obj_page,
                                    pagination_style=self._config[
                                          "pagination_style"])
         self._pgn_obj.pack(side="bottom", fill="both", expand=True)
-        self._tb_obj = Table(fr_obj_tab,
-                             headings=("id", "Название скрипта",
-                                       "Пользователь",
-                                       "Дата выполнения проверки",
-                                       "Название объекта",
-                                       "Идентификатор объекта",
-                                       "Комментарий",
-                                       "Автор",
-                                       "Дата объекта",
-                                       "Уровень реагирования"))
+        self._tb_obj = Table(fr_obj_tab, headings=tb_headings)
         self._tb_obj.pack(side="right", fill="both", expand=True)
         self._load_obj_page(1)
         return fr_obj_tab
 
     def _refresh_tb_obj(self, *args):
         self._logger.debug("Refreshing tb_obj is running")
-        cur_page = self._pgn_obj.current_page
-        cur_page_cnt = self._pgn_obj.total_pages
-        user_id = None if self._iv_all_user_obj.get() else self._user_id
-        check_id = None if self._iv_all_check_obj.get() \
-            else self._iv_showed_check_id.get()
-        error_level_id = self._iv_status_obj.get()
-        error_level_id = None if error_level_id == -1 else error_level_id
-        obj_name_pattern = None
-        value = self._sv_obj_name.get()
-        if value and value.strip():
-            obj_name_pattern = value
-        script_name_pattern = None
-        value = self._sv_obj_script_name.get()
-        if value and value.strip():
-            script_name_pattern = value
-        fact_check_end_date_from = self._ed_check_obj_date_from.get()
-        fact_check_end_date_to = self._ed_check_obj_date_to.get()
-        object_date_from = self._ed_obj_date_from.get()
-        object_date_to = self._ed_obj_date_to.get()
-        page_cnt = self._get_page_cnt(self._driver.object_cnt,
-                                      self._config["tb_object_row_limit"],
-                                      user_id=user_id,
-                                      fact_check_id=check_id,
-                                      error_level_id=error_level_id,
-                                      object_name_pattern=obj_name_pattern,
-                                      script_name_pattern=script_name_pattern,
-                                      fact_check_end_date_from=
-                                      fact_check_end_date_from,
-                                      fact_check_end_date_to=
-                                      fact_check_end_date_to,
-                                      object_date_from=object_date_from,
-                                      object_date_to=object_date_to)
-        page_cnt = max(1, page_cnt)
-        if cur_page_cnt != page_cnt:
-            cur_page = min(cur_page, page_cnt)
-            self._pgn_obj.update(page_cnt, cur_page)
-        self._load_obj_page(cur_page)
+        if self._pgn_obj:
+            self._load_obj_page(self._pgn_obj.current_page, QUERY_DEBOUNCE_MS)
+        else:
+            self._load_obj_rows(QUERY_DEBOUNCE_MS)
 
     def _on_upd_iv_period_checks_obj(self, *args):
         if self._iv_period_checks_obj.get():
@@ -1263,9 +1455,7 @@ class MainForm(tk.Tk):
             self._ed_obj_date_to.disable()
         self._refresh_tb_obj()
 
-    def _load_obj_page(self, page_num):
-        limit = self._config["tb_object_row_limit"]
-        offset = (page_num - 1) * limit
+    def _get_obj_filters(self):
         user_id = None if self._iv_all_user_obj.get() else self._user_id
         check_id = None if self._iv_all_check_obj.get()\
             else self._iv_showed_check_id.get()
@@ -1283,23 +1473,84 @@ class MainForm(tk.Tk):
         fact_check_end_date_to = self._ed_check_obj_date_to.get()
         object_date_from = self._ed_obj_date_from.get()
         object_date_to = self._ed_obj_date_to.get()
-        obj_rec = None
-        try:
-            obj_rec = self._driver.object_rd_pg(limit, offset, user_id,
-                                                check_id, error_level_id,
-                                                obj_name_pattern,
-                                                script_name_pattern,
-                                                fact_check_end_date_from,
-                                                fact_check_end_date_to,
-                                                object_date_from,
-                                                object_date_to)
-        except Exception as ex:
-            self._logger.exception(ex)
+        return (user_id, check_id, error_level_id, obj_name_pattern,
+                script_name_pattern, fact_check_end_date_from,
+                fact_check_end_date_to, object_date_from, object_date_to)
+
+    @staticmethod
+    def _get_obj_cnt_args(filters):
+        user_id, check_id, error_level_id, obj_name_pattern, \
+            script_name_pattern, fact_check_end_date_from, \
+            fact_check_end_date_to, object_date_from, object_date_to = filters
+        return dict(user_id=user_id,
+                    fact_check_id=check_id,
+                    error_level_id=error_level_id,
+                    object_name_pattern=obj_name_pattern,
+                    script_name_pattern=script_name_pattern,
+                    fact_check_end_date_from=fact_check_end_date_from,
+                    fact_check_end_date_to=fact_check_end_date_to,
+                    object_date_from=object_date_from,
+                    object_date_to=object_date_to)
+
+    def _get_obj_cnt(self, driver, filters):
+        return self._cnt_cache.get(driver.object_cnt,
+                                   **self._get_obj_cnt_args(filters))
+
+    def _load_obj_page(self, page_num, delay=0):
+        filters = self._get_obj_filters()
+        self._submit_page("object", self._tb_obj, self._pgn_obj,
+                          self._read_obj_page, self._read_obj_rows, filters,
+                          page_num, "Ошибка чтения объектов из БД", delay)
+
+    def _read_obj_page(self, driver, filters, page_num):
+        limit = self._config["tb_object_row_limit"]
+        return self._get_page("object", self._read_obj_rows, driver, filters,
+                              page_num, limit, driver.object_cnt,
+                              **self._get_obj_cnt_args(filters))
+
+    def _read_obj_rows(self, driver, filters, page_num):
+        limit = self._config["tb_object_row_limit"]
+        after_id, offset = self._cur_obj.seek(filters, page_num, limit)
+        obj_rec = driver.object_rd_pg(limit, offset, *filters, after_id)
+        self._cur_obj.save(filters, page_num, limit, obj_rec)
+        return obj_rec
+
+    def _load_obj_rows(self, delay=0):
+        filters = self._get_obj_filters()
+        self._runner.submit("object",
+                            lambda driver: self._get_obj_cnt(driver, filters),
+                            lambda result, error: self._show_obj_rows(
+                                filters, result, error),
+                            delay)
+
+    def _show_obj_rows(self, filters, row_cnt, error):
+        if error:
+            self._logger.error(error, exc_info=error)
+            messagebox.showerror("Data base error",
+                                 f"Ошибка чтения объектов из БД: {error}")
+            row_cnt = 0
+        self._obj_filters = filters
+        self._tb_obj.reset(row_cnt)
+
+    def _fetch_obj_rows(self, offset, limit, after_id, callback):
+        filters = self._obj_filters
+        # rows after the known key are read without the offset scan,
+        # the new request of the table supersedes the previous one
+        query_offset = 0 if after_id is not None else offset
+        self._runner.submit("object_rows",
+                            lambda driver: driver.object_rd_pg(limit,
+                                                               query_offset,
+                                                               *filters,
+                                                               after_id),
+                            lambda result, error: self._show_obj_chunk(
+                                callback, result, error))
+
+    def _show_obj_chunk(self, callback, rows, error):
+        if error:
+            self._logger.error(error, exc_info=error)
             messagebox.showerror("Data base error",
-                                 f"Ошибка чтения объектов из БД: {ex}")
-        self._tb_obj.clear()
-        if obj_rec:
-            self._tb_obj.insert(obj_rec)
+                                 f"Ошибка чтения объектов из БД: {error}")
+        callback(rows)
 
     def _reset_tb_obj_params(self):
         self._iv_all_user_obj.set(1)
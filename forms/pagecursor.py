@@ -0,0 +1,42 @@
+class PageCursor(object):
+    """Class for storing page keys for the keyset pagination
+
+    The key of a page is the identifier of the last record
+    from the previous page, keys are reset when the filters are changed
+
+    """
+
+    def __init__(self):
+        self._filters = None
+        self._keys = {1: None}
+
+    def reset(self):
+        """Removes all known page keys"""
+        self._keys = {1: None}
+
+    def seek(self, filters, page_num, limit):
+        """Returns parameters to read the page
+
+        :param filters: tuple of filter values for the page query
+        :param page_num: page number
+        :param limit: row count on the page
+        :return: after_id and offset values for the page query
+        """
+        if filters != self._filters:
+            self._filters = filters
+            self.reset()
+        known_page = max(page for page in self._keys if page <= page_num)
+        return self._keys[known_page], (page_num - known_page) * limit
+
+    def save(self, filters, page_num, limit, rows):
+        """Saves the key of the next page
+
+        :param filters: tuple of filter values for the page query
+        :param page_num: number of the loaded page
+        :param limit: row count on the page
+        :param rows: records of the loaded page, identifier is the first column
+        :return: void
+        """
+        if filters != self._filters or not rows or len(rows) < limit:
+            return
+        self._keys[page_num + 1] = rows[-1][0]
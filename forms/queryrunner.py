@@ -0,0 +1,145 @@
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from core.dynamicimport import DynamicImport
+from db.basedbdriver import BaseDbDriver
+
+RESULT_POLL_MS = 50
+
+
+class QueryRunner(object):
+    """Class for running database queries out of the Tk thread
+
+    Queries are executed one by one in the background thread with its own
+    database connection. A query is identified by the key, the new query
+    with the same key supersedes the previous one: the waiting query is
+    removed, the running query is interrupted and its result is dropped.
+    Results are passed to the callbacks in the Tk thread.
+
+    """
+
+    def __init__(self, master, log_config, db_config):
+        self._logger = logging.getLogger(__name__)
+        self._logger.info("Creating QueryRunner")
+        self._master = master
+        db_config = dict(db_config, profile=db_config["ui_profile"])
+        self._driver = DynamicImport.get_object(self._logger,
+                                                db_config["db_driver_module"],
+                                                db_config["db_driver_class"],
+                                                BaseDbDriver,
+                                                log_config=log_config,
+                                                db_config=db_config)
+        self._executor = ThreadPoolExecutor(max_workers=1,
+                                            thread_name_prefix="query_runner")
+        # the connection is opened in the thread which executes queries
+        self._executor.submit(self._connect)
+        self._results = queue.Queue()
+        self._lock = threading.Lock()
+        self._generations = {}
+        self._running_key = None
+        self._delayed = {}
+        self._futures = {}
+        self._poll_id = self._master.after(RESULT_POLL_MS, self._poll)
+
+    @property
+    def driver(self):
+        """Returns the driver of the background connection"""
+        return self._driver
+
+    def submit(self, key, query, callback, delay=0):
+        """Runs the query in the background thread
+
+        :param key: query key, the previous query with the key is cancelled
+        :param query: callable which takes the driver and returns the result
+        :param callback: callable which takes the result and the exception,
+        it is called in the Tk thread
+        :param delay: idle time in milliseconds before the query start
+        :return void
+
+        """
+        self.cancel(key)
+        generation = self._generations[key]
+        if delay:
+            self._delayed[key] = self._master.after(delay, self._start, key,
+                                                    generation, query,
+                                                    callback)
+        else:
+            self._start(key, generation, query, callback)
+
+    def cancel(self, key):
+        """Cancels the query with the key
+
+        :param key: query key
+        :return void
+
+        """
+        after_id = self._delayed.pop(key, None)
+        if after_id:
+            self._master.after_cancel(after_id)
+        future = self._futures.pop(key, None)
+        if future:
+            future.cancel()
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            if self._running_key == key:
+                self._logger.debug(f"Interrupting query: {key}")
+                self._driver.interrupt()
+
+    def close(self):
+        """Cancels all queries and closes the background connection
+
+        :return void
+
+        """
+        self._master.after_cancel(self._poll_id)
+        for key in list(self._generations):
+            self.cancel(key)
+        self._executor.submit(self._driver.close_connection)
+        self._executor.shutdown(wait=True)
+        self._logger.info("QueryRunner was closed")
+
+    def _connect(self):
+        self._driver.get_connection()
+        self._logger.info("QueryRunner connection was opened, settings: "
+                          f"{self._driver.connection_settings()}")
+
+    def _start(self, key, generation, query, callback):
+        self._delayed.pop(key, None)
+        self._futures[key] = self._executor.submit(self._run, key, generation,
+                                                   query, callback)
+
+    def _run(self, key, generation, query, callback):
+        with self._lock:
+            if self._generations.get(key) != generation:
+                return
+            self._running_key = key
+        result = None
+        error = None
+        try:
+            with self._driver.read_snapshot():
+                result = query(self._driver)
+        except Exception as ex:
+            error = ex
+        finally:
+            with self._lock:
+                self._running_key = None
+        self._results.put((key, generation, callback, result, error))
+
+    def _poll(self):
+        try:
+            while True:
+                try:
+                    key, generation, callback, result, error = \
+                        self._results.get_nowait()
+                except queue.Empty:
+                    break
+                if self._generations.get(key) != generation:
+                    continue  # the query was superseded
+                self._futures.pop(key, None)
+                callback(result, error)
+        except Exception as ex:
+            self._logger.exception(ex)
+        finally:
+            self._poll_id = self._master.after(RESULT_POLL_MS, self._poll)
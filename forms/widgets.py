@@ -1,8 +1,8 @@
 import logging
-import logging.config
 import tkinter as tk
 from tkinter import ttk, messagebox
 import datetime
+from collections import OrderedDict
 
 from forms.repplot import RepPlot
 
@@ -12,7 +12,6 @@ class DateInputForm(tk.Toplevel):
 
     def __init__(self, log_config, root, lbl_text, btn_entry_txt="OK",
                  btn_exit_txt="Отмена"):
-        logging.config.dictConfig(log_config)
         self._logger = logging.getLogger(__name__)
         self._logger.info("Creating DateInputForm")
         super().__init__(root)
@@ -68,7 +67,6 @@ class DateEntry(tk.Frame):
     def __init__(self, root, log_config, lbl_text, default_value=None,
                  date_pattern="%d.%m.%Y", command=None):
         super().__init__(root)
-        logging.config.dictConfig(log_config)
         self._logger = logging.getLogger(__name__)
         self._date_pattern = date_pattern
         self._command = command
@@ -124,7 +122,6 @@ class TableForm(tk.Toplevel):
 
     def __init__(self, log_config, root, lbl_text, tb_headings, tb_rows, title,
                  btn_entry_txt='OK', btn_exit_txt='Отмена'):
-        logging.config.dictConfig(log_config)
         self._logger = logging.getLogger(__name__)
         self._logger.info('Creating TableForm')
         super().__init__(root)
@@ -178,7 +175,6 @@ class RepTableForm(tk.Toplevel):
 
     def __init__(self, log_config, root, lbl_text, tb_headings, tb_rows, title,
                  btn_exit_txt="Отмена", has_plot=False):
-        logging.config.dictConfig(log_config)
         self._logger = logging.getLogger(__name__)
         self._logger.info("Creating RepTableForm")
         super().__init__(root)
@@ -213,7 +209,6 @@ class InputForm(tk.Toplevel):
 
     def __init__(self, log_config, root, lbl_text, btn_entry_txt="OK",
                  btn_exit_txt="Отмена", default_value=None):
-        logging.config.dictConfig(log_config)
         self._logger = logging.getLogger(__name__)
         self._logger.info("Creating InputForm")
         super().__init__(root)
@@ -364,3 +359,208 @@ class Table(tk.Frame):
         """
         for row in rows:
             self._table.insert("", "end", values=tuple(row))
+
+
+class VirtualTable(tk.Frame):
+    """Table which materializes only the visible rows
+
+    The treeview keeps a fixed set of items, which are filled with the rows
+    of the current window while scrolling. Missing chunks of the window are
+    requested by one call of the fetch callable:
+    fetch(offset, limit, after_id, callback), where offset is the position
+    of the first row, after_id is the identifier of the row before it
+    if it is known and callback takes the list of rows (None if reading
+    was failed). Only one request is running: the new request supersedes
+    the previous one, so fetch must drop the previous query, and the cancel
+    callable stops the running request. Only the last read chunks are stored.
+
+    """
+
+    def __init__(self, root, headings, fetch, visible_rows=30,
+                 chunk_size=200, max_chunks=10, cancel=None):
+        super().__init__(root)
+        self._fetch = fetch
+        self._cancel = cancel
+        self._visible_rows = visible_rows
+        self._chunk_size = chunk_size
+        self._max_chunks = max_chunks
+        self._column_cnt = len(headings)
+        self._row_cnt = 0
+        self._top = 0
+        self._generation = 0
+        self._chunks = OrderedDict()
+        self._chunk_keys = {}
+        self._pending = set()  # chunks of the running request
+        self._selected_row = None
+        self._table = ttk.Treeview(self, show="headings", selectmode="browse",
+                                   height=visible_rows)
+        self._table["columns"] = headings
+        self._table["displaycolumns"] = headings
+        for head in headings:
+            self._table.heading(head, text=head, anchor="center")
+            self._table.column(head, anchor="center")
+        self._table.column(headings[0], minwidth=0, width=0, stretch="no")
+        self._items = [self._table.insert("", "end")
+                       for _ in range(visible_rows)]
+        self._table.detach(*self._items)
+        self._scroll_vertical = tk.Scrollbar(self, orient="vertical",
+                                             command=self._on_scroll)
+        self._scroll_vertical.pack(side="right", fill="y")
+        scroll_horizontal = tk.Scrollbar(self, orient="horizontal",
+                                         command=self._table.xview)
+        scroll_horizontal.pack(side="bottom", fill="x")
+        self._table.configure(xscrollcommand=scroll_horizontal.set)
+        self._table.pack(expand="yes", fill="both", anchor="nw")
+        self._table.bind("<<TreeviewSelect>>", self._on_select)
+        self._table.bind("<MouseWheel>", self._on_wheel)
+        self._table.bind("<Button-4>", self._on_wheel)
+        self._table.bind("<Button-5>", self._on_wheel)
+        self._update_scrollbar()
+
+    @property
+    def get_selected_id(self):
+        row = self._get_selected_row()
+        if row:
+            return row[0]
+
+    def get_selected_value(self, column_idx):
+        """
+        Returns value from the selected row and the specified column
+
+        :param column_idx: Column index to return the value from
+        :return: value from the selected row and the specified column
+
+        """
+        row = self._get_selected_row()
+        if row and column_idx < self._column_cnt:
+            return row[column_idx]
+
+    def reset(self, row_cnt):
+        """Drops the read rows and shows the table from the first row
+
+        :param row_cnt: count of rows for the current filters
+
+        """
+        if self._cancel:
+            self._cancel()
+        self._generation += 1
+        self._row_cnt = row_cnt
+        self._top = 0
+        self._chunks.clear()
+        self._chunk_keys.clear()
+        self._pending = set()
+        self._selected_row = None
+        self._scroll_to(0)
+
+    def _get_selected_row(self):
+        if self._selected_row is None:
+            return None
+        return self._get_row(self._selected_row)
+
+    def _get_row(self, row_num):
+        chunk = self._chunks.get(row_num // self._chunk_size)
+        if chunk is None:
+            return None
+        idx = row_num % self._chunk_size
+        return chunk[idx] if idx < len(chunk) else None
+
+    def _on_select(self, event=None):
+        selection = self._table.selection()
+        if selection:
+            self._selected_row = self._top + self._items.index(selection[0])
+
+    def _on_wheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self._scroll_to(self._top - 3)
+        else:
+            self._scroll_to(self._top + 3)
+        return "break"
+
+    def _on_scroll(self, *args):
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * self._row_cnt))
+        elif args[0] == "scroll":
+            step = self._visible_rows if args[2] == "pages" else 1
+            self._scroll_to(self._top + int(args[1]) * step)
+
+    def _scroll_to(self, top):
+        self._top = max(0, min(top, self._row_cnt - self._visible_rows))
+        first_chunk = self._top // self._chunk_size
+        last_chunk = (self._top + self._visible_rows) // self._chunk_size
+        self._request_chunks(first_chunk, last_chunk + 1)
+        self._redraw()
+
+    def _request_chunks(self, first_chunk, last_chunk):
+        """Requests the missing chunks of the range by one fetch call
+
+        The running request is kept if it reads all missing chunks,
+        otherwise it is superseded by the new one
+
+        """
+        last_chunk = min(last_chunk, (self._row_cnt - 1) // self._chunk_size)
+        missing = []
+        for chunk_idx in range(first_chunk, last_chunk + 1):
+            if chunk_idx in self._chunks:
+                self._chunks.move_to_end(chunk_idx)
+            else:
+                missing.append(chunk_idx)
+        if not missing or self._pending.issuperset(missing):
+            return
+        first_chunk, chunk_cnt = missing[0], missing[-1] - missing[0] + 1
+        self._generation += 1
+        generation = self._generation
+        self._pending = set(range(first_chunk, first_chunk + chunk_cnt))
+        self._fetch(first_chunk * self._chunk_size,
+                    chunk_cnt * self._chunk_size,
+                    self._chunk_keys.get(first_chunk),
+                    lambda rows: self._on_chunks(generation, first_chunk,
+                                                 chunk_cnt, rows))
+
+    def _on_chunks(self, generation, first_chunk, chunk_cnt, rows):
+        if generation != self._generation:
+            return
+        self._pending = set()
+        if rows is None:
+            return
+        row_cnt = self._row_cnt
+        for chunk_idx in range(first_chunk, first_chunk + chunk_cnt):
+            start = (chunk_idx - first_chunk) * self._chunk_size
+            chunk = rows[start:start + self._chunk_size]
+            self._chunks[chunk_idx] = chunk
+            if len(chunk) == self._chunk_size:
+                self._chunk_keys[chunk_idx + 1] = chunk[-1][0]
+                continue
+            # the short chunk is the last one, the row count can be estimated
+            row_cnt = min(row_cnt, chunk_idx * self._chunk_size + len(chunk))
+            break
+        while len(self._chunks) > self._max_chunks:
+            self._chunks.popitem(last=False)
+        if row_cnt < self._row_cnt:
+            self._row_cnt = row_cnt
+            self._scroll_to(self._top)
+        else:
+            self._redraw()
+
+    def _redraw(self):
+        self._table.selection_remove(self._table.selection())
+        for idx, item in enumerate(self._items):
+            row_num = self._top + idx
+            if row_num >= self._row_cnt:
+                self._table.detach(item)
+                continue
+            row = self._get_row(row_num)
+            values = tuple(row) if row else ("",) * self._column_cnt
+            self._table.item(item, values=values)
+            self._table.move(item, "", idx)
+            if row_num == self._selected_row:
+                self._table.selection_set(item)
+                self._table.focus(item)
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        if self._row_cnt <= self._visible_rows:
+            self._scroll_vertical.set(0, 1)
+            return
+        self._scroll_vertical.set(self._top / self._row_cnt,
+                                  (self._top + self._visible_rows)
+                                  / self._row_cnt)
@@ -15,7 +15,6 @@ class scripttest(BaseScript):
     def __init__(self):
         self._obj_type = ObjectType.FILE
         self._checked_obj_cnt = 0
-        self._results = []
 
     def test(self):
         """Checks resources which is used by script
@@ -29,7 +28,8 @@ class scripttest(BaseScript):
         """Runs script
 
         :param fact_check_id - fact_check table record identifier
-        :return Count of checked objects and script results (set of records)
+        :return generator of script results, which returns count
+        of checked objects
         """
         target_dir = os.path.dirname(os.path.dirname(__file__))
         for folder, subfolders, files in os.walk(target_dir):
@@ -43,9 +43,9 @@ class scripttest(BaseScript):
                                       datetime.datetime.fromtimestamp(
                                           os.path.getmtime(path)),
                                       el, fact_check_id)
-                    self._results.append(obj.to_db_row())
+                    yield obj.to_db_row()
                 self._checked_obj_cnt += 1
-        return [self._checked_obj_cnt, self._results]
+        return self._checked_obj_cnt
 
     @property
     def name(self):
@@ -2,7 +2,6 @@ import os
 import sys
 import fnmatch
 import datetime
-import time
 
 current_dir = os.path.dirname(__file__)
 parent_dir = os.path.dirname(current_dir)
@@ -46,7 +45,7 @@ class scripttestlong(BaseScript):
                                       el, fact_check_id)
                     self._results.append(obj.to_db_row())
                 self._checked_obj_cnt += 1
-        time.sleep(60)
+        self.wait(60)  # the sleep is stopped by the check cancellation
         return [self._checked_obj_cnt, self._results]
 
     @property
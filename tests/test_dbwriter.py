@@ -0,0 +1,72 @@
+import os
+import sqlite3
+import unittest
+
+from db.dbwriter import DbWriter, WriterDbDriver
+from db.sqlitedbdriver import SqliteDbDriver
+from tests.test_sqlitedbdriver import DbTestCase, get_db_config
+
+
+class DbWriterTest(DbTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.writer = DbWriter(SqliteDbDriver(None, get_db_config(
+            os.path.join(self.tmp_dir, "test.db"))), batch_delay=0.05)
+        self.writer.start()
+        self.proxy = WriterDbDriver(self.driver, self.writer)
+
+    def tearDown(self):
+        self.writer.close()
+        super().tearDown()
+
+    def _user_names(self):
+        return {row[1] for row in self.driver.user_rda()}
+
+    def test_error_of_one_operation_does_not_cancel_others(self):
+        futures = [self.writer.submit(lambda driver: driver.user_ins("one")),
+                   self.writer.submit(lambda driver: driver.user_ins("admin")),
+                   self.writer.submit(lambda driver: driver.user_ins("two"))]
+        futures[0].result()
+        futures[2].result()
+        with self.assertRaises(sqlite3.IntegrityError):
+            futures[1].result()
+        self.assertTrue({"one", "two"} <= self._user_names())
+
+    def test_write_unit_is_saved_or_rolled_back_as_whole(self):
+        def insert_users(driver, *names):
+            for name in names:
+                driver.user_ins(name)
+
+        self.proxy.write_unit(insert_users, "one", "two")
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.proxy.write_unit(insert_users, "three", "admin")
+        names = self._user_names()
+        self.assertTrue({"one", "two"} <= names)
+        self.assertNotIn("three", names)
+
+    def test_transaction_methods_are_not_proxied(self):
+        for name in ("begin_transaction", "commit", "savepoint"):
+            with self.assertRaises(RuntimeError):
+                getattr(self.proxy, name)
+
+    def test_submit_after_close_raises(self):
+        self.proxy.user_ins("one")
+        self.writer.close()
+        with self.assertRaises(RuntimeError):
+            self.proxy.user_ins("two")
+
+    def test_queued_operations_fail_if_writer_stops(self):
+        writer = DbWriter(SqliteDbDriver(None, get_db_config(
+            os.path.join(self.tmp_dir, "missing", "test.db"))))
+        future = writer.submit(lambda driver: driver.user_ins("one"))
+        writer.start()
+        with self.assertRaises(Exception):
+            future.result(timeout=5)
+        with self.assertRaises(RuntimeError):
+            writer.submit(lambda driver: driver.user_ins("two"))
+        writer.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
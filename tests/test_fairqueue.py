@@ -0,0 +1,47 @@
+import unittest
+from collections import namedtuple
+
+from core.fairqueue import FairQueue
+
+Item = namedtuple("Item", ["name", "priority", "user_id"])
+
+
+class FairQueueTest(unittest.TestCase):
+
+    def _get_all(self, que):
+        names = []
+        while not que.empty():
+            names.append(que.get_nowait().name)
+        return names
+
+    def test_priority_classes(self):
+        que = FairQueue()
+        que.put(Item("low", 2, 1))
+        que.put(Item("high", 0, 1))
+        que.put(Item("normal", 1, 1))
+        self.assertEqual(self._get_all(que), ["high", "normal", "low"])
+
+    def test_users_are_served_by_turns(self):
+        que = FairQueue()
+        for name in ("a1", "a2", "a3"):
+            que.put(Item(name, 1, "a"))
+        que.put(Item("b1", 1, "b"))
+        que.put(Item("b2", 1, "b"))
+        que.put(Item("c1", 1, "c"))
+        self.assertEqual(que.qsize(), 6)
+        self.assertEqual(self._get_all(que),
+                         ["a1", "b1", "c1", "a2", "b2", "a3"])
+        self.assertEqual(que.qsize(), 0)
+
+    def test_put_after_get(self):
+        que = FairQueue()
+        que.put(Item("a1", 1, "a"))
+        que.put(Item("a2", 1, "a"))
+        self.assertEqual(que.get_nowait().name, "a1")
+        que.put(Item("b1", 1, "b"))
+        que.put(Item("urgent", 0, "a"))
+        self.assertEqual(self._get_all(que), ["urgent", "a2", "b1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
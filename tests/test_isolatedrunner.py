@@ -0,0 +1,110 @@
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+
+from core import isolatedrunner
+from core.basescript import CancelToken, CheckCancelled
+from core.isolatedrunner import IsolatedRunner
+from core.scriptqueue import iter_chunks, get_loader
+
+SCRIPT_TEXT = """import time
+
+from core.basescript import BaseScript
+
+
+class Rows(BaseScript):
+
+    def test(self):
+        return True
+
+    def run(self, fact_check_id):
+        for idx in range(2500):
+            yield (fact_check_id, idx)
+        return 2500
+
+
+class Cooperative(BaseScript):
+
+    def test(self):
+        return True
+
+    def run(self, fact_check_id):
+        while not self.wait(0.05):
+            pass
+        return [0, []]
+
+
+class Hung(BaseScript):
+
+    def test(self):
+        return True
+
+    def run(self, fact_check_id):
+        time.sleep(60)
+        return [0, []]
+"""
+
+
+class IsolatedRunnerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.folder = tempfile.mkdtemp()
+        cls.paths = {}
+        for cls_name in ("Rows", "Cooperative", "Hung"):
+            path = os.path.join(cls.folder, f"runner_{cls_name}.py")
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(SCRIPT_TEXT)
+            cls.paths[cls_name] = path
+        cls.runner = IsolatedRunner(logging.getLogger(__name__),
+                                    multiprocessing.get_context("spawn"))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.runner.close()
+        shutil.rmtree(cls.folder)
+
+    def _run(self, cls_name, token, script_hash=None):
+        path = self.paths[cls_name]
+        task = (path, f"runner_{cls_name}", cls_name,
+                script_hash or get_loader().get_hash(path), 1)
+        chunks = iter_chunks(self.runner.run(task, token))
+        sizes = []
+        while True:
+            try:
+                sizes.append(len(next(chunks)))
+            except StopIteration as stop:
+                return sizes, stop.value
+
+    def test_rows_are_streamed_by_chunks(self):
+        self.assertEqual(self._run("Rows", CancelToken()),
+                         ([1000, 1000, 500], 2500))
+
+    def test_changed_script_is_refused(self):
+        with self.assertRaises(RuntimeError):
+            self._run("Rows", CancelToken(), b"wrong hash")
+
+    def test_cooperative_script_keeps_process(self):
+        self._run("Rows", CancelToken())
+        pid = self.runner._process.pid
+        with self.assertRaises(CheckCancelled):
+            self._run("Cooperative", CancelToken(timeout=0.3))
+        self.assertEqual(self.runner._process.pid, pid)
+
+    def test_hung_script_is_terminated(self):
+        grace_period = isolatedrunner.CANCEL_GRACE_PERIOD
+        isolatedrunner.CANCEL_GRACE_PERIOD = 0.3
+        try:
+            with self.assertRaises(CheckCancelled):
+                self._run("Hung", CancelToken(timeout=0.3))
+        finally:
+            isolatedrunner.CANCEL_GRACE_PERIOD = grace_period
+        self.assertIsNone(self.runner._process)
+        self.assertEqual(self._run("Rows", CancelToken())[1], 2500)
+
+
+if __name__ == "__main__":
+    unittest.main()
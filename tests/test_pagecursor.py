@@ -0,0 +1,41 @@
+import unittest
+
+from forms.pagecursor import PageCursor
+
+FILTERS = (None, "name")
+
+
+class PageCursorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cursor = PageCursor()
+
+    def test_first_page_has_no_key(self):
+        self.assertEqual(self.cursor.seek(FILTERS, 1, 10), (None, 0))
+
+    def test_next_page_is_read_by_key(self):
+        self.cursor.seek(FILTERS, 1, 3)
+        self.cursor.save(FILTERS, 1, 3, [(1,), (4,), (7,)])
+        self.assertEqual(self.cursor.seek(FILTERS, 2, 3), (7, 0))
+
+    def test_jump_is_shifted_from_last_known_page(self):
+        self.cursor.seek(FILTERS, 1, 3)
+        self.cursor.save(FILTERS, 1, 3, [(1,), (4,), (7,)])
+        self.assertEqual(self.cursor.seek(FILTERS, 5, 3), (7, 9))
+        self.assertEqual(self.cursor.seek(FILTERS, 1, 3), (None, 0))
+
+    def test_short_page_has_no_next_key(self):
+        self.cursor.seek(FILTERS, 1, 3)
+        self.cursor.save(FILTERS, 1, 3, [(1,), (4,)])
+        self.assertEqual(self.cursor.seek(FILTERS, 2, 3), (None, 3))
+
+    def test_keys_are_reset_with_filters(self):
+        self.cursor.seek(FILTERS, 1, 3)
+        self.cursor.save(FILTERS, 1, 3, [(1,), (4,), (7,)])
+        self.assertEqual(self.cursor.seek((None, "other"), 2, 3), (None, 3))
+        self.cursor.save(FILTERS, 2, 3, [(8,), (9,), (10,)])
+        self.assertEqual(self.cursor.seek((None, "other"), 3, 3), (None, 6))
+
+
+if __name__ == "__main__":
+    unittest.main()
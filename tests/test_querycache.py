@@ -0,0 +1,90 @@
+import unittest
+
+from db.querycache import CountCache, PageCache
+
+
+class FakeDriver(object):
+    """Driver with the data version and the counters of queries"""
+
+    def __init__(self):
+        self.version = 0
+        self.row_cnt = 10
+        self.max_rowid = 15
+        self.queries = 0
+
+    def data_version(self):
+        return self.version
+
+    def table_cnt_est(self, table_name):
+        return self.max_rowid
+
+    def object_cnt(self, **kwargs):
+        self.queries += 1
+        return self.row_cnt
+
+
+class CountCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.driver = FakeDriver()
+
+    def test_count_is_cached_until_data_change(self):
+        cache = CountCache(self.driver)
+        self.assertEqual(cache.get(self.driver.object_cnt, user_id=1), 10)
+        self.assertEqual(cache.get(self.driver.object_cnt, user_id=1), 10)
+        self.assertEqual(self.driver.queries, 1)
+        self.driver.version += 1
+        self.driver.row_cnt = 11
+        self.assertEqual(cache.get(self.driver.object_cnt, user_id=1), 11)
+        self.assertEqual(self.driver.queries, 2)
+
+    def test_estimate_without_filters(self):
+        cache = CountCache(self.driver, estimate=True)
+        self.assertEqual(cache.get(self.driver.object_cnt, user_id=None), 15)
+        self.assertEqual(cache.get(self.driver.object_cnt, user_id=1), 10)
+
+    def test_exact_count_replaces_estimate(self):
+        cache = CountCache(self.driver, estimate=True)
+        cache.get(self.driver.object_cnt, user_id=None)
+        self.assertEqual(cache.get_exact(self.driver.object_cnt,
+                                         user_id=None), 10)
+        self.assertEqual(cache.get(self.driver.object_cnt, user_id=None), 10)
+
+
+class PageCacheTest(unittest.TestCase):
+
+    def test_page_is_read_again_after_data_change(self):
+        driver = FakeDriver()
+        cache = PageCache(driver, max_size=2)
+        reads = []
+
+        def read():
+            reads.append(1)
+            return [(len(reads),)]
+
+        self.assertEqual(cache.get("object", (), 1, read), [(1,)])
+        self.assertEqual(cache.get("object", (), 1, read), [(1,)])
+        driver.version += 1
+        self.assertEqual(cache.get("object", (), 1, read), [(2,)])
+
+    def test_least_recently_used_page_is_dropped(self):
+        cache = PageCache(FakeDriver(), max_size=2)
+        for page_num in (1, 2, 1, 3):
+            cache.get("object", (), page_num, lambda: [(page_num,)])
+        self.assertEqual(cache.get("object", (), 1, lambda: [("new",)]),
+                         [(1,)])
+        self.assertEqual(cache.get("object", (), 2, lambda: [("new",)]),
+                         [("new",)])
+
+    def test_page_is_read_again_after_version_change(self):
+        cache = PageCache(FakeDriver())
+        self.assertEqual(cache.get("script", (), 1, lambda: [(1,)], 1),
+                         [(1,)])
+        self.assertEqual(cache.get("script", (), 1, lambda: [(2,)], 1),
+                         [(1,)])
+        self.assertEqual(cache.get("script", (), 1, lambda: [(3,)], 2),
+                         [(3,)])
+
+
+if __name__ == "__main__":
+    unittest.main()
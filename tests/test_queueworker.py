@@ -0,0 +1,54 @@
+import queue
+import threading
+import time
+import unittest
+
+from core.basescript import CancelToken, ExecutionMode
+from core.queueworker import QueueWorkerPool
+
+
+class FakeItem(object):
+    """Queue item which saves the token state at the run"""
+
+    execution_mode = None
+    timeout = None
+
+    def __init__(self):
+        self.timed_out = None
+
+    def run_and_save(self, driver, runner=None, token=None):
+        self.timed_out = token.is_timed_out
+
+
+class RunItemTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = QueueWorkerPool(None, {}, queue.Queue(), 1, "process", 1,
+                                    check_timeout=0.2)
+
+    def test_timeout_starts_after_process_slot(self):
+        item = FakeItem()
+        token = CancelToken()
+        self.pool._process_slots.acquire()  # all script processes are busy
+        thread = threading.Thread(target=self.pool._run_item,
+                                  args=(None, None, item, token))
+        thread.start()
+        time.sleep(0.3)
+        self.pool._process_slots.release()
+        thread.join()
+        self.assertFalse(item.timed_out)
+        time.sleep(0.25)
+        self.assertTrue(token.is_timed_out)
+
+    def test_item_timeout_is_used(self):
+        item = FakeItem()
+        item.execution_mode = ExecutionMode.THREAD
+        item.timeout = 5
+        token = CancelToken()
+        self.pool._run_item(None, None, item, token)
+        time.sleep(0.25)
+        self.assertFalse(token.is_timed_out)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import datetime
+import unittest
+
+from core.scheduler import CronSchedule, Scheduler, parse_schedule
+
+
+class CronScheduleTest(unittest.TestCase):
+
+    def _next(self, expression, value):
+        return CronSchedule(expression).next_after(value)
+
+    def test_every_minute(self):
+        self.assertEqual(self._next("* * * * *",
+                                    datetime.datetime(2024, 1, 1, 10, 0, 30)),
+                         datetime.datetime(2024, 1, 1, 10, 1))
+
+    def test_steps_and_lists(self):
+        value = datetime.datetime(2024, 1, 1, 10, 7)
+        self.assertEqual(self._next("*/15 * * * *", value),
+                         datetime.datetime(2024, 1, 1, 10, 15))
+        self.assertEqual(self._next("5,50 9-11 * * *", value),
+                         datetime.datetime(2024, 1, 1, 10, 50))
+        self.assertEqual(self._next("10-40/20 * * * *", value),
+                         datetime.datetime(2024, 1, 1, 10, 10))
+
+    def test_next_month_and_year(self):
+        self.assertEqual(self._next("0 0 1 * *",
+                                    datetime.datetime(2024, 1, 15)),
+                         datetime.datetime(2024, 2, 1))
+        self.assertEqual(self._next("30 6 1 1 *",
+                                    datetime.datetime(2024, 1, 1, 7)),
+                         datetime.datetime(2025, 1, 1, 6, 30))
+
+    def test_weekdays(self):
+        # 2024-01-01 is Monday, 0 and 7 are Sunday
+        monday = datetime.datetime(2024, 1, 1, 12)
+        self.assertEqual(self._next("0 9 * * 0", monday),
+                         datetime.datetime(2024, 1, 7, 9))
+        self.assertEqual(self._next("0 9 * * 7", monday),
+                         datetime.datetime(2024, 1, 7, 9))
+        self.assertEqual(self._next("0 9 * * 1-5", monday),
+                         datetime.datetime(2024, 1, 2, 9))
+
+    def test_day_fields_match_any_of_them(self):
+        # the 10th day of the month or Sunday
+        self.assertEqual(self._next("0 0 10 * 0",
+                                    datetime.datetime(2024, 1, 1)),
+                         datetime.datetime(2024, 1, 7))
+
+    def test_leap_day(self):
+        self.assertEqual(self._next("0 0 29 2 *",
+                                    datetime.datetime(2024, 3, 1)),
+                         datetime.datetime(2028, 2, 29))
+
+    def test_invalid_expressions(self):
+        for expression in ("* * * *", "60 * * * *", "* 24 * * *",
+                           "* * 0 * *", "* * * 13 *", "* * * * 8",
+                           "*/0 * * * *", "5-1 * * * *", "a * * * *"):
+            with self.assertRaises(ValueError, msg=expression):
+                CronSchedule(expression)
+
+    def test_impossible_date(self):
+        with self.assertRaises(ValueError):
+            self._next("0 0 31 2 *", datetime.datetime(2024, 1, 1))
+
+
+class ParseScheduleTest(unittest.TestCase):
+
+    def test_interval(self):
+        self.assertEqual(parse_schedule(" 600 "), (600, None))
+
+    def test_cron(self):
+        self.assertEqual(parse_schedule("0 9 * * 1-5"),
+                         (None, "0 9 * * 1-5"))
+
+    def test_invalid(self):
+        for text in ("0", "-5", "every day"):
+            with self.assertRaises(ValueError, msg=text):
+                parse_schedule(text)
+
+
+class SchedulerSlotsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = Scheduler(None, None, None, {"max_catch_up": 3,
+                                                      "jitter": 0,
+                                                      "catch_up": False})
+
+    def test_interval_slots(self):
+        self.assertEqual(self.scheduler._get_slots(60, None, 1000, 1000),
+                         (1, 1060))
+        self.assertEqual(self.scheduler._get_slots(60, None, 1000, 1200),
+                         (4, 1240))
+
+    def test_cron_slots_are_limited(self):
+        start = int(datetime.datetime(2024, 1, 1, 10).timestamp())
+        missed, next_ts = self.scheduler._get_slots(
+            None, "* * * * *", start, start + 120)
+        self.assertEqual((missed, next_ts), (3, start + 180))
+        missed, next_ts = self.scheduler._get_slots(
+            None, "* * * * *", start, start + 600)
+        self.assertEqual((missed, next_ts), (4, start + 660))
+
+
+class FakeScheduleDriver(object):
+    """Driver with one due schedule"""
+
+    def __init__(self):
+        self.moved = []
+
+    def check_schedule_due(self, now_ts):
+        return [(1, 10, 100, 60, None, 0, 0, now_ts - 30, now_ts - 30)]
+
+    def check_schedule_upd_next(self, schedule_id, run_ts, next_ts,
+                                next_run_ts):
+        self.moved.append(schedule_id)
+        return True
+
+
+class FakeScriptQueue(object):
+    """Script queue which saves put checks with their drivers"""
+
+    def __init__(self):
+        self.checks = []
+
+    def put(self, script_id, link_id, priority=None, driver=None):
+        self.checks.append((script_id, link_id, driver))
+
+
+class RunPendingTest(unittest.TestCase):
+
+    def test_passed_driver_is_used(self):
+        driver = FakeScheduleDriver()
+        thread_driver = FakeScheduleDriver()
+        script_queue = FakeScriptQueue()
+        scheduler = Scheduler(driver, None, script_queue,
+                              {"max_catch_up": 3, "jitter": 0,
+                               "catch_up": False})
+        self.assertEqual(scheduler.run_pending(driver=thread_driver), 1)
+        self.assertEqual(driver.moved, [])
+        self.assertEqual(thread_driver.moved, [1])
+        self.assertEqual(script_queue.checks, [(100, 10, thread_driver)])
+
+
+if __name__ == "__main__":
+    unittest.main()
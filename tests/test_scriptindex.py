@@ -0,0 +1,45 @@
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+from core.scriptindex import ScriptIndex
+from core.scriptloader import ScriptLoader
+
+
+class ScriptIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        logger = logging.getLogger(__name__)
+        self.index = ScriptIndex(logger, ScriptLoader(logger), self.folder,
+                                 max_age=0)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _write(self, file_name, text):
+        with open(os.path.join(self.folder, file_name), "w",
+                  encoding="utf-8") as file:
+            file.write(text)
+
+    def test_generation_is_changed_with_files(self):
+        self._write("script1.py", "a = 1")
+        generation = self.index.generation
+        self.assertEqual(self.index.generation, generation)
+        self.assertIsNotNone(self.index.get_hash("script1.py"))
+        self._write("script2.py", "b = 2")
+        self.assertGreater(self.index.generation, generation)
+
+    def test_changed_file_is_hashed_again(self):
+        self._write("script1.py", "a = 1")
+        old_hash = self.index.get_hash("script1.py")
+        self._write("script1.py", "a = 22")
+        self.assertNotEqual(self.index.get_hash("script1.py"), old_hash)
+        os.remove(os.path.join(self.folder, "script1.py"))
+        self.assertIsNone(self.index.get_hash("script1.py"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import types
+import unittest
+
+from core.scriptloader import ScriptLoader
+
+SCRIPT_TEXT = """from core.basescript import BaseScript
+
+
+class {name}(BaseScript):
+    version = {version}
+"""
+
+HANGING_TEXT = """import sys
+
+sys.modules["tests.test_scriptloader"].IMPORT_STARTED.set()
+sys.modules["tests.test_scriptloader"].RELEASE_IMPORT.wait(5)
+""" + SCRIPT_TEXT
+
+IMPORT_STARTED = threading.Event()
+RELEASE_IMPORT = threading.Event()
+
+
+class ScriptLoaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.loader = ScriptLoader(logging.getLogger(__name__))
+        self.mod_name = "loader_test_script"
+        self.path = os.path.join(self.folder, self.mod_name + ".py")
+
+    def tearDown(self):
+        sys.modules.pop(self.mod_name, None)
+        shutil.rmtree(self.folder)
+
+    def _write(self, version, name="Script"):
+        with open(self.path, "w", encoding="utf-8") as file:
+            file.write(SCRIPT_TEXT.format(name=name, version=version))
+
+    def _get_class(self):
+        return self.loader.get_class(self.path, self.mod_name, "Script")
+
+    def test_class_is_cached(self):
+        self._write(1)
+        self.assertIs(self._get_class(), self._get_class())
+
+    def test_changed_file_is_reloaded(self):
+        self._write(1)
+        self.assertEqual(self._get_class().version, 1)
+        self._write(22)
+        self.assertEqual(self._get_class().version, 22)
+
+    def test_imported_module_is_not_used(self):
+        stale = types.ModuleType(self.mod_name)
+        stale.Script = object
+        sys.modules[self.mod_name] = stale
+        self._write(1)
+        self.assertEqual(self._get_class().version, 1)
+
+    def test_hash_is_changed_with_text(self):
+        self._write(1)
+        old_hash = self.loader.get_hash(self.path)
+        self._write(22)
+        self.assertNotEqual(self.loader.get_hash(self.path), old_hash)
+
+    def test_changed_file_is_refused_by_expected_hash(self):
+        self._write(1)
+        verified_hash = self.loader.get_hash(self.path)
+        self.assertEqual(self.loader.get_class(self.path, self.mod_name,
+                                               "Script",
+                                               verified_hash).version, 1)
+        self._write(22)
+        with self.assertRaises(RuntimeError):
+            self.loader.get_class(self.path, self.mod_name, "Script",
+                                  verified_hash)
+        self.assertEqual(self._get_class().version, 22)
+        with self.assertRaises(RuntimeError):
+            self.loader.get_class(self.path, self.mod_name, "Script",
+                                  verified_hash)
+
+    def test_classes_of_one_file_are_cached_separately(self):
+        with open(self.path, "w", encoding="utf-8") as file:
+            file.write(SCRIPT_TEXT.format(name="Script", version=1)
+                       + SCRIPT_TEXT.format(name="Other", version=2))
+        self.assertEqual(self._get_class().version, 1)
+        self.assertEqual(self.loader.get_class(self.path, self.mod_name,
+                                               "Other").version, 2)
+
+    def test_wrong_class_is_not_loaded(self):
+        self._write(1, name="Other")
+        with self.assertRaises(AssertionError):
+            self._get_class()
+
+    def test_hanging_import_does_not_block_other_files(self):
+        hanging_name = "loader_test_hanging"
+        hanging_path = os.path.join(self.folder, hanging_name + ".py")
+        with open(hanging_path, "w", encoding="utf-8") as file:
+            file.write(HANGING_TEXT.format(name="Script", version=0))
+        self._write(1)
+        IMPORT_STARTED.clear()
+        RELEASE_IMPORT.clear()
+        thread = threading.Thread(target=self.loader.get_class,
+                                  args=(hanging_path, hanging_name, "Script"))
+        thread.start()
+        try:
+            self.assertTrue(IMPORT_STARTED.wait(5))
+            self.assertIsNotNone(self.loader.get_hash(self.path))
+            self.assertEqual(self._get_class().version, 1)
+            self.assertTrue(thread.is_alive())
+        finally:
+            RELEASE_IMPORT.set()
+            thread.join()
+            sys.modules.pop(hanging_name, None)
+
+
+if __name__ == "__main__":
+    unittest.main()
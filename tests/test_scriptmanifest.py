@@ -0,0 +1,71 @@
+import logging
+import threading
+import time
+import unittest
+from collections import Counter
+
+from core.scriptmanifest import ScriptManifest
+
+
+class FakeScript(object):
+
+    def __init__(self, name, release=None):
+        self.name = name
+        self.description = "description"
+        self.author = "author"
+        self._release = release
+
+    def test(self):
+        if self._release:
+            self._release.wait()
+        return True
+
+
+class ScriptManifestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.reads = Counter()
+        self.manifest = ScriptManifest(logging.getLogger(__name__),
+                                       self._read_script, max_workers=1,
+                                       timeout=0.1)
+
+    def tearDown(self):
+        self.release.set()
+
+    def _read_script(self, file_name):
+        self.reads[file_name] += 1
+        if file_name == "hung.py":
+            return FakeScript(file_name, self.release)
+        if file_name == "broken.py":
+            raise RuntimeError("import error")
+        return FakeScript(file_name)
+
+    def test_entries_are_cached_by_hash(self):
+        files = [("ok.py", b"1"), ("broken.py", b"2")]
+        entries = self.manifest.get_entries(files)
+        self.assertEqual(entries, {"ok.py": ("ok.py", "description",
+                                             "author", True)})
+        self.manifest.get_entries(files)
+        self.assertEqual(self.reads, {"ok.py": 1, "broken.py": 1})
+
+    def test_hung_script_does_not_block_others(self):
+        entries = self.manifest.get_entries([("hung.py", b"1")])
+        self.assertIsNone(entries["hung.py"][3])
+        entries = self.manifest.get_entries([("hung.py", b"1"),
+                                             ("ok.py", b"2")])
+        self.assertIsNone(entries["hung.py"][3])
+        self.assertTrue(entries["ok.py"][3])
+        self.assertEqual(self.reads["hung.py"], 1)
+        self.release.set()
+        for _ in range(50):
+            entries = self.manifest.get_entries([("hung.py", b"1")])
+            if entries["hung.py"][3] is not None:
+                break
+            time.sleep(0.02)
+        self.assertTrue(entries["hung.py"][3])
+        self.assertEqual(self.reads["hung.py"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
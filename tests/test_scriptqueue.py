@@ -0,0 +1,252 @@
+import datetime
+import queue
+import unittest
+
+from core.basescript import CancelToken, CheckCancelled
+from core.scriptqueue import is_batch, iter_chunks, OBJECT_CHUNK_SIZE, \
+    QueueItem, ScriptQueue, EXECUTE, RUN, get_loader
+from tests.test_sqlitedbdriver import DbTestCase
+
+
+def rows_generator(rows, batch_size=None):
+    if batch_size is None:
+        yield from rows
+    else:
+        for idx in range(0, len(rows), batch_size):
+            yield rows[idx:idx + batch_size]
+    return len(rows)
+
+
+class IsBatchTest(unittest.TestCase):
+
+    def test_row_is_not_batch(self):
+        self.assertFalse(is_batch((1, "obj")))
+
+    def test_list_of_rows_is_batch(self):
+        self.assertTrue(is_batch([(1, "obj"), [2, "obj"]]))
+
+    def test_empty_list_is_batch(self):
+        self.assertTrue(is_batch([]))
+
+    def test_wrong_row_raises(self):
+        with self.assertRaises(RuntimeError):
+            is_batch([(1, "obj"), "obj"])
+
+
+class IterChunksTest(unittest.TestCase):
+
+    def _collect(self, result, token=None):
+        chunks = iter_chunks(result, token)
+        collected = []
+        while True:
+            try:
+                collected.append(next(chunks))
+            except StopIteration as stop:
+                return collected, stop.value
+
+    def test_list_result(self):
+        rows = [(idx,) for idx in range(3)]
+        chunks, count = self._collect([10, rows])
+        self.assertEqual(chunks, [rows])
+        self.assertEqual(count, 10)
+
+    def test_list_result_with_list_rows(self):
+        rows = [["obj", "", None, None, None, 1, 10],
+                ["obj2", "", None, None, None, 2, 10]]
+        chunks, count = self._collect([2, rows])
+        self.assertEqual(chunks, [rows])
+        self.assertEqual(count, 2)
+
+    def test_list_result_is_chunked(self):
+        rows = [[idx, "obj"] for idx in range(OBJECT_CHUNK_SIZE + 1)]
+        chunks, count = self._collect([len(rows), rows])
+        self.assertEqual([len(chunk) for chunk in chunks],
+                         [OBJECT_CHUNK_SIZE, 1])
+        self.assertEqual(count, len(rows))
+
+    def test_generator_result_is_chunked(self):
+        rows = [(idx,) for idx in range(OBJECT_CHUNK_SIZE * 2 + 1)]
+        chunks, count = self._collect(rows_generator(rows))
+        self.assertEqual([len(chunk) for chunk in chunks],
+                         [OBJECT_CHUNK_SIZE, OBJECT_CHUNK_SIZE, 1])
+        self.assertEqual(count, len(rows))
+
+    def test_batches_and_empty_batches(self):
+        rows = [(idx,) for idx in range(5)]
+
+        def generator():
+            yield []
+            yield rows[:2]
+            yield rows[2]
+            yield []
+            yield rows[3:]
+            return 5
+
+        chunks, count = self._collect(generator())
+        self.assertEqual(chunks, [rows])
+        self.assertEqual(count, 5)
+
+    def test_empty_result(self):
+        chunks, count = self._collect(rows_generator([]))
+        self.assertEqual(chunks, [])
+        self.assertEqual(count, 0)
+
+    def test_cancelled_token_stops_iteration(self):
+        token = CancelToken()
+        token.cancel()
+        with self.assertRaises(CheckCancelled):
+            self._collect(rows_generator([(1,)]), token)
+
+
+class FakeScript(object):
+    """Script which counts its runs"""
+
+    cancel_token = None
+
+    def __init__(self):
+        self.runs = 0
+
+    def test(self):
+        return True
+
+    def run(self, fact_check_id):
+        self.runs += 1
+        return [1, [(f"obj{fact_check_id}", "", None, None,
+                     datetime.datetime.now(), 1, fact_check_id)]]
+
+
+class FakeDriver(object):
+    """Driver which claims every check once"""
+
+    def __init__(self):
+        self.claimed = set()
+        self.statuses = {}
+
+    def fact_check_claim(self, fact_check_id):
+        if fact_check_id in self.claimed:
+            return False
+        self.claimed.add(fact_check_id)
+        return True
+
+    def fact_check_upd(self, fact_check_id, fact_check_end_date,
+                       fact_check_obj_count, fact_check_status_id):
+        self.statuses[fact_check_id] = fact_check_status_id
+
+    def write_unit(self, func, *args, **kwargs):
+        return func(self, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class QueueItemTest(unittest.TestCase):
+
+    def test_check_is_run_once(self):
+        driver = FakeDriver()
+        script = FakeScript()
+        items = [QueueItem(None, script, 1, 10) for _ in range(2)]
+        for item in items:
+            item.run_and_save(driver)
+        self.assertEqual(script.runs, 1)
+        self.assertEqual(driver.statuses, {10: EXECUTE})
+
+
+class FakePlugin(object):
+    """Script plugin which returns one script object"""
+
+    def __init__(self):
+        self.script = FakeScript()
+
+    def get_script(self, script_id, driver=None):
+        return self.script
+
+
+class ScriptQueueTest(DbTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.queue = queue.Queue()
+        self.plugin = FakePlugin()
+        self.script_hash = get_loader().get_hash(__file__)
+
+    def add_check(self, script_hash=None):
+        return super().add_check(script_hash or self.script_hash)
+
+    def _get_ids(self):
+        ids = []
+        while not self.queue.empty():
+            ids.append(self.queue.get().fact_check_id)
+        return ids
+
+    def test_poll_puts_only_new_checks(self):
+        first_id = self.add_check()
+        script_queue = ScriptQueue(self.driver, None, self.plugin, self.queue)
+        self.assertEqual(self._get_ids(), [first_id])
+        self.assertEqual(script_queue.poll_db(), 0)
+        second_id = self.add_check()
+        self.assertEqual(script_queue.poll_db(), 1)
+        self.assertEqual(self._get_ids(), [second_id])
+
+    def test_instances_run_check_once(self):
+        fact_check_id = self.add_check()
+        queues = [ScriptQueue(self.driver, None, self.plugin, self.queue)
+                  for _ in range(2)]
+        items = [self.queue.get() for _ in queues]
+        self.assertEqual([item.fact_check_id for item in items],
+                         [fact_check_id, fact_check_id])
+        for item in items:
+            item.run_and_save(self.driver)
+        self.assertEqual(self.plugin.script.runs, 1)
+        self.assertEqual(self.driver.fact_check_rd_status(fact_check_id)[0],
+                         EXECUTE)
+
+    def test_refresh_skips_claimed_checks(self):
+        first_id = self.add_check()
+        second_id = self.add_check()
+        script_queue = ScriptQueue(self.driver, None, self.plugin, self.queue)
+        self.queue.get().run_and_save(self.driver)
+        script_queue.refresh_from_db()
+        self.assertEqual(self._get_ids(), [second_id])
+        self.assertNotEqual(first_id, second_id)
+
+    def _interrupt(self, fact_check_id):
+        """Claims the check as a worker which was stopped while running it"""
+        self.assertTrue(self.driver.fact_check_claim(fact_check_id))
+        self.driver._cursor.execute("update fact_check "
+                                    "set fact_check_claim_ts = 0 "
+                                    "where fact_check_id = ?",
+                                    (fact_check_id,))
+
+    def test_interrupted_check_is_run_again(self):
+        fact_check_id = self.add_check()
+        self._interrupt(fact_check_id)
+        ScriptQueue(self.driver, None, self.plugin, self.queue, 60)
+        item = self.queue.get_nowait()
+        self.assertEqual(item.fact_check_id, fact_check_id)
+        item.run_and_save(self.driver)
+        self.assertEqual(self.plugin.script.runs, 1)
+        self.assertEqual(self.driver.fact_check_rd_status(fact_check_id)[0],
+                         EXECUTE)
+
+    def test_poll_puts_interrupted_checks(self):
+        first_id = self.add_check()
+        second_id = self.add_check()
+        script_queue = ScriptQueue(self.driver, None, self.plugin, self.queue,
+                                   60)
+        self.assertEqual(self._get_ids(), [first_id, second_id])
+        self._interrupt(first_id)
+        self.assertEqual(script_queue.poll_db(), 2)
+        self.assertEqual(self._get_ids(), [first_id, second_id])
+
+    def test_running_check_is_not_requeued(self):
+        fact_check_id = self.add_check()
+        self.assertTrue(self.driver.fact_check_claim(fact_check_id))
+        script_queue = ScriptQueue(self.driver, None, self.plugin, self.queue,
+                                   60)
+        self.assertEqual(script_queue.poll_db(), 0)
+        self.assertEqual(self.driver.fact_check_rd_status(fact_check_id)[0],
+                         RUN)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+
+from db.sqlfilter import SqlFilter
+
+
+class SqlFilterTest(unittest.TestCase):
+
+    def test_empty(self):
+        sql_filter = SqlFilter()
+        self.assertEqual(sql_filter.where, "")
+        self.assertEqual(sql_filter.params, [])
+
+    def test_none_params_are_skipped(self):
+        sql_filter = SqlFilter("s.script_del_date is null")
+        sql_filter.add("s.user_id = ?", None) \
+            .add("s.script_date between ? and ?", "2024-01-01", None) \
+            .add("s.script_id > ?", 10) \
+            .add_like("s.script_name", "") \
+            .add_like("s.script_name", "abc")
+        self.assertEqual(sql_filter.where,
+                         "where s.script_del_date is null "
+                         "and s.script_id > ? and s.script_name like ? ")
+        self.assertEqual(sql_filter.params, [10, "%abc%"])
+
+    def test_params_are_copied(self):
+        sql_filter = SqlFilter().add("id = ?", 1)
+        sql_filter.params.append(2)
+        self.assertEqual(sql_filter.params, [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,414 @@
+import datetime
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+
+from db.sqlitedbdriver import PooledSqliteDbDriver, SqliteDbDriver, \
+    day_ts, day_range
+from forms.pagecursor import PageCursor
+
+DB_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "db")
+
+
+def get_db_config(db_path, migrations_path=os.path.join(DB_DIR,
+                                                        "migrations")):
+    return {"db_path": db_path,
+            "init_script_path": os.path.join(DB_DIR, "init_db.sql"),
+            "migrations_path": migrations_path,
+            "isolation_level": None,
+            "profile": "durable",
+            "pragmas": {}}
+
+
+class DbTestCase(unittest.TestCase):
+    """Creates the migrated database in a temporary directory"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.driver = SqliteDbDriver(
+            None, get_db_config(os.path.join(self.tmp_dir, "test.db")))
+        self.driver.init_db()
+        self.driver.migrate_db()
+
+    def tearDown(self):
+        self.driver.close_connection()
+        shutil.rmtree(self.tmp_dir)
+
+    def add_check(self, script_hash=b"1"):
+        """Adds the script, the link of the user and the check to the queue
+
+        :param script_hash: hash of the script text
+        :return fact_check identifier
+        """
+        now = datetime.datetime.now()
+        self.driver._cursor.execute("select count(*) from script")
+        script_name = f"script{self.driver._cursor.fetchone()[0]}"
+        self.driver.script_ins(script_name, "description", "author", now,
+                               script_hash, 1)
+        script_id = self.driver._cursor.lastrowid
+        self.driver.user_script_link_ins(1, script_id, now)
+        return self.driver.fact_check_ins(now, self.driver._cursor.lastrowid)
+
+
+class MigrationTest(DbTestCase):
+
+    def _versions(self):
+        self.driver._cursor.execute("select schema_version_id, "
+                                    "schema_version_file from schema_version "
+                                    "order by 1")
+        return self.driver._cursor.fetchall()
+
+    def _get_driver(self, migrations):
+        migrations_path = os.path.join(self.tmp_dir, "migrations")
+        os.mkdir(migrations_path)
+        for file_name, text in migrations.items():
+            with open(os.path.join(migrations_path, file_name), "w",
+                      encoding="utf-8") as migration:
+                migration.write(text)
+        driver = SqliteDbDriver(None, get_db_config(
+            os.path.join(self.tmp_dir, "test.db"), migrations_path))
+        driver.get_connection()
+        return driver
+
+    def test_all_migrations_are_applied(self):
+        versions = self._versions()
+        self.assertEqual([row[1] for row in versions],
+                         sorted(os.listdir(os.path.join(DB_DIR,
+                                                        "migrations"))))
+        self.assertEqual(self.driver.migrate_db(), [])
+
+    def test_file_name_is_saved_as_parameter(self):
+        version = self._versions()[-1][0] + 1
+        file_name = f"{version}_it's.sql"
+        driver = self._get_driver({file_name: "create table t(id integer)"})
+        try:
+            self.assertEqual(driver.migrate_db(), [file_name])
+        finally:
+            driver.close_connection()
+        self.assertEqual(self._versions()[-1], (version, file_name))
+
+    def test_failed_migration_is_rolled_back(self):
+        version = self._versions()[-1][0] + 1
+        driver = self._get_driver({
+            f"{version}_broken.sql":
+                "create table t(id integer);\ninsert into missing values(1)"})
+        try:
+            with self.assertRaises(RuntimeError):
+                driver.migrate_db()
+            driver._cursor.execute("select count(*) from sqlite_master "
+                                   "where name = 't'")
+            self.assertEqual(driver._cursor.fetchone()[0], 0)
+        finally:
+            driver.close_connection()
+        self.assertNotEqual(self._versions()[-1][0], version)
+
+
+class ClaimTest(DbTestCase):
+
+    def test_check_is_claimed_once(self):
+        fact_check_id = self.add_check()
+        self.assertTrue(self.driver.fact_check_claim(fact_check_id))
+        self.assertFalse(self.driver.fact_check_claim(fact_check_id))
+        self.assertEqual(self.driver.fact_check_rd_status(fact_check_id)[0],
+                         5)
+        self.assertEqual(self.driver.fact_check_que(), [])
+
+    def test_interrupted_check_is_requeued(self):
+        fact_check_id = self.add_check()
+        self.assertTrue(self.driver.fact_check_claim(fact_check_id))
+        now = int(time.time())
+        self.assertEqual(self.driver.fact_check_requeue(now - 60), 0)
+        self.assertEqual(self.driver.fact_check_requeue(now + 1), 1)
+        self.assertEqual(self.driver.fact_check_rd_status(fact_check_id)[0],
+                         1)
+        self.assertEqual([row[0] for row in self.driver.fact_check_que()],
+                         [fact_check_id])
+        self.assertTrue(self.driver.fact_check_claim(fact_check_id))
+
+    def test_finished_check_is_not_requeued(self):
+        fact_check_id = self.add_check()
+        self.driver.fact_check_claim(fact_check_id)
+        self.driver.fact_check_upd(fact_check_id, datetime.datetime.now(),
+                                   fact_check_obj_count=0,
+                                   fact_check_status_id=2)
+        self.assertEqual(self.driver.fact_check_requeue(time.time() + 1), 0)
+
+    def test_cancelled_check_is_not_claimed(self):
+        fact_check_id = self.add_check()
+        self.driver.fact_check_upd(fact_check_id, datetime.datetime.now(),
+                                   fact_check_obj_count=None,
+                                   fact_check_status_id=4)
+        self.assertFalse(self.driver.fact_check_claim(fact_check_id))
+
+    def test_check_is_claimed_by_one_connection(self):
+        fact_check_id = self.add_check()
+        other = SqliteDbDriver(
+            None, get_db_config(os.path.join(self.tmp_dir, "test.db")))
+        other.get_connection()
+        try:
+            claims = [self.driver.fact_check_claim(fact_check_id),
+                      other.fact_check_claim(fact_check_id)]
+        finally:
+            other.close_connection()
+        self.assertEqual(claims, [True, False])
+
+
+class ProfileTest(DbTestCase):
+
+    def _get_driver(self, profile, pragmas=None):
+        db_config = get_db_config(os.path.join(self.tmp_dir, "test.db"))
+        db_config.update(profile=profile, pragmas=pragmas or {})
+        driver = SqliteDbDriver(None, db_config)
+        driver.get_connection()
+        self.addCleanup(driver.close_connection)
+        return driver
+
+    def test_durable_pragmas(self):
+        settings = self.driver.connection_settings()
+        self.assertEqual(settings["profile"], "durable")
+        self.assertEqual(settings["journal_mode"], "wal")
+        self.assertEqual(settings["synchronous"], 2)  # full
+        self.assertEqual(settings["cache_size"], -16000)
+        self.assertEqual(settings["busy_timeout"], 5000)
+        self.assertEqual(settings["query_only"], 0)
+        self.assertFalse(settings["read_only"])
+
+    def test_throughput_pragmas_and_overrides(self):
+        settings = self._get_driver("throughput",
+                                    {"cache_size": -1000}).connection_settings()
+        self.assertEqual(settings["synchronous"], 1)  # normal
+        self.assertEqual(settings["temp_store"], 2)  # memory
+        self.assertEqual(settings["busy_timeout"], 10000)
+        self.assertEqual(settings["cache_size"], -1000)
+
+    def test_unknown_profile(self):
+        with self.assertRaises(RuntimeError):
+            self._get_driver("unknown")
+
+    def test_readonly_ui_pragmas(self):
+        settings = self._get_driver("readonly-ui").connection_settings()
+        self.assertTrue(settings["read_only"])
+        self.assertEqual(settings["query_only"], 1)
+        self.assertEqual(settings["journal_mode"], "wal")  # of the writer
+        self.assertEqual(settings["synchronous"], 1)
+        self.assertEqual(settings["busy_timeout"], 2000)
+
+    def test_readonly_ui_rejects_writes(self):
+        driver = self._get_driver("readonly-ui")
+        self.assertTrue(driver.user_rda())
+        with self.assertRaises(sqlite3.Error):
+            driver.user_ins("reader")
+        # the mode=ro connection refuses writes without query_only too
+        driver = self._get_driver("readonly-ui", {"query_only": 0})
+        with self.assertRaises(sqlite3.Error):
+            driver.user_ins("reader")
+        self.assertNotIn("reader", [row[1] for row in self.driver.user_rda()])
+
+    def test_read_snapshot(self):
+        driver = self._get_driver("readonly-ui")
+        with driver.read_snapshot():
+            user_cnt = len(driver.user_rda())
+            self.driver.user_ins("writer")
+            self.assertEqual(len(driver.user_rda()), user_cnt)
+        self.assertEqual(len(driver.user_rda()), user_cnt + 1)
+
+
+class DayRangeTest(unittest.TestCase):
+
+    def test_day_ts_is_day_start(self):
+        self.assertEqual(day_ts(datetime.date(2024, 1, 1)), 1704067200)
+        self.assertEqual(day_ts(datetime.datetime(2024, 1, 1, 23, 59, 59)),
+                         1704067200)
+        self.assertEqual(day_ts(datetime.date(2024, 2, 28), days=2),
+                         day_ts(datetime.date(2024, 3, 1)))
+
+    def test_range_includes_the_end_day(self):
+        self.assertEqual(day_range(datetime.date(2024, 1, 1),
+                                   datetime.date(2024, 1, 2)),
+                         (1704067200, 1704067200 + 2 * 86400))
+        self.assertEqual(day_range(datetime.date(2024, 1, 1),
+                                   datetime.date(2024, 1, 1)),
+                         (1704067200, 1704067200 + 86400))
+
+    def test_open_range(self):
+        self.assertEqual(day_range(None, None), (None, None))
+        self.assertEqual(day_range(None, datetime.date(2024, 1, 1)),
+                         (None, 1704067200 + 86400))
+
+
+class DateFilterTest(DbTestCase):
+    """Filters by *_ts columns return the rows of the date() filters"""
+
+    DATES = [datetime.datetime(2023, 12, 31, 23, 59, 59),
+             datetime.datetime(2024, 1, 1),
+             datetime.datetime(2024, 1, 1, 23, 59, 59),
+             datetime.datetime(2024, 1, 2, 12, 30),
+             datetime.datetime(2024, 1, 2, 23, 59, 59),
+             datetime.datetime(2024, 1, 3)]
+    RANGES = [(datetime.date(2024, 1, 1), datetime.date(2024, 1, 2)),
+              (datetime.date(2024, 1, 2), datetime.date(2024, 1, 2)),
+              (datetime.datetime(2024, 1, 1, 12), None),
+              (None, datetime.date(2024, 1, 1)),
+              (None, None)]
+
+    def _by_date(self, table, column, date_from, date_to):
+        """Returns identifiers by the date() conditions of the baseline"""
+        self.driver._cursor.execute(
+            f"select {table}_id from {table} "
+            f"where (?1 is null or date({column}) >= date(?1)) "
+            f"	and (?2 is null or date({column}) <= date(?2)) "
+            "order by 1",
+            (date_from, date_to))
+        return [row[0] for row in self.driver._cursor.fetchall()]
+
+    def test_check_queue_dates(self):
+        self.add_check()  # the link for the checks
+        self.driver._cursor.execute("delete from fact_check")
+        link_id = self.driver._cursor.execute(
+            "select max(user_script_link_id) from user_script_link"
+        ).fetchone()[0]
+        for value in self.DATES:
+            self.driver.fact_check_ins(value, link_id)
+        for date_from, date_to in self.RANGES:
+            rows = self.driver.fact_check_rd_pg(100, 0, None, None, None,
+                                                None, None, date_from,
+                                                date_to)
+            self.assertEqual([row[0] for row in rows],
+                             self._by_date("fact_check",
+                                           "fact_check_que_date", date_from,
+                                           date_to),
+                             (date_from, date_to))
+        self.assertEqual(len(self._by_date("fact_check", "fact_check_que_date",
+                                           *self.RANGES[0])), 4)
+
+    def test_object_dates(self):
+        fact_check_id = self.add_check()
+        self.driver.object_ins([(f"obj{idx}", "", None, None, value, 1,
+                                 fact_check_id)
+                                for idx, value in enumerate(self.DATES)])
+        for date_from, date_to in self.RANGES:
+            rows = self.driver.object_rd_pg(100, 0, None, None, None, None,
+                                            None, None, None, date_from,
+                                            date_to)
+            self.assertEqual([row[0] for row in rows],
+                             self._by_date("object", "object_date",
+                                           date_from, date_to),
+                             (date_from, date_to))
+
+
+class KeysetPaginationTest(DbTestCase):
+
+    def _read_pages(self, read_page, page_nums, limit=3, filters=()):
+        """Reads pages in the order by keys of the page cursor"""
+        cursor = PageCursor()
+        pages = {}
+        for page_num in page_nums:
+            after_id, offset = cursor.seek(filters, page_num, limit)
+            rows = read_page(limit, offset, after_id)
+            cursor.save(filters, page_num, limit, rows)
+            pages[page_num] = rows
+        return pages
+
+    def _read_by_offset(self, read_page, page_nums, limit=3):
+        return {page_num: read_page(limit, (page_num - 1) * limit, None)
+                for page_num in page_nums}
+
+    def test_user_pages(self):
+        for idx in range(10):
+            self.driver.user_ins(f"user{idx}")
+
+        def read_page(limit, offset, after_id):
+            return self.driver.user_rd_pg("user", limit, offset, after_id)
+        pages = self._read_pages(read_page, range(1, 5))
+        self.assertEqual(pages, self._read_by_offset(read_page, range(1, 5)))
+        self.assertEqual([row[1] for row in pages[4]], ["user9"])
+
+    def test_page_jumps(self):
+        ids = [self.add_check() for _ in range(11)]
+
+        def read_page(limit, offset, after_id):
+            return self.driver.fact_check_rd_pg(limit, offset, None, None,
+                                                None, None, None, None, None,
+                                                after_id)
+        # the jump past the known pages and back
+        page_nums = [1, 3, 4, 2, 1, 4]
+        pages = self._read_pages(read_page, page_nums)
+        self.assertEqual(pages, self._read_by_offset(read_page, page_nums))
+        self.assertEqual([row[0] for row in pages[4]], ids[9:])
+
+    def test_filtered_object_pages(self):
+        fact_check_id = self.add_check()
+        other_id = self.add_check()
+        now = datetime.datetime.now()
+        rows = [(f"obj{idx}", "", None, None, now, 1 + idx % 2, check_id)
+                for idx in range(6) for check_id in (fact_check_id, other_id)]
+        self.driver.object_ins(rows)
+
+        def read_page(limit, offset, after_id):
+            return self.driver.object_rd_pg(limit, offset, None,
+                                            fact_check_id, 2, None, None,
+                                            None, None, None, None, after_id)
+        pages = self._read_pages(read_page, [1, 2], limit=2)
+        self.assertEqual(pages, self._read_by_offset(read_page, [1, 2],
+                                                     limit=2))
+        self.assertEqual([row[4] for row in pages[1] + pages[2]],
+                         ["obj1", "obj3", "obj5"])
+
+
+class PooledDriverTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.driver = PooledSqliteDbDriver(
+            None, get_db_config(os.path.join(self.tmp_dir, "test.db")))
+        self.driver.init_db()
+        self.driver.migrate_db()
+
+    def tearDown(self):
+        self.driver.close_connection()
+        shutil.rmtree(self.tmp_dir)
+
+    def _run_in_thread(self, target):
+        result = {}
+
+        def run():
+            try:
+                result["value"] = target()
+            finally:
+                self.driver.close_connection()
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+        return result.get("value")
+
+    def test_threads_use_own_connections(self):
+        self.driver.user_ins("main")
+        conn = self.driver._conn
+
+        def get_conn():
+            self.driver.user_rda()
+            return self.driver._conn
+        other_conn = self._run_in_thread(get_conn)
+        self.assertIsNotNone(other_conn)
+        self.assertIsNot(other_conn, conn)
+        self.assertIs(self.driver._conn, conn)
+        self.assertEqual(self.driver._connections, {conn})
+
+    def test_threads_see_committed_rows(self):
+        self._run_in_thread(lambda: self.driver.user_ins("other"))
+        names = [row[1] for row in self.driver.user_rda()]
+        self.assertIn("other", names)
+
+    def test_close_connection(self):
+        self.driver.get_connection()
+        self.driver.close_connection()
+        self.assertIsNone(self.driver._conn)
+        self.assertEqual(self.driver._connections, set())
+
+
+if __name__ == "__main__":
+    unittest.main()